@@ -10,33 +10,99 @@ from datasets import load_dataset
 from huggingface_hub import login
 import json
 import boto3
+from boto3.s3.transfer import TransferConfig
 import requests
 import mysql.connector
 from mysql.connector import Error
-from data_load.parameter_config_airflow import AWS_ACCESS_KEY_ID , AWS_SECRET_ACCESS_KEY, AWS_S3_BUCKET_NAME, AWS_RDS_HOST, AWS_RDS_USERNAME, AWS_RDS_PASSWORD, AWS_RDS_DB_PORT, AWS_RDS_DATABASE, HUGGINGFACE_TOKEN
+from data_load.parameter_config_airflow import settings
 import data_load.data_storage_log as logging_module
 from data_load.db_connection import get_db_connection
 import pandas as pd
 import logging
-import data_load.parameter_config_airflow
-
-# Getting environmental variables
-aws_access_key_id = AWS_ACCESS_KEY_ID
-aws_secret_access_key = AWS_SECRET_ACCESS_KEY
-aws_bucket_name = AWS_S3_BUCKET_NAME
-aws_rds_host = AWS_RDS_HOST
-aws_rds_user = AWS_RDS_USERNAME
-aws_rds_password = AWS_RDS_PASSWORD
-aws_rds_port = AWS_RDS_DB_PORT
-aws_rds_database = AWS_RDS_DATABASE
-hugging_face_token = HUGGINGFACE_TOKEN
+import tempfile
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Bulk loader settings for gaia_metadata_tbl_pdf
+METADATA_LOAD_MODE = os.getenv("METADATA_LOAD_MODE", "executemany")  # 'executemany' or 'load_data'
+METADATA_BATCH_SIZE = int(os.getenv("METADATA_BATCH_SIZE", 1000))     # Rows per INSERT batch / transaction
+
+# Columns loaded into gaia_metadata_tbl_pdf, mapped from the GAIA dataset column names
+METADATA_COLUMNS = {
+    'task_id': 'task_id',
+    'Question': 'Question',
+    'Level': 'Level',
+    'final_answer': 'Final answer',
+    'file_name': 'file_name',
+    'file_path': 'file_path',
+    'Annotator_Metadata': 'Annotator Metadata',
+    'source': 'source',
+}
+
+def _metadata_rows(df: pd.DataFrame) -> list:
+    """Converts the GAIA DataFrame into a list of plain Python tuples ready for the MySQL driver."""
+    values = df[list(METADATA_COLUMNS.values())].astype(object)
+    values = values.where(pd.notna(values), None)
+    return [tuple(row) for row in values.itertuples(index=False, name=None)]
+
+def _csv_field(value) -> str:
+    """Formats a value for LOAD DATA: NULL unquoted, everything else enclosed in double quotes."""
+    if value is None:
+        return 'NULL'
+    return '"' + str(value).replace('"', '""') + '"'
+
+def _insert_metadata_executemany(connection, cursor, rows: list, batch_size: int) -> None:
+    """Inserts rows with one multi-row executemany and one commit per batch."""
+    insert_query = f"""
+    INSERT INTO gaia_metadata_tbl_pdf ({', '.join(METADATA_COLUMNS)})
+    VALUES ({', '.join(['%s'] * len(METADATA_COLUMNS))})
+    """
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        batch_start = time.perf_counter()
+        cursor.executemany(insert_query, batch)
+        connection.commit()
+        elapsed = time.perf_counter() - batch_start
+        logging_module.log_success(f"Inserted batch of {len(batch)} rows ({start + len(batch)}/{len(rows)}) in {elapsed:.3f}s.")
+
+def _insert_metadata_load_data(connection, cursor, rows: list) -> None:
+    """Writes rows to a temporary CSV file and loads it in a single LOAD DATA LOCAL INFILE transaction."""
+    with tempfile.NamedTemporaryFile('w', suffix='.csv', encoding='utf-8', newline='', delete=False) as csv_file:
+        for row in rows:
+            csv_file.write(','.join(_csv_field(value) for value in row) + '\n')
+    try:
+        cursor.execute(f"""
+        LOAD DATA LOCAL INFILE '{csv_file.name}'
+        INTO TABLE gaia_metadata_tbl_pdf
+        CHARACTER SET utf8mb4
+        FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+        LINES TERMINATED BY '\\n'
+        ({', '.join(METADATA_COLUMNS)})
+        """)
+        connection.commit()
+    finally:
+        os.remove(csv_file.name)
 
 # Function to load the GAIA metadata into MySQL RDS
-def load_gaia_metadata_tbl():
-    """Loads the GAIA dataset from Hugging Face into an AWS RDS MySQL table"""
+def load_gaia_metadata_tbl(load_mode: str = METADATA_LOAD_MODE, batch_size: int = METADATA_BATCH_SIZE):
+    """Loads the GAIA dataset from Hugging Face into an AWS RDS MySQL table
+
+    Args:
+        load_mode (str): 'executemany' inserts batches of `batch_size` rows with one commit per batch,
+            'load_data' bulk loads a generated CSV file with LOAD DATA LOCAL INFILE.
+        batch_size (int): Number of rows per INSERT batch when load_mode is 'executemany'.
+
+    Returns:
+        int: The number of rows loaded, or None if the load failed.
+    """
+    if load_mode not in ('executemany', 'load_data'):
+        raise ValueError(f"Unknown metadata load mode: {load_mode}")
+
     # MySQL connection to AWS RDS
     try:
-        connection = get_db_connection()
+        connection = get_db_connection(allow_local_infile=(load_mode == 'load_data'))
         if connection.is_connected():
             logging_module.log_success("MySQL connection established successfully.")
     except Error as e:
@@ -45,7 +111,7 @@ def load_gaia_metadata_tbl():
 
     # Login with Hugging Face token
     try:
-        login(token=hugging_face_token)
+        login(token=settings.HUGGINGFACE_TOKEN)
         logging_module.log_success("Logged in to Hugging Face successfully.")
     except Exception as e:
         logging_module.log_error(f"Failed to login to Hugging Face: {e}")
@@ -89,22 +155,28 @@ def load_gaia_metadata_tbl():
             s3_url VARCHAR(255),
             file_extension VARCHAR(255),
             unstructured_api_url VARCHAR(255),
-            opensource_url VARCHAR(255)
+            opensource_url VARCHAR(255),
+            unstructured_tokens_o200k_base INT,
+            unstructured_tokens_cl100k_base INT,
+            opensource_tokens_o200k_base INT,
+            opensource_tokens_cl100k_base INT
         );
         """
         cursor.execute(create_table_query)
         logging_module.log_success("Table gaia_metadata_tbl_pdf created successfully.")
 
         # Insert the data into the table
-        insert_query = """
-        INSERT INTO gaia_metadata_tbl_pdf (task_id, Question, Level, final_answer, file_name, file_path, Annotator_Metadata, source)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        for _, row in filtered_df.iterrows():
-            cursor.execute(insert_query, (row['task_id'], row['Question'], row['Level'], row['Final answer'], row['file_name'], row['file_path'], row['Annotator Metadata'], row['source']))
+        rows = _metadata_rows(filtered_df)
+        load_start = time.perf_counter()
+        if load_mode == 'load_data':
+            _insert_metadata_load_data(connection, cursor, rows)
+        else:
+            _insert_metadata_executemany(connection, cursor, rows, batch_size)
+        elapsed = time.perf_counter() - load_start
 
-        connection.commit()
-        logging_module.log_success("GAIA metadata inserted into AWS RDS successfully.")
+        logging_module.log_success(f"GAIA metadata inserted into AWS RDS successfully: {len(rows)} rows in {elapsed:.3f}s "
+                                   f"({len(rows) / elapsed if elapsed else 0:.0f} rows/s, mode={load_mode}).")
+        return len(rows)
     except Exception as e:
         logging_module.log_error(f"Error saving GAIA metadata to MySQL: {e}")
     finally:
@@ -113,9 +185,149 @@ def load_gaia_metadata_tbl():
             connection.close()
             logging_module.log_success("MySQL connection closed after metadata insertion.")
 
+# Hugging Face to S3 transfer settings
+TRANSFER_MAX_WORKERS = int(os.getenv("TRANSFER_MAX_WORKERS", 8))        # Concurrent file transfers
+TRANSFER_MAX_RETRIES = int(os.getenv("TRANSFER_MAX_RETRIES", 5))        # Retries on 429/5xx and connection errors
+TRANSFER_BACKOFF_BASE = float(os.getenv("TRANSFER_BACKOFF_BASE", 1.0))  # Seconds, doubled on every retry
+TRANSFER_BACKOFF_MAX = float(os.getenv("TRANSFER_BACKOFF_MAX", 30.0))   # Upper bound for a single backoff
+RDS_UPDATE_BATCH_SIZE = int(os.getenv("RDS_UPDATE_BATCH_SIZE", 50))     # Records per batched UPDATE
+TRANSFER_PART_SIZE = int(os.getenv("TRANSFER_PART_SIZE", 8 * 1024 * 1024))  # Bytes per multipart part (S3 minimum is 5 MiB)
+TRANSFER_UPLOAD_CONCURRENCY = int(os.getenv("TRANSFER_UPLOAD_CONCURRENCY", 4))  # Parts uploaded in parallel per file
+
+# Streams are read in fixed-size parts and uploaded while the next part downloads, so memory per file is
+# bounded by the part size times the parts in flight, regardless of the file size. Files smaller than one
+# part are sent with a single PUT.
+STREAMING_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=TRANSFER_PART_SIZE,
+    multipart_chunksize=TRANSFER_PART_SIZE,
+    max_concurrency=TRANSFER_UPLOAD_CONCURRENCY,
+    use_threads=True
+)
+
+# Hugging Face base URL for validation files
+HUGGINGFACE_BASE_URL = 'https://huggingface.co/datasets/gaia-benchmark/GAIA/resolve/main/2023/'
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# One requests.Session per worker thread so each keeps its own warm connection pool
+_thread_local = threading.local()
+
+def _http_session() -> requests.Session:
+    if not hasattr(_thread_local, 'session'):
+        _thread_local.session = requests.Session()
+    return _thread_local.session
+
+def _backoff_seconds(attempt: int, retry_after: str = None) -> float:
+    """Returns a full-jitter exponential backoff, honouring a numeric Retry-After header when present."""
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), TRANSFER_BACKOFF_MAX)
+    return random.uniform(0, min(TRANSFER_BACKOFF_MAX, TRANSFER_BACKOFF_BASE * 2 ** attempt))
+
+def get_with_retry(url: str, headers: dict, max_retries: int = TRANSFER_MAX_RETRIES, **kwargs) -> requests.Response:
+    """
+    Sends a GET request, retrying with jittered exponential backoff on HTTP 429/5xx responses and connection errors.
+
+    Args:
+        url (str): The URL to fetch.
+        headers (dict): The request headers.
+        max_retries (int): The number of retries after the first attempt.
+        **kwargs: Extra arguments passed to requests.Session.get.
+
+    Returns:
+        requests.Response: The last response received; callers check its status code.
+
+    Raises:
+        requests.exceptions.RequestException: If the last attempt failed without a response.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            response = _http_session().get(url, headers=headers, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt == max_retries:
+                raise
+            delay = _backoff_seconds(attempt)
+            logging_module.log_error(f"Error fetching {url}: {e}. Retrying in {delay:.1f}s.")
+        else:
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == max_retries:
+                return response
+            delay = _backoff_seconds(attempt, response.headers.get('Retry-After'))
+            response.close()
+            logging_module.log_error(f"HTTP {response.status_code} fetching {url}. Retrying in {delay:.1f}s.")
+        time.sleep(delay)
+
+def _transfer_gaia_file(s3, record: dict, headers: dict) -> tuple:
+    """
+    Streams one GAIA file from Hugging Face into S3 without buffering the whole file in memory.
+
+    Returns:
+        tuple: (task_id, s3_url), or None if the file could not be transferred.
+    """
+    task_id = record['task_id']
+    file_name = record['file_name'].strip()
+    category = record['source']
+
+    # Determine the file URL based on the category
+    if category == 'validation':
+        file_url = HUGGINGFACE_BASE_URL + 'validation/' + file_name
+    else:
+        file_url = HUGGINGFACE_BASE_URL + 'test/' + file_name
+
+    # Stream the file from Hugging Face straight into an S3 (multipart) upload
+    try:
+        with get_with_retry(file_url, headers, stream=True) as response:
+            if response.status_code != 200:
+                logging_module.log_error(f"Failed to download {file_name}: HTTP {response.status_code}")
+                return None
+            logging_module.log_success(f"Streaming {file_name} from Hugging Face.")
+
+            response.raw.decode_content = True
+            s3_key = f"gaia_files/{file_name}"
+            s3.upload_fileobj(response.raw, settings.AWS_S3_BUCKET_NAME, s3_key, Config=STREAMING_TRANSFER_CONFIG)
+            s3_url = f"https://{settings.AWS_S3_BUCKET_NAME}.s3.amazonaws.com/{s3_key}"
+            logging_module.log_success(f"Uploaded {file_name} to S3 at {s3_url}")
+            return task_id, s3_url
+    except requests.exceptions.RequestException as e:
+        logging_module.log_error(f"Error downloading {file_name}: {e}")
+    except Exception as e:
+        logging_module.log_error(f"Error uploading {file_name} to S3: {e}")
+    return None
+
+def _update_s3_urls_batch(connection, cursor, results: list) -> None:
+    """
+    Writes the S3 URL and file extension of a batch of transferred files with a single UPDATE and commit.
+
+    Args:
+        results (list): (task_id, s3_url) tuples.
+    """
+    case_clauses = ' '.join(['WHEN %s THEN %s'] * len(results))
+    placeholders = ', '.join(['%s'] * len(results))
+    update_query = f"""
+        UPDATE gaia_metadata_tbl_pdf
+        SET s3_url = CASE task_id {case_clauses} ELSE s3_url END,
+            file_extension = SUBSTRING_INDEX(file_name, '.', -1)
+        WHERE task_id IN ({placeholders})
+    """
+    params = [value for result in results for value in result] + [task_id for task_id, _ in results]
+    try:
+        cursor.execute(update_query, params)
+        connection.commit()
+        logging_module.log_success(f"Updated {len(results)} records with S3 URL and file extension.")
+    except Exception as e:
+        connection.rollback()
+        task_ids = ', '.join(task_id for task_id, _ in results)
+        logging_module.log_error(f"Error updating S3 URL or file extension for task_ids {task_ids}: {e}")
+
 # Function to download files from Hugging Face, upload them to S3, and update MySQL RDS
-def upload_gaia_files_to_s3_and_update_rds():
-    """Downloads GAIA dataset files from Hugging Face, uploads them to AWS S3, and updates the corresponding MySQL RDS records with S3 URLs and file extensions."""
+def upload_gaia_files_to_s3_and_update_rds(max_workers: int = TRANSFER_MAX_WORKERS, update_batch_size: int = RDS_UPDATE_BATCH_SIZE):
+    """Downloads GAIA dataset files from Hugging Face, uploads them to AWS S3, and updates the corresponding MySQL RDS records with S3 URLs and file extensions.
+
+    Files are transferred concurrently on a bounded thread pool; the resulting S3 URLs are written back to RDS
+    in batched UPDATE statements, one transaction per `update_batch_size` records.
+
+    Args:
+        max_workers (int): Number of concurrent file transfers.
+        update_batch_size (int): Number of records written per batched UPDATE.
+    """
     # MySQL connection to AWS RDS
     try:
         connection = get_db_connection()
@@ -127,76 +339,47 @@ def upload_gaia_files_to_s3_and_update_rds():
 
     # AWS S3 setup
     try:
-        s3 = boto3.client('s3', aws_access_key_id=aws_access_key_id, aws_secret_access_key=aws_secret_access_key)
+        s3 = boto3.client('s3', aws_access_key_id=settings.AWS_ACCESS_KEY_ID, aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY)
         logging_module.log_success("Connected to S3 bucket.")
     except Exception as e:
         logging_module.log_error(f"Error connecting to S3: {e}")
         return
 
-    # Hugging Face base URL for validation files
-    huggingface_base_url = 'https://huggingface.co/datasets/gaia-benchmark/GAIA/resolve/main/2023/'
-
     # Fetch records from MySQL and update them with S3 URLs
     try:
         headers = {
-            "Authorization": f"Bearer {hugging_face_token}"
+            "Authorization": f"Bearer {settings.HUGGINGFACE_TOKEN}"
         }
 
         cursor = connection.cursor(dictionary=True)
 
         # Fetch records where file_name is not null
-        select_query = "SELECT * FROM gaia_metadata_tbl_pdf"
+        select_query = "SELECT task_id, file_name, source FROM gaia_metadata_tbl_pdf"
         cursor.execute(select_query)
         records = cursor.fetchall()
         logging_module.log_success("Fetched records from gaia_metadata_tbl_pdf.")
 
-        for record in records:
-            task_id = record['task_id']
-            file_name = record['file_name'].strip()
-            category = record['source']
-
-            # Determine the file URL based on the category
-            if category == 'validation':
-                file_url = huggingface_base_url + 'validation/' + file_name
-            else:
-                file_url = huggingface_base_url + 'test/' + file_name
-
-            # Download file from Hugging Face and upload it to S3
-            try:
-                response = requests.get(file_url, headers=headers)
-                if response.status_code == 200:
-                    file_data = response.content
-                    logging_module.log_success(f"Downloaded {file_name} from Hugging Face.")
-
-                    s3_key = f"gaia_files/{file_name}"
-                    s3.put_object(Bucket=aws_bucket_name, Key=s3_key, Body=file_data)
-                    s3_url = f"https://{aws_bucket_name}.s3.amazonaws.com/{s3_key}"
-                    logging_module.log_success(f"Uploaded {file_name} to S3 at {s3_url}")
-
-                    # Update the MySQL table with the S3 URL and file extension
-                    try:
-                        update_s3url_query = """UPDATE gaia_metadata_tbl_pdf
-                                                SET s3_url = %s
-                                                WHERE task_id = %s"""
-                        cursor.execute(update_s3url_query, (s3_url, task_id))
-                        connection.commit()
-                        logging_module.log_success(f"Updated record {task_id} with S3 URL.")
-
-                        update_file_ext_query = """
-                            UPDATE gaia_metadata_tbl_pdf
-                            SET file_extension = SUBSTRING_INDEX(file_name, '.', -1)
-                            WHERE task_id = %s
-                        """
-                        cursor.execute(update_file_ext_query, (task_id,))
-                        connection.commit()
-                        logging_module.log_success(f"Updated record {task_id} with file extension.")
-                    except Exception as e:
-                        logging_module.log_error(f"Error updating S3 URL or file extension for task_id {task_id}: {e}")
-                else:
-                    logging_module.log_error(f"Failed to download {file_name}: HTTP {response.status_code}")
-
-            except requests.exceptions.RequestException as e:
-                logging_module.log_error(f"Error downloading {file_name}: {e}")
+        transfer_start = time.perf_counter()
+        transferred = 0
+        pending = []
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_transfer_gaia_file, s3, record, headers) for record in records]
+            for future in as_completed(futures):
+                result = future.result()
+                if result is None:
+                    continue
+                transferred += 1
+                pending.append(result)
+                if len(pending) >= update_batch_size:
+                    _update_s3_urls_batch(connection, cursor, pending)
+                    pending = []
+
+        if pending:
+            _update_s3_urls_batch(connection, cursor, pending)
+
+        elapsed = time.perf_counter() - transfer_start
+        logging_module.log_success(f"Transferred {transferred}/{len(records)} files to S3 in {elapsed:.1f}s "
+                                   f"with {max_workers} workers.")
 
     except Error as e:
         logging_module.log_error(f"Error while connecting to MySQL: {e}")
@@ -6,27 +6,24 @@
 import os
 import mysql.connector
 from dotenv import load_dotenv
-from data_load.parameter_config_airflow import AWS_RDS_HOST,AWS_RDS_USERNAME,AWS_RDS_PASSWORD,AWS_RDS_DB_PORT,AWS_RDS_DATABASE
+from data_load.parameter_config_airflow import settings
 load_dotenv()
 
-# Getting in Environmental variables
-aws_rds_host=AWS_RDS_HOST
-aws_rds_user=AWS_RDS_USERNAME
-aws_rds_password=AWS_RDS_PASSWORD
-aws_rds_port =AWS_RDS_DB_PORT
-aws_rds_database = AWS_RDS_DATABASE
-
-def get_db_connection() -> mysql.connector.connection_cext.CMySQLConnection:
+def get_db_connection(**connect_args) -> mysql.connector.connection_cext.CMySQLConnection:
     """
     Establishes and returns a connection to the AWS RDS MySQL database using the provided credentials.
 
+    Args:
+        **connect_args: Extra options passed to mysql.connector.connect (e.g. allow_local_infile=True).
+
     Returns:
         mysql.connector.connection_cext.CMySQLConnection: A MySQL database connection object.
     """
     return mysql.connector.connect(
-        host= aws_rds_host,
-        user=aws_rds_user,
-        password=aws_rds_password,
-        port =aws_rds_port,
-        database=aws_rds_database
+        host= settings.AWS_RDS_HOST,
+        user=settings.AWS_RDS_USERNAME,
+        password=settings.AWS_RDS_PASSWORD,
+        port =settings.AWS_RDS_DB_PORT,
+        database=settings.AWS_RDS_DATABASE,
+        **connect_args
     )
\ No newline at end of file
@@ -0,0 +1,83 @@
+# This script keeps track of which source PDFs in S3 have already been extracted, so that daily runs of the
+# extraction DAG only re-process documents that are new or changed.
+# A manifest maps each source key to the ETag and size it had when it was extracted and to the output key that
+# extraction produced. It is stored as JSON under 'manifests/' in the same S3 bucket (outside the output folders,
+# so update_metadata_with_s3_urls never picks it up).
+# A source is skipped when its ETag and size are unchanged and its output object still exists.
+
+import json
+import logging
+
+MANIFEST_PREFIX = 'manifests/'
+
+def iter_s3_objects(s3_client, bucket: str, prefix: str):
+    """
+    Yields every object under a prefix, following list_objects_v2 pagination past the 1000-key page limit.
+
+    Args:
+        s3_client: A boto3 S3 client.
+        bucket (str): The bucket name.
+        prefix (str): The key prefix to list.
+
+    Yields:
+        dict: The list_objects_v2 entry of each object (Key, ETag, Size, ...).
+    """
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        yield from page.get('Contents', [])
+
+def load_manifest(s3_client, bucket: str, name: str) -> dict:
+    """
+    Loads a manifest from S3, returning an empty one if it does not exist yet or cannot be read.
+    """
+    try:
+        body = s3_client.get_object(Bucket=bucket, Key=f"{MANIFEST_PREFIX}{name}.json")['Body'].read()
+        return json.loads(body)
+    except s3_client.exceptions.NoSuchKey:
+        logging.info(f"No manifest '{name}' found, every source will be extracted.")
+    except Exception as e:
+        logging.error(f"Error reading manifest '{name}', every source will be extracted: {e}")
+    return {}
+
+def save_manifest(s3_client, bucket: str, name: str, manifest: dict) -> None:
+    """
+    Writes a manifest back to S3.
+    """
+    try:
+        s3_client.put_object(Bucket=bucket, Key=f"{MANIFEST_PREFIX}{name}.json",
+                             Body=json.dumps(manifest, indent=2, sort_keys=True), ContentType='application/json')
+        logging.info(f"Saved manifest '{name}' with {len(manifest)} entries.")
+    except Exception as e:
+        logging.error(f"Error saving manifest '{name}': {e}")
+
+def is_unchanged(manifest: dict, obj: dict, output_keys: set) -> bool:
+    """
+    Checks whether a source object was already extracted in its current version and its output still exists.
+
+    Args:
+        manifest (dict): The manifest of previous extractions.
+        obj (dict): The list_objects_v2 entry of the source object.
+        output_keys (set): The keys currently present in the output folder.
+    """
+    entry = manifest.get(obj['Key'])
+    return (entry is not None
+            and entry.get('etag') == obj['ETag']
+            and entry.get('size') == obj['Size']
+            and entry.get('output_key') in output_keys)
+
+def pending_sources(manifest: dict, sources: list, output_keys: set, force: bool = False) -> list:
+    """
+    Returns the source objects that need extracting: all of them when `force` is set, otherwise only the
+    new or changed ones and those whose output is missing.
+    """
+    if force:
+        return list(sources)
+    pending = [obj for obj in sources if not is_unchanged(manifest, obj, output_keys)]
+    logging.info(f"{len(sources) - len(pending)} of {len(sources)} sources unchanged since their last extraction.")
+    return pending
+
+def record_extraction(manifest: dict, obj: dict, output_key: str) -> None:
+    """
+    Records in the manifest that a source object was extracted to `output_key`.
+    """
+    manifest[obj['Key']] = {'etag': obj['ETag'], 'size': obj['Size'], 'output_key': output_key}
@@ -1,60 +1,128 @@
-import boto3
-from botocore.exceptions import ClientError
-
-# Define the parameter names to be retrieved
-parameter_names = [
-    'ACCESS_KEY_ID_AWS',
-    'SECRET_ACCESS_KEY_AWS',
-    'RDS_HOST_AWS',
-    'RDS_USERNAME_AWS',
-    'RDS_PASSWORD_AWS',
-    'RDS_DB_PORT_AWS',
-    'RDS_DATABASE_AWS',
-    'SECRET_KEY',
-    'HUGGINGFACE_TOKEN',
-    'S3_BUCKET_NAME_AWS',
-    'UNSTRUCTURED_API_KEY',
-    'UNSTRUCTURED_API_URL',
-    'S3_URL_AWS',
-    'S3_OUTPUT_URI_AWS'
-]
-
-# Create an SSM client
-ssm_client = boto3.client('ssm', region_name='us-east-1')  # Replace 'us-east-1' with your AWS region
-
-# Split the parameters into batches
-batch_1 = ['ACCESS_KEY_ID_AWS', 'SECRET_ACCESS_KEY_AWS', 'RDS_HOST_AWS', 'RDS_USERNAME_AWS', 'RDS_PASSWORD_AWS', 'RDS_DB_PORT_AWS', 'RDS_DATABASE_AWS', 'SECRET_KEY', 'HUGGINGFACE_TOKEN', 'S3_BUCKET_NAME_AWS']
-batch_2 = ['UNSTRUCTURED_API_KEY', 'UNSTRUCTURED_API_URL', 'S3_URL_AWS', 'S3_OUTPUT_URI_AWS']
-
-# Fetch first batch of parameters
-response_1 = ssm_client.get_parameters(Names=batch_1, WithDecryption=True)
-parameters_1 = {param['Name']: param['Value'] for param in response_1['Parameters']}
-
-# Fetch second batch of parameters
-response_2 = ssm_client.get_parameters(Names=batch_2, WithDecryption=True)
-parameters_2 = {param['Name']: param['Value'] for param in response_2['Parameters']}
-
-# Store the values in variables
-AWS_ACCESS_KEY_ID = parameters_1.get('ACCESS_KEY_ID_AWS')
-AWS_SECRET_ACCESS_KEY = parameters_1.get('SECRET_ACCESS_KEY_AWS')
-AWS_RDS_HOST = parameters_1.get('RDS_HOST_AWS')
-AWS_RDS_USERNAME = parameters_1.get('RDS_USERNAME_AWS')
-AWS_RDS_PASSWORD = parameters_1.get('RDS_PASSWORD_AWS')
-AWS_RDS_DB_PORT = parameters_1.get('RDS_DB_PORT_AWS')
-AWS_RDS_DATABASE = parameters_1.get('RDS_DATABASE_AWS')
-UNSTRUCTURED_API_KEY = parameters_2.get('UNSTRUCTURED_API_KEY')
-UNSTRUCTURED_API_URL = parameters_2.get('UNSTRUCTURED_API_URL')
-SECRET_KEY = parameters_1.get('SECRET_KEY')
-AWS_S3_URL = parameters_2.get('S3_URL_AWS')
-AWS_S3_OUTPUT_URI = parameters_2.get('S3_OUTPUT_URI_AWS')
-AWS_S3_BUCKET_NAME = parameters_1.get('S3_BUCKET_NAME_AWS')
-HUGGINGFACE_TOKEN = parameters_1.get('HUGGINGFACE_TOKEN')
-
-# Save specific variables to .env file
-with open('/tmp/env_file.sh', 'w') as env_file:  # You can choose any file path
-    env_file.write(f'export AWS_ACCESS_KEY_ID="{AWS_ACCESS_KEY_ID}"\n')
-    env_file.write(f'export AWS_SECRET_ACCESS_KEY="{AWS_SECRET_ACCESS_KEY}"\n')
-    env_file.write(f'export UNSTRUCTURED_API_KEY="{UNSTRUCTURED_API_KEY}"\n')
-    env_file.write(f'export UNSTRUCTURED_API_URL="{UNSTRUCTURED_API_URL}"\n')
-    env_file.write(f'export AWS_S3_OUTPUT_URI="{AWS_S3_OUTPUT_URI}"\n')
-    env_file.write(f'export AWS_S3_URL="{AWS_S3_URL}"\n')
+# This script provides the Airflow pipeline's configuration parameters through a lazily loaded `settings` object.
+# Nothing is fetched at import time, so parsing the DAG and importing task modules never calls AWS: a parameter
+# is resolved on first access, from the environment variable of the same name if set, otherwise from a local
+# cache file (readable by the owner only, refreshed after a TTL), and only then from AWS SSM Parameter Store.
+# All parameters are fetched from SSM in one call, at most once per process, and shared through the cache file.
+# This mirrors the app's parameter_config.py; the Airflow image does not ship the app's modules.
+# Run directly, the script prints the variables needed by run_unstructured.sh as shell exports.
+
+import os
+import json
+import time
+import shlex
+import tempfile
+import threading
+
+# Setting attribute -> SSM parameter name (also the name of the overriding environment variable)
+PARAMETER_NAMES = {
+    'AWS_ACCESS_KEY_ID': 'ACCESS_KEY_ID_AWS',
+    'AWS_SECRET_ACCESS_KEY': 'SECRET_ACCESS_KEY_AWS',
+    'AWS_RDS_HOST': 'RDS_HOST_AWS',
+    'AWS_RDS_USERNAME': 'RDS_USERNAME_AWS',
+    'AWS_RDS_PASSWORD': 'RDS_PASSWORD_AWS',
+    'AWS_RDS_DB_PORT': 'RDS_DB_PORT_AWS',
+    'AWS_RDS_DATABASE': 'RDS_DATABASE_AWS',
+    'SECRET_KEY': 'SECRET_KEY',
+    'HUGGINGFACE_TOKEN': 'HUGGINGFACE_TOKEN',
+    'AWS_S3_BUCKET_NAME': 'S3_BUCKET_NAME_AWS',
+    'UNSTRUCTURED_API_KEY': 'UNSTRUCTURED_API_KEY',
+    'UNSTRUCTURED_API_URL': 'UNSTRUCTURED_API_URL',
+    'AWS_S3_URL': 'S3_URL_AWS',
+    'AWS_S3_OUTPUT_URI': 'S3_OUTPUT_URI_AWS',
+}
+
+# Variables exported to the Unstructured pipeline script
+EXPORTED_SETTINGS = ['AWS_ACCESS_KEY_ID', 'AWS_SECRET_ACCESS_KEY', 'UNSTRUCTURED_API_KEY', 'UNSTRUCTURED_API_URL',
+                     'AWS_S3_OUTPUT_URI', 'AWS_S3_URL']
+
+SSM_REGION = os.getenv("SSM_REGION", "us-east-1")
+PARAMETER_CACHE_FILE = os.getenv("PARAMETER_CACHE_FILE", os.path.expanduser("~/.cache/bigdatateam7/airflow_parameters.json"))
+PARAMETER_CACHE_TTL = float(os.getenv("PARAMETER_CACHE_TTL", 3600))  # Seconds before the cache file is refreshed from SSM
+
+class LazySettings:
+    """
+    Resolves parameters on first access: environment variable, then the owner-only cache file, then SSM.
+    """
+
+    def __init__(self, parameter_names: dict, cache_file: str = PARAMETER_CACHE_FILE, ttl: float = PARAMETER_CACHE_TTL):
+        self._parameter_names = parameter_names
+        self._cache_file = cache_file
+        self._ttl = ttl
+        self._values = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute: str) -> str:
+        if attribute.startswith('_') or attribute not in self._parameter_names:
+            raise AttributeError(attribute)
+        return self.get(self._parameter_names[attribute])
+
+    def get(self, name: str) -> str:
+        """
+        Returns the value of a parameter by its SSM name, or None if it is not defined anywhere.
+        """
+        value = os.environ.get(name)
+        if value is not None:
+            return value
+        return self._parameters().get(name)
+
+    def _parameters(self) -> dict:
+        if self._values is None:
+            with self._lock:
+                if self._values is None:
+                    values = self._read_cache()
+                    if values is None:
+                        values = self._fetch()
+                        self._write_cache(values)
+                    self._values = values
+        return self._values
+
+    def _read_cache(self) -> dict:
+        try:
+            stat = os.stat(self._cache_file)
+            # Ignore stale caches and caches other users could have read or tampered with
+            if time.time() - stat.st_mtime > self._ttl or stat.st_mode & 0o077 or stat.st_uid != os.getuid():
+                return None
+            with open(self._cache_file) as cache:
+                values = json.load(cache)
+            return values if set(self._parameter_names.values()) <= set(values) else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, values: dict) -> None:
+        try:
+            directory = os.path.dirname(self._cache_file)
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.parameters', suffix='.tmp')  # Created with mode 0600
+            with os.fdopen(fd, 'w') as cache:
+                json.dump(values, cache)
+            os.replace(temp_path, self._cache_file)
+        except OSError:
+            pass  # The cache is an optimization; the values are still used from memory
+
+    def _fetch(self) -> dict:
+        import boto3  # Only needed when a parameter is not set in the environment or the cache
+
+        # Retrieve parameters from AWS SSM Parameter Store, in batches of the API limit of 10 names
+        ssm_client = boto3.client('ssm', region_name=SSM_REGION)
+        names = list(self._parameter_names.values())
+        values = {name: None for name in names}
+        for i in range(0, len(names), 10):
+            response = ssm_client.get_parameters(
+                Names=names[i:i + 10],
+                WithDecryption=True  # Ensure secure strings are decrypted
+            )
+            values.update({param['Name']: param['Value'] for param in response.get('Parameters', [])})
+        return values
+
+settings = LazySettings(PARAMETER_NAMES)
+
+def __getattr__(name: str) -> str:
+    # Keeps `from data_load.parameter_config_airflow import AWS_RDS_HOST` working; this resolves the parameter at
+    # import time, so prefer reading `settings.AWS_RDS_HOST` where it is used
+    if name in PARAMETER_NAMES:
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+if __name__ == "__main__":
+    for name in EXPORTED_SETTINGS:
+        print(f"export {name}={shlex.quote(getattr(settings, name) or '')}")
@@ -2,33 +2,101 @@
 # It connects to AWS S3 to read PDF files from a specific folder, processes them using the pymupdf4llm library,
 # and converts them to markdown format with embedded images and tables.
 # The processed markdown files are then uploaded back to the S3 bucket in a specified output folder as .txt files.
-# The script uses a temporary file to handle the PDF data during processing, ensuring efficient file management.
-# It also logs each successful upload after processing.
+# PDFs are opened directly from their in-memory bytes and can be converted in parallel on a process pool,
+# one worker per CPU by default. It logs each successful upload with per-document timing after processing.
 
-import pymupdf4llm
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 import boto3
 import pandas as pd
 import mysql.connector
 from data_load.db_connection import get_db_connection
-from io import BytesIO
-from data_load.parameter_config_airflow import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_S3_BUCKET_NAME
-import tempfile
+from data_load.pdf_markdown import convert_pdf_to_markdown
+from data_load.extraction_manifest import iter_s3_objects, load_manifest, save_manifest, pending_sources, record_extraction
+from data_load.parameter_config_airflow import settings
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-# Getting AWS credentials from environment variables
-aws_access_key_id = AWS_ACCESS_KEY_ID
-aws_secret_access_key = AWS_SECRET_ACCESS_KEY
-aws_bucket_name = AWS_S3_BUCKET_NAME
+open_source_input_folder = 'gaia_files/'
+open_source_output_folder = 'open_source_processed/'
+open_source_manifest_name = 'open_source_processed'
 
-def process_pdf_open_source():
+# Number of worker processes for parallel extraction; defaults to the CPU count
+OPEN_SOURCE_MAX_WORKERS = int(os.getenv("OPEN_SOURCE_MAX_WORKERS", 0)) or os.cpu_count()
+
+# S3 client of the current process, created once per worker process by _init_worker
+_s3_client = None
+
+def _create_s3_client():
+    return boto3.client(
+        's3',
+        aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+    )
+
+def _init_worker() -> None:
+    global _s3_client
+    _s3_client = _create_s3_client()
+
+def output_key_for(key: str) -> str:
+    """Returns the S3 key of the markdown .txt output produced for a source PDF key."""
+    return open_source_output_folder + key.split('/')[-1].replace('.pdf', '.txt')
+
+def extract_pdf_to_s3(key: str) -> dict:
+    """
+    Downloads one PDF from S3, converts it to markdown and uploads the result as a .txt file.
+    Runs in a worker process (or inline in sequential mode) using the process-wide S3 client.
+
+    Args:
+        key (str): The S3 key of the PDF.
+
+    Returns:
+        dict: The source and output keys, the page count, the conversion time in seconds, and an error message if any.
+    """
+    result = {"key": key, "output_key": None, "pages": 0, "seconds": 0.0, "error": None}
+    try:
+        # Read the PDF file from S3
+        pdf_data = _s3_client.get_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=key)['Body'].read()
+    except Exception as e:
+        result["error"] = f"Error reading PDF from S3: {key}, {e}"
+        return result
+
+    try:
+        # Convert PDF to markdown text using pymupdf4llm
+        start = time.perf_counter()
+        md_text, result["pages"] = convert_pdf_to_markdown(pdf_data)
+        result["seconds"] = time.perf_counter() - start
+    except Exception as e:
+        result["error"] = f"Error processing PDF to markdown: {key}, {e}"
+        return result
+
+    # Define output file name and path for uploading the markdown text as a .txt file
+    output_key = output_key_for(key)
+    try:
+        # Upload the markdown text to S3 as a .txt file
+        _s3_client.put_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=output_key, Body=md_text)
+        result["output_key"] = output_key
+    except Exception as e:
+        result["error"] = f"Error uploading markdown file to S3: {output_key}, {e}"
+    return result
+
+
+def process_pdf_open_source(parallel: bool = True, max_workers: int = OPEN_SOURCE_MAX_WORKERS, force: bool = False):
     """
     This function processes PDF files from an S3 bucket by converting them to markdown text and uploading the
-    converted text files back to the S3 bucket. Uses pymupdf4llm for conversion, and handles PDFs using a temporary file.
+    converted text files back to the S3 bucket. Uses pymupdf4llm for conversion on documents opened from memory.
+    PDFs whose ETag and size match the extraction manifest and whose output already exists are skipped.
+
+    Args:
+        parallel (bool): Fan the PDFs out to a process pool instead of converting them one after another.
+        max_workers (int): Number of worker processes in parallel mode. Defaults to the CPU count.
+        force (bool): Re-extract every PDF, ignoring the manifest.
     """
+    global _s3_client
+
     # MySQL connection (not used in the processing but available for future use)
     try:
         db_conn = get_db_connection()
@@ -39,58 +107,65 @@ def process_pdf_open_source():
 
     # S3 client setup
     try:
-        s3_client = boto3.client(
-            's3',
-            aws_access_key_id=aws_access_key_id,
-            aws_secret_access_key=aws_secret_access_key
-        )
+        s3_client = _create_s3_client()
         logging.info("Connected to S3 successfully.")
     except Exception as e:
         logging.error(f"Error setting up S3 client: {e}")
         return
     
     try:
-        # List PDF files in the specified S3 directory
-        response = s3_client.list_objects_v2(Bucket=aws_bucket_name, Prefix='gaia_files/')
-        open_source_output_folder = 'open_source_processed/'
+        # List PDF files in the specified S3 directory and the outputs already produced
+        pdf_objects = [obj for obj in iter_s3_objects(s3_client, settings.AWS_S3_BUCKET_NAME, open_source_input_folder)
+                       if obj['Key'].endswith('.pdf')]
+        output_keys = {obj['Key'] for obj in iter_s3_objects(s3_client, settings.AWS_S3_BUCKET_NAME, open_source_output_folder)}
     except Exception as e:
         logging.error(f"Error listing objects in S3 bucket: {e}")
         return
 
+    manifest = load_manifest(s3_client, settings.AWS_S3_BUCKET_NAME, open_source_manifest_name)
+    pending = pending_sources(manifest, pdf_objects, output_keys, force)
+    pdf_keys = [obj['Key'] for obj in pending]
+    if not pdf_keys:
+        logging.info("Processing completed: no new or changed PDFs to extract.")
+        return
+
     # Process each PDF file in the list
-    for obj in response.get('Contents', []):
-        if obj['Key'].endswith('.pdf'):
-            try:
-                # Read the PDF file from S3
-                pdf_obj = s3_client.get_object(Bucket=aws_bucket_name, Key=obj['Key'])
-                pdf_data = pdf_obj['Body'].read()
-                logging.info(f"Downloaded PDF: {obj['Key']}")
-            except Exception as e:
-                logging.error(f"Error reading PDF from S3: {obj['Key']}, {e}")
-                continue
-
-            try:
-                # Use a temporary file to store the PDF data for processing
-                with tempfile.NamedTemporaryFile(delete=True) as temp_file:
-                    temp_file.write(pdf_data)
-                    temp_file.flush()  # Ensure data is written to the temp file
-
-                    # Convert PDF to markdown text using pymupdf4llm
-                    md_text = pymupdf4llm.to_markdown(temp_file.name, embed_images=True, table_strategy='lines')
-                    logging.info(f"Converted PDF to markdown: {obj['Key']}")
-            except Exception as e:
-                logging.error(f"Error processing PDF to markdown: {obj['Key']}, {e}")
-                continue
-
-            try:
-                # Define output file name and path for uploading the markdown text as a .txt file
-                output_key = open_source_output_folder + obj['Key'].split('/')[-1].replace('.pdf', '.txt')
-
-                # Upload the markdown text to S3 as a .txt file
-                s3_client.put_object(Bucket=aws_bucket_name, Key=output_key, Body=md_text)
-                logging.info(f"Uploaded markdown file to S3: {output_key}")
-            except Exception as e:
-                logging.error(f"Error uploading markdown file to S3: {output_key}, {e}")
-                continue
-
-    logging.info("Processing completed.")
+    start = time.perf_counter()
+    if parallel and len(pdf_keys) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as executor:
+            results = executor.map(extract_pdf_to_s3, pdf_keys)
+            total_pages, extracted = _log_extraction_results(results)
+    else:
+        _s3_client = s3_client
+        total_pages, extracted = _log_extraction_results(map(extract_pdf_to_s3, pdf_keys))
+    elapsed = time.perf_counter() - start
+
+    # Record the successful extractions so unchanged PDFs are skipped on the next run
+    objects_by_key = {obj['Key']: obj for obj in pending}
+    for result in extracted:
+        record_extraction(manifest, objects_by_key[result['key']], result['output_key'])
+    save_manifest(s3_client, settings.AWS_S3_BUCKET_NAME, open_source_manifest_name, manifest)
+
+    logging.info(f"Processing completed: {len(extracted)}/{len(pdf_keys)} PDFs, {total_pages} pages in {elapsed:.1f}s "
+                 f"({total_pages / elapsed if elapsed else 0:.1f} pages/s).")
+
+def _log_extraction_results(results) -> tuple:
+    """
+    Logs the outcome and throughput of each extracted PDF.
+
+    Returns:
+        tuple: The total number of pages converted (int) and the results of the successful extractions (list).
+    """
+    total_pages = 0
+    extracted = []
+    for result in results:
+        if result["error"]:
+            logging.error(result["error"])
+            continue
+        total_pages += result["pages"]
+        extracted.append(result)
+        pages_per_second = result["pages"] / result["seconds"] if result["seconds"] else 0
+        logging.info(f"Converted PDF to markdown: {result['key']} ({result['pages']} pages in "
+                     f"{result['seconds']:.2f}s, {pages_per_second:.1f} pages/s)")
+        logging.info(f"Uploaded markdown file to S3: {result['output_key']}")
+    return total_pages, extracted
@@ -1,5 +1,10 @@
 from multiprocessing import set_start_method, Process
 import os
+import sys
+import glob
+import argparse
+from urllib.parse import urlparse
+import boto3
 import dotenv
 from unstructured_ingest.v2.pipeline.pipeline import Pipeline
 from unstructured_ingest.v2.interfaces import ProcessorConfig
@@ -11,12 +16,29 @@ from unstructured_ingest.v2.processes.connectors.fsspec.s3 import (
     S3UploaderConfig
 )
 from unstructured_ingest.v2.processes.partitioner import PartitionerConfig
+from unstructured_ingest.v2.processes.filter import FiltererConfig
 import logging
 
+# This script is run directly by run_unstructured.sh, so make the data_load package importable
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from data_load.extraction_manifest import iter_s3_objects, load_manifest, save_manifest, pending_sources, record_extraction
+
+unstructured_manifest_name = 'unstructured_extract'
+
 # Set the start method for multiprocessing to avoid the "bootstrap" error
 set_start_method("spawn", force=True)  # "spawn" is safer on most systems
 
-def run_unstructured_pipeline():
+def _split_s3_url(url: str) -> tuple:
+    """Splits an s3://bucket/prefix/ URL into the bucket name and key prefix."""
+    parsed_url = urlparse(url)
+    return parsed_url.netloc, parsed_url.path.lstrip('/')
+
+def run_unstructured_pipeline(force: bool = False):
+    """
+    Partitions the PDFs under AWS_S3_URL with the Unstructured API and uploads the JSON output to AWS_S3_OUTPUT_URI.
+    Only PDFs that are new or changed since the last run (per the extraction manifest), or whose output is
+    missing, are sent to the API unless `force` is set.
+    """
     try:
         logging.info("Starting the Unstructured Pipeline")
         print("Starting the Unstructured Pipeline")
@@ -34,10 +56,34 @@ def run_unstructured_pipeline():
             logging.error("One or more environment variables are missing")
             raise ValueError("Required environment variables are missing. Please check your .env file.")
 
+        # Work out which PDFs actually need partitioning
+        s3_client = boto3.client('s3', aws_access_key_id=aws_access_key, aws_secret_access_key=aws_secret_key)
+        source_bucket, source_prefix = _split_s3_url(aws_s3_url)
+        output_bucket, output_prefix = _split_s3_url(aws_s3_output_uri)
+
+        def output_key_for(key: str) -> str:
+            return output_prefix + key[len(source_prefix):] + '.json'
+
+        pdf_objects = [obj for obj in iter_s3_objects(s3_client, source_bucket, source_prefix) if obj['Key'].endswith('.pdf')]
+        output_keys = {obj['Key'] for obj in iter_s3_objects(s3_client, output_bucket, output_prefix)}
+        manifest = load_manifest(s3_client, output_bucket, unstructured_manifest_name)
+        pending = pending_sources(manifest, pdf_objects, output_keys, force)
+
+        if not pending:
+            logging.info("No new or changed PDFs to partition, skipping the Unstructured Pipeline")
+            print("No new or changed PDFs to partition, skipping the Unstructured Pipeline")
+            return
+
+        # Restrict the pipeline to the pending PDFs unless all of them need processing
+        filterer_config = None
+        if len(pending) < len(pdf_objects):
+            filterer_config = FiltererConfig(file_glob=['*' + glob.escape(obj['Key']) for obj in pending])
+
         # Run the pipeline
         Pipeline.from_configs(
             context=ProcessorConfig(),
             indexer_config=S3IndexerConfig(remote_url=aws_s3_url),
+            filterer_config=filterer_config,
             downloader_config=S3DownloaderConfig(),
             source_connection_config=S3ConnectionConfig(
                 access_config=S3AccessConfig(
@@ -69,6 +115,13 @@ def run_unstructured_pipeline():
         ).run()
         logging.info("Pipeline executed successfully")
         print("Pipeline executed successfully")
+
+        # Record the PDFs whose output now exists so they are skipped on the next run
+        output_keys = {obj['Key'] for obj in iter_s3_objects(s3_client, output_bucket, output_prefix)}
+        for obj in pending:
+            if output_key_for(obj['Key']) in output_keys:
+                record_extraction(manifest, obj, output_key_for(obj['Key']))
+        save_manifest(s3_client, output_bucket, unstructured_manifest_name, manifest)
     except Exception as e:
         logging.error(f"Error occurred in unstructured pipeline: {e}")
         print(f"Error occurred in unstructured pipeline: {e}")
@@ -77,4 +130,7 @@ def run_unstructured_pipeline():
 
 
 if __name__ == "__main__":
-    run_unstructured_pipeline()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Partition GAIA PDFs in S3 with the Unstructured API")
+    parser.add_argument("--force", action="store_true", help="Re-partition every PDF, ignoring the extraction manifest")
+    args = parser.parse_args()
+    run_unstructured_pipeline(force=args.force)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# This script converts PDFs to markdown text with the pymupdf4llm library, with embedded images and tables.
+# It only depends on PyMuPDF, so the conversion can be used (and benchmarked) without the S3 and MySQL
+# dependencies of the open source extraction pipeline in pdf_extraction_open_source.py.
+
+import pymupdf
+import pymupdf4llm
+
+def convert_pdf_to_markdown(pdf_data: bytes) -> tuple:
+    """
+    Converts a PDF held in memory to markdown text with pymupdf4llm, without writing it to disk first.
+
+    Args:
+        pdf_data (bytes): The raw PDF bytes.
+
+    Returns:
+        tuple: The markdown text (str) and the number of pages in the document (int).
+    """
+    with pymupdf.open(stream=pdf_data, filetype="pdf") as doc:
+        md_text = pymupdf4llm.to_markdown(doc, embed_images=True, table_strategy='lines')
+        return md_text, doc.page_count
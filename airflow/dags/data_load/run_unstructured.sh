@@ -4,27 +4,22 @@
 echo 'Starting the Bash script and importing variables from Python'
 
 
-if [ -f /tmp/env_file.sh ]; then
-  source /tmp/env_file.sh  # This file was generated by the Python script
-else
-  echo "Environment file /tmp/env_file.sh not found!"
+# Import variables from Python using absolute path (resolved from the environment, the parameter cache or SSM)
+EXPORTS=$(python3 /opt/airflow/dags/data_load/parameter_config_airflow.py) || {
+  echo "Could not resolve the pipeline parameters!"
   exit 1
-fi
+}
+eval "$EXPORTS"
 
-# Import variables from Python using absolute path
-eval $(python3 /opt/airflow/dags/data_load/parameter_config_airflow.py)
 
+# Re-partition every PDF when the DAG run was triggered with force=true
+FORCE_FLAG=""
+if [ "$FORCE_REEXTRACT" = "true" ]; then
+  FORCE_FLAG="--force"
+fi
 
 # Now, run your Python pipeline script
-python /opt/airflow/dags/data_load/pdf_extraction_unstructured.py
+python /opt/airflow/dags/data_load/pdf_extraction_unstructured.py $FORCE_FLAG
 
 # Echo to indicate the process has completed
 echo 'Python script executed successfully'
-
-
-if [ -f /tmp/env_file.sh ]; then
-  rm /tmp/env_file.sh
-  echo "Environment file /tmp/env_file.sh removed."
-else
-  echo "Environment file /tmp/env_file.sh not found for removal."
-fi
\ No newline at end of file
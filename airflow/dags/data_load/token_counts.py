@@ -0,0 +1,121 @@
+# This script precomputes the token counts of the extracted documents and stores them in gaia_metadata_tbl_pdf,
+# so the Streamlit app can decide how to send a document to the model by reading a column instead of loading a
+# tokenizer and encoding the whole document on every question.
+# Counts are computed for every encoding used by the supported models, on exactly the text the app sends:
+# the raw markdown of the PyMuPDF output and the re-indented JSON of the Unstructured output.
+# Counts are remembered in a manifest by output ETag, so only new or changed outputs are downloaded and
+# encoded again; the table itself is recreated on every run and refilled from the manifest.
+
+import json
+import logging
+import boto3
+import tiktoken
+import mysql.connector
+from data_load.db_connection import get_db_connection
+from data_load.extraction_manifest import iter_s3_objects, load_manifest, save_manifest
+from data_load.parameter_config_airflow import settings
+
+# Encodings of the supported models: o200k_base for GPT-4o, cl100k_base for GPT-4 and GPT-3.5-turbo
+TOKEN_ENCODINGS = ['o200k_base', 'cl100k_base']
+
+# Output folder -> column prefix of its token counts in gaia_metadata_tbl_pdf
+TOKEN_COLUMN_PREFIXES = {
+    'unstructured_extract/': 'unstructured_tokens',
+    'open_source_processed/': 'opensource_tokens',
+}
+
+def token_count_columns(prefix: str) -> list:
+    """Returns the token count columns of an output folder, one per encoding (e.g. 'opensource_tokens_o200k_base')."""
+    return [f"{TOKEN_COLUMN_PREFIXES[prefix]}_{encoding}" for encoding in TOKEN_ENCODINGS]
+
+def document_text(prefix: str, body: bytes) -> str:
+    """
+    Returns the text of an extracted document as the app sends it to the model
+    (see utils.validators.extract_json_contents and extract_txt_contents).
+    """
+    text = body.decode('utf-8')
+    if prefix == 'unstructured_extract/':
+        return json.dumps(json.loads(text), indent=4)
+    return text
+
+def count_tokens(text: str) -> dict:
+    """Returns the number of tokens of the text for each encoding in TOKEN_ENCODINGS."""
+    return {encoding: len(tiktoken.get_encoding(encoding).encode(text, disallowed_special=()))
+            for encoding in TOKEN_ENCODINGS}
+
+def update_token_counts(prefix: str) -> int:
+    """
+    Computes the token counts of every extracted document under `prefix` and stores them in the token count
+    columns of gaia_metadata_tbl_pdf, matched on file_name like update_metadata_with_s3_urls.
+
+    Args:
+        prefix (str): The S3 output folder, 'unstructured_extract/' or 'open_source_processed/'.
+
+    Returns:
+        int: The number of documents whose counts were stored.
+    """
+    s3_client = boto3.client('s3', aws_access_key_id=settings.AWS_ACCESS_KEY_ID, aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY)
+    manifest_name = f"token_counts_{TOKEN_COLUMN_PREFIXES[prefix]}"
+    manifest = load_manifest(s3_client, settings.AWS_S3_BUCKET_NAME, manifest_name)
+
+    counts = {}  # file_name -> {encoding: tokens}
+    encoded = 0
+    for obj in iter_s3_objects(s3_client, settings.AWS_S3_BUCKET_NAME, prefix):
+        key = obj['Key']
+        entry = manifest.get(key)
+        if entry is None or entry.get('etag') != obj['ETag'] or set(entry.get('tokens', {})) != set(TOKEN_ENCODINGS):
+            try:
+                body = s3_client.get_object(Bucket=settings.AWS_S3_BUCKET_NAME, Key=key)['Body'].read()
+                entry = {'etag': obj['ETag'], 'tokens': count_tokens(document_text(prefix, body))}
+            except Exception as e:
+                logging.error(f"Error counting tokens of {key}: {e}")
+                continue
+            manifest[key] = entry
+            encoded += 1
+
+        # Output names map back to the source PDF name as in update_metadata_with_s3_urls
+        file_name = key.split('/')[-1]
+        file_name = file_name[:-len('.json')] if file_name.endswith('.json') else file_name
+        file_name = file_name[:-len('.txt')] + '.pdf' if file_name.endswith('.txt') else file_name
+        counts[file_name] = entry['tokens']
+
+    logging.info(f"Token counts of {len(counts)} documents under {prefix}, {encoded} newly encoded.")
+    save_manifest(s3_client, settings.AWS_S3_BUCKET_NAME, manifest_name, manifest)
+    if not counts:
+        return 0
+
+    columns = token_count_columns(prefix)
+    conn = None
+    try:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        # Stage all counts, then apply them with a single UPDATE ... JOIN
+        cursor.execute(f"""
+        CREATE TEMPORARY TABLE token_count_staging (
+            file_name VARCHAR(255) PRIMARY KEY,
+            {', '.join(f'{encoding} INT' for encoding in TOKEN_ENCODINGS)}
+        )
+        """)
+        cursor.executemany(
+            f"INSERT INTO token_count_staging (file_name, {', '.join(TOKEN_ENCODINGS)}) "
+            f"VALUES (%s, {', '.join(['%s'] * len(TOKEN_ENCODINGS))})",
+            [(file_name, *(tokens[encoding] for encoding in TOKEN_ENCODINGS)) for file_name, tokens in counts.items()]
+        )
+        cursor.execute(f"""
+        UPDATE gaia_metadata_tbl_pdf m
+        JOIN token_count_staging s ON m.file_name = s.file_name
+        SET {', '.join(f'm.{column} = s.{encoding}' for column, encoding in zip(columns, TOKEN_ENCODINGS))}
+        """)
+        logging.info(f"Updated {cursor.rowcount} rows of {', '.join(columns)}.")
+        cursor.execute("DROP TEMPORARY TABLE token_count_staging")
+
+        conn.commit()
+        return len(counts)
+    except mysql.connector.Error as e:
+        logging.error(f"Error updating token counts in RDS: {e}")
+        return 0
+    finally:
+        if conn is not None and conn.is_connected():
+            cursor.close()
+            conn.close()
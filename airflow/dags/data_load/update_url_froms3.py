@@ -1,9 +1,10 @@
 # This script fetches file URLs from an AWS S3 bucket and updates a metadata table in MySQL RDS.
 
-# It connects to AWS S3 using `boto3` to list objects under a specified prefix (folder path).
+# It connects to AWS S3 using `boto3` to list objects under a specified prefix (folder path), page by page.
 # Extracts file names, removes ".json" extensions, and converts ".txt" extensions to ".pdf" for metadata consistency.
 # Establishes a connection to an AWS RDS MySQL instance using a custom `get_db_connection` function.
-# Updates either the `unstructured_api_url` or `opensource_url` column in the MySQL table based on the file prefix.
+# Updates either the `unstructured_api_url` or `opensource_url` column in the MySQL table based on the file prefix,
+# in one set-based UPDATE ... JOIN against a temporary staging table instead of one UPDATE per file.
 # Includes exception handling for S3 and MySQL interactions to ensure robust error management and proper logging.
 # Closes the MySQL connection gracefully after updating the metadata, ensuring the database is updated successfully.
 
@@ -15,7 +16,8 @@ import mysql.connector
 from mysql.connector import Error
 from dotenv import load_dotenv
 from data_load.db_connection import get_db_connection
-from data_load.parameter_config_airflow import AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY, AWS_S3_BUCKET_NAME
+from data_load.extraction_manifest import iter_s3_objects
+from data_load.parameter_config_airflow import settings
 
 # Function to fetch all file URLs from S3 and update metadata table in MySQL RDS
 def update_metadata_with_s3_urls(prefix):
@@ -28,9 +30,9 @@ def update_metadata_with_s3_urls(prefix):
     """
     
     # AWS S3 credentials
-    aws_access_key_id = AWS_ACCESS_KEY_ID
-    aws_secret_access_key = AWS_SECRET_ACCESS_KEY
-    aws_bucket_name = AWS_S3_BUCKET_NAME
+    aws_access_key_id = settings.AWS_ACCESS_KEY_ID
+    aws_secret_access_key = settings.AWS_SECRET_ACCESS_KEY
+    aws_bucket_name = settings.AWS_S3_BUCKET_NAME
 
     # Initialize S3 client
     try:
@@ -40,23 +42,10 @@ def update_metadata_with_s3_urls(prefix):
         print(f"Error initializing S3 client: {e}")
         return
 
-    # Fetch all file URLs from the S3 directory
+    # Fetch all file URLs from the S3 directory, following pagination past 1000 keys
+    file_urls = {}
     try:
-        response = s3.list_objects_v2(Bucket=aws_bucket_name, Prefix=prefix)
-    except Exception as e:
-        print(f"Error fetching objects from S3: {e}")
-        return
-
-    # If no files are found
-    if 'Contents' not in response:
-        print("No files found in the given S3 directory.")
-        return
-
-    # Extract URLs and clean up file names
-    file_urls = []
-    file_names = []
-    try:
-        for obj in response['Contents']:
+        for obj in iter_s3_objects(s3, aws_bucket_name, prefix):
             file_key = obj['Key']
             file_url = f"https://{aws_bucket_name}.s3.amazonaws.com/{file_key}"
             file_name_with_extension = file_key.split('/')[-1]
@@ -64,37 +53,45 @@ def update_metadata_with_s3_urls(prefix):
             file_name = re.sub(r'\.json$', '', file_name_with_extension)
             file_name = re.sub(r'\.txt$', '.pdf', file_name)
 
-            file_names.append(file_name)
-            file_urls.append(file_url)
-        print("File URLs and names processed successfully.")
+            file_urls[file_name] = file_url
+        print(f"{len(file_urls)} file URLs and names processed successfully.")
     except Exception as e:
-        print(f"Error processing file URLs and names: {e}")
+        print(f"Error fetching objects from S3: {e}")
         return
 
+    # If no files are found
+    if not file_urls:
+        print("No files found in the given S3 directory.")
+        return
+
+    # Determine which column to update based on the prefix
+    url_column = 'unstructured_api_url' if prefix == 'unstructured_extract/' else 'opensource_url'
+
     # Update MySQL table with URLs
+    conn = None
     try:
         conn = get_db_connection()
         cursor = conn.cursor()
-        for url, file_name in zip(file_urls, file_names):
-            print(f"Updating file: {file_name} with URL: {url}")
-        
-            # Determine which column to update based on the prefix
-            if prefix == 'unstructured_extract/':
-                update_query = """
-                UPDATE gaia_metadata_tbl_pdf
-                SET unstructured_api_url = %s
-                WHERE file_name = %s
-                """
-            else:
-                update_query = """
-                UPDATE gaia_metadata_tbl_pdf
-                SET opensource_url = %s
-                WHERE file_name = %s
-                """
-            
-            # Execute the update query
-            cursor.execute(update_query, (url, file_name))
-    
+
+        # Stage all (file_name, url) pairs, then apply them with a single UPDATE ... JOIN
+        cursor.execute("""
+        CREATE TEMPORARY TABLE s3_url_staging (
+            file_name VARCHAR(255) PRIMARY KEY,
+            url VARCHAR(255)
+        )
+        """)
+        cursor.executemany("INSERT INTO s3_url_staging (file_name, url) VALUES (%s, %s)", list(file_urls.items()))
+
+        update_query = f"""
+        UPDATE gaia_metadata_tbl_pdf m
+        JOIN s3_url_staging s ON m.file_name = s.file_name
+        SET m.{url_column} = s.url
+        """
+        cursor.execute(update_query)
+        print(f"Updated {cursor.rowcount} rows of {url_column} from {len(file_urls)} files.")
+
+        cursor.execute("DROP TEMPORARY TABLE s3_url_staging")
+
         # Commit changes to the database
         conn.commit()
         print("Metadata table updated successfully.")
@@ -103,7 +100,7 @@ def update_metadata_with_s3_urls(prefix):
     except Exception as e:
         print(f"Unexpected error: {e}")
     finally:
-        if conn.is_connected():
+        if conn is not None and conn.is_connected():
             cursor.close()
             conn.close()
             print("MySQL connection closed after updating metadata.")
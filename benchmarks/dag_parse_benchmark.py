@@ -0,0 +1,85 @@
+# This script benchmarks how long the Airflow scheduler takes to import the PDF extraction DAG file.
+# Each run imports the DAG module in a fresh interpreter (after Airflow itself, which the scheduler has already
+# loaded), so the measured time is what the DAG file adds to every parse loop. The script fails if the median
+# exceeds the budget or if parsing pulled in any of the task dependencies that must only be imported at run time.
+#
+#     python benchmarks/dag_parse_benchmark.py --runs 5 --budget 0.5
+
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DAGS_FOLDER = os.path.join(REPO_ROOT, "airflow", "dags")
+DAG_MODULE = "pipeline_pdf_extraction"
+
+# Modules the DAG file must not import while being parsed
+HEAVY_MODULES = ["datasets", "huggingface_hub", "pandas", "pymupdf", "pymupdf4llm", "tiktoken", "boto3",
+                 "mysql.connector", "data_load.data_load", "data_load.parameter_config_airflow"]
+
+# Runs in the child interpreter: import Airflow, then time the DAG module alone. Only the modules loaded by the
+# DAG import count as heavy, not those Airflow or its providers had already loaded (e.g. boto3, pandas)
+_PROBE = """
+import sys, time, json
+import airflow, airflow.models, airflow.operators.python, airflow.operators.bash
+preloaded = set(sys.modules)
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = set(sys.modules) - preloaded
+print(json.dumps({{"seconds": elapsed, "heavy": [name for name in {heavy!r} if name in loaded]}}))
+"""
+
+def parse_once(dags_folder: str) -> dict:
+    """
+    Imports the DAG module in a fresh interpreter and returns its import time and the heavy modules it loaded.
+    The child runs in the DAGs folder, as the scheduler does, so `import airflow` can never resolve to the
+    repository's own airflow/ directory when the script is started from the repository root.
+
+    Raises:
+        subprocess.CalledProcessError: If Airflow or the DAG module fails to import.
+    """
+    dags_folder = os.path.abspath(dags_folder)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [dags_folder, os.environ.get("PYTHONPATH")])))
+    output = subprocess.run([sys.executable, "-c", _PROBE.format(module=DAG_MODULE, heavy=HEAVY_MODULES)],
+                            cwd=dags_folder, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def run_benchmark(dags_folder: str = DEFAULT_DAGS_FOLDER, runs: int = 5) -> dict:
+    """
+    Parses the DAG `runs` times and summarizes the import times.
+
+    Returns:
+        dict: The median, min and max import time in seconds and the heavy modules imported at parse time.
+    """
+    results = [parse_once(dags_folder) for _ in range(runs)]
+    times = [result["seconds"] for result in results]
+    return {
+        "runs": runs,
+        "median_seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "max_seconds": max(times),
+        "heavy_modules": sorted({name for result in results for name in result["heavy"]}),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the import time of the PDF extraction DAG.")
+    parser.add_argument('--dags-folder', default=DEFAULT_DAGS_FOLDER)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=0.5, help="Maximum median import time in seconds")
+    args = parser.parse_args()
+
+    try:
+        summary = run_benchmark(args.dags_folder, args.runs)
+    except subprocess.CalledProcessError as e:
+        sys.exit(f"Importing Airflow and the DAG module failed (exit code {e.returncode}):\n{e.stderr}")
+    summary["budget_seconds"] = args.budget
+    print(json.dumps(summary, indent=2))
+
+    if summary["heavy_modules"]:
+        sys.exit(f"DAG parsing imported task dependencies: {summary['heavy_modules']}")
+    if summary["median_seconds"] > args.budget:
+        sys.exit(f"DAG import took {summary['median_seconds']:.3f}s, over the {args.budget:.3f}s budget")
@@ -0,0 +1,315 @@
+# This script times the extraction and prompt-building hot paths on the sample corpus in benchmarks/corpus/:
+# the PyMuPDF markdown conversion of the open source pipeline (convert_pdf_to_markdown), reading back the
+# extracted outputs (extract_txt_contents, extract_json_contents), token counting (num_tokens_from_string),
+# answer scoring (answer_validation_check) and the catalog round trip of the API (fetch_data_from_db building
+# the DataFrame from the fetched rows, then serialized and indexed as get_catalog does).
+# Results are written as JSON to benchmarks/results/ (not committed), tagged with the commit they were measured
+# on; --output - prints them to stdout only. Pass the results of an earlier commit as --baseline to compare
+# medians; the script fails if any benchmark got slower than the tolerance or no longer runs. Benchmarks whose
+# third-party dependencies are not available in the current environment are skipped and listed as such; a
+# failing import of the repo's own modules is an error, not a skip.
+#
+#     python benchmarks/hot_path_benchmark.py --rounds 5 --output benchmarks/results/before.json
+#     python benchmarks/hot_path_benchmark.py --rounds 5 --baseline benchmarks/results/before.json
+
+import os
+import io
+import sys
+import json
+import random
+import timeit
+import asyncio
+import argparse
+import platform
+import datetime
+import statistics
+import contextlib
+import subprocess
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+# The API and app modules import from the repo root, the pipeline modules from the DAGs folder. An ImportError
+# for a module found in these folders is a broken import, not a missing dependency
+SOURCE_DIRS = [REPO_ROOT, os.path.join(REPO_ROOT, "airflow", "dags")]
+sys.path[:0] = SOURCE_DIRS
+os.environ.setdefault("LOG_FILE", os.devnull)  # Keep the benchmarked code from writing a log file
+
+# Columns of gaia_metadata_tbl_pdf, as created by data_load.data_load
+CATALOG_COLUMNS = ["task_id", "Question", "Level", "final_answer", "file_name", "file_path", "Annotator_Metadata",
+                   "source", "s3_url", "file_extension", "unstructured_api_url", "opensource_url",
+                   "unstructured_tokens_o200k_base", "unstructured_tokens_cl100k_base",
+                   "opensource_tokens_o200k_base", "opensource_tokens_cl100k_base"]
+
+def corpus_documents() -> list:
+    """Returns the names of the sample documents, without extension."""
+    return sorted(name[:-len(".pdf")] for name in os.listdir(CORPUS_DIR) if name.endswith(".pdf"))
+
+def corpus_path(name: str, extension: str) -> str:
+    return os.path.join(CORPUS_DIR, f"{name}{extension}")
+
+def catalog_rows(count: int, seed: int = 0) -> list:
+    """Returns `count` synthetic rows of gaia_metadata_tbl_pdf, shaped like the rows aiomysql fetches."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        task_id = f"{rng.getrandbits(128):032x}"
+        file_name = f"{task_id}.pdf"
+        steps = "\n".join(f"{step}. Open the file and read the {rng.choice(['table', 'figure', 'section'])} "
+                          f"on page {rng.randint(1, 30)}." for step in range(1, rng.randint(3, 9)))
+        metadata = json.dumps({"Steps": steps, "Number of steps": str(steps.count("\n") + 1),
+                               "How long did this take?": f"{rng.randint(2, 30)} minutes",
+                               "Tools": "1. Web browser\n2. PDF viewer", "Number of tools": "2"})
+        rows.append((
+            task_id, f"Question {i}: " + " ".join(rng.choice(["what", "is", "the", "total", "value", "in", "table",
+                                                               "of", "attached", "report"]) for _ in range(40)),
+            str(rng.randint(1, 3)), str(rng.randint(1, 10000)), file_name, f"2023/validation/{file_name}", metadata,
+            "validation", f"https://bucket.s3.amazonaws.com/gaia_files/{file_name}", "pdf",
+            f"https://bucket.s3.amazonaws.com/unstructured_extract/{file_name}.json",
+            f"https://bucket.s3.amazonaws.com/open_source_processed/{task_id}.txt",
+            *(rng.randint(500, 50000) for _ in range(4)),
+        ))
+    return rows
+
+def validation_pairs(count: int, seed: int = 0) -> list:
+    """Returns `count` (final_answer, validation_answer) pairs, half numeric and half textual."""
+    rng = random.Random(seed)
+    words = ["the", "answer", "is", "approximately", "museum", "species", "report", "total", "year", "market"]
+    pairs = []
+    for i in range(count):
+        expected = str(rng.randint(1, 100000)) if i % 2 else " ".join(rng.choice(words) for _ in range(2))
+        answer = " ".join(rng.choice(words) for _ in range(rng.randint(5, 40)))
+        if rng.random() < 0.5:
+            answer += f' "{expected.title()}"'
+        pairs.append((answer, expected))
+    return pairs
+
+def benchmark_cases(catalog_size: int) -> list:
+    """
+    Returns the benchmarks as (name, setup) pairs. A setup is a context manager that imports what its benchmark
+    needs, yields the function to time and undoes its changes on exit; it raises ImportError when a dependency is
+    not installed, or OSError when a resource it loads is unavailable (e.g. a tokenizer encoding that cannot be
+    downloaded).
+    """
+    cases = []
+    documents = corpus_documents()
+
+    def markdown_case(name):
+        @contextlib.contextmanager
+        def setup():
+            from data_load.pdf_markdown import convert_pdf_to_markdown
+            with open(corpus_path(name, ".pdf"), "rb") as pdf_file:
+                pdf_data = pdf_file.read()
+            yield lambda: convert_pdf_to_markdown(pdf_data)
+        return setup
+
+    def extract_case(function_name, name, extension):
+        @contextlib.contextmanager
+        def setup():
+            from utils import validators
+            function, path = getattr(validators, function_name), corpus_path(name, extension)
+            yield lambda: function(path)
+        return setup
+
+    def tokens_case(name, extension, model):
+        @contextlib.contextmanager
+        def setup():
+            from utils.validators import extract_json_contents, extract_txt_contents, get_encoding, num_tokens_from_string
+            get_encoding(model)  # Loading the encoding may need to download it, which is not timed
+            contents = (extract_json_contents if extension == ".json" else extract_txt_contents)(corpus_path(name, extension))
+            yield lambda: num_tokens_from_string(contents, model)
+        return setup
+
+    @contextlib.contextmanager
+    def validation_setup():
+        from utils.validators import answer_validation_check
+        pairs = validation_pairs(1000)
+        yield lambda: [answer_validation_check(answer, expected) for answer, expected in pairs]
+
+    @contextlib.contextmanager
+    def catalog_setup():
+        from fast_api.services import data_service
+        rows = catalog_rows(catalog_size)
+        original = data_service.get_pooled_connection
+        data_service.get_pooled_connection = _fake_pooled_connection(rows, CATALOG_COLUMNS)
+        loop = asyncio.new_event_loop()
+
+        def round_trip():
+            # fetch_data_from_db, then the serialization and index of get_catalog
+            df = loop.run_until_complete(data_service.fetch_data_from_db())
+            body = df.to_json(orient="records", force_ascii=False).encode("utf-8")
+            index = {row["task_id"]: row for row in df.to_dict(orient="records")}
+            return body, index
+
+        try:
+            yield round_trip
+        finally:
+            loop.close()
+            data_service.get_pooled_connection = original
+
+    for name in documents:
+        cases.append((f"to_markdown[{name}]", markdown_case(name)))
+    for name in documents:
+        cases.append((f"extract_txt_contents[{name}]", extract_case("extract_txt_contents", name, ".txt")))
+        cases.append((f"extract_json_contents[{name}]", extract_case("extract_json_contents", name, ".json")))
+    for name in documents:
+        cases.append((f"num_tokens_from_string[{name}.txt,gpt-4o]", tokens_case(name, ".txt", "gpt-4o")))
+        cases.append((f"num_tokens_from_string[{name}.json,gpt-4]", tokens_case(name, ".json", "gpt-4")))
+    cases.append(("answer_validation_check[1000 pairs]", validation_setup))
+    cases.append((f"catalog_round_trip[{catalog_size} rows]", catalog_setup))
+    return cases
+
+def _fake_pooled_connection(rows: list, columns: list):
+    """Returns a replacement for get_pooled_connection whose cursor serves `rows` without a database."""
+
+    class Cursor:
+        description = None
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        async def execute(self, query, args=None):
+            self.description = [(column, None, None, None, None, None, None) for column in columns]
+
+        async def fetchall(self):
+            return tuple(rows)
+
+    class Connection:
+        def cursor(self):
+            return Cursor()
+
+    @contextlib.asynccontextmanager
+    async def get_pooled_connection():
+        yield Connection()
+
+    return get_pooled_connection
+
+def time_case(function, rounds: int) -> dict:
+    """
+    Times a function after one warm-up call. Each round runs it enough times to last at least 0.2 seconds.
+
+    Returns:
+        dict: The number of calls per round and the per-call median, min, mean and stdev in seconds.
+    """
+    function()
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    times = [total / number for total in timer.repeat(repeat=rounds, number=number)]
+    return {
+        "rounds": rounds,
+        "number": number,
+        "median_seconds": statistics.median(times),
+        "min_seconds": min(times),
+        "mean_seconds": statistics.mean(times),
+        "stdev_seconds": statistics.stdev(times) if rounds > 1 else 0.0,
+    }
+
+def is_repo_module(module_name: str) -> bool:
+    """Returns whether a module (e.g. 'utils.validators') belongs to this repo rather than to a dependency."""
+    top_level = module_name.split(".")[0]
+    return any(os.path.isdir(os.path.join(directory, top_level)) or os.path.isfile(os.path.join(directory, f"{top_level}.py"))
+               for directory in SOURCE_DIRS)
+
+def current_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def run_benchmark(rounds: int = 5, catalog_size: int = 500, name_filter: str = None) -> dict:
+    """
+    Runs every benchmark whose name contains `name_filter` and collects the results with the environment.
+
+    Returns:
+        dict: The commit, environment, results per benchmark and the skipped benchmarks with the reason.
+
+    Raises:
+        ImportError: If a module of the repo itself fails to import, e.g. after a benchmarked function was renamed.
+    """
+    results, skipped = {}, {}
+    for name, setup in benchmark_cases(catalog_size):
+        if name_filter and name_filter not in name:
+            continue
+        # pymupdf4llm prints a progress bar for every conversion
+        with contextlib.redirect_stdout(io.StringIO()):
+            try:
+                with setup() as function:
+                    results[name] = time_case(function, rounds)
+            except ImportError as e:
+                if e.name is None or is_repo_module(e.name):
+                    raise
+                skipped[name] = f"missing dependency: {e.name}"
+                continue
+            except OSError as e:
+                skipped[name] = f"unavailable resource: {type(e).__name__}"
+                continue
+        print(f"{name}: median {results[name]['median_seconds'] * 1000:.3f} ms", file=sys.stderr)
+
+    return {
+        "commit": current_commit(),
+        "filter": name_filter,
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+        "skipped": skipped,
+    }
+
+def compare(summary: dict, baseline: dict, tolerance: float) -> dict:
+    """
+    Compares the medians with those of a baseline run.
+
+    Returns:
+        dict: The median ratio (current / baseline) of every benchmark present in both runs, the names of the
+              benchmarks slower than 1 + tolerance times their baseline, and the names of the benchmarks of the
+              baseline (within the current filter) that did not run this time.
+    """
+    baseline_results = baseline.get("benchmarks", {})
+    ratios = {name: result["median_seconds"] / baseline_results[name]["median_seconds"]
+              for name, result in summary["benchmarks"].items() if name in baseline_results}
+    name_filter = summary.get("filter")
+    return {
+        "baseline_commit": baseline.get("commit"),
+        "tolerance": tolerance,
+        "ratios": ratios,
+        "regressions": sorted(name for name, ratio in ratios.items() if ratio > 1 + tolerance),
+        "missing": sorted(name for name in baseline_results
+                          if name not in summary["benchmarks"] and (not name_filter or name_filter in name)),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the extraction and prompt-building hot paths.")
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--catalog-rows', type=int, default=500, help="Rows of the synthetic question catalog")
+    parser.add_argument('--filter', help="Only run the benchmarks whose name contains this string")
+    parser.add_argument('--output', help="Results file, or - for stdout only "
+                                         "(default: benchmarks/results/hot_path_benchmark-<commit>.json)")
+    parser.add_argument('--baseline', help="Results file of an earlier run to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Allowed slowdown of a median, e.g. 0.2 for 20%%")
+    args = parser.parse_args()
+
+    summary = run_benchmark(args.rounds, args.catalog_rows, args.filter)
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            summary["comparison"] = compare(summary, json.load(baseline_file), args.tolerance)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"hot_path_benchmark-{(summary['commit'] or 'unknown')[:12]}.json")
+    if output != "-":
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as output_file:
+            json.dump(summary, output_file, indent=2)
+        print(f"Results written to {output}", file=sys.stderr)
+    print(json.dumps(summary, indent=2))
+
+    comparison = summary.get("comparison", {})
+    if comparison.get("missing"):
+        sys.exit(f"Benchmarks of the baseline that did not run: {comparison['missing']}")
+    if not summary["benchmarks"]:
+        sys.exit("No benchmark ran")
+    if comparison.get("regressions"):
+        sys.exit(f"Slower than the baseline by more than {args.tolerance:.0%}: {comparison['regressions']}")
@@ -0,0 +1,123 @@
+# This script (re)generates the sample corpus used by hot_path_benchmark.py in benchmarks/corpus/.
+# The PDFs are built deterministically with PyMuPDF: prose, headings and ruled tables over a range of page counts,
+# the kind of documents in the GAIA file set. For each PDF the script also writes the two extracted outputs the
+# app reads back: the markdown .txt produced by the open source pipeline (convert_pdf_to_markdown) and a .json
+# list of elements in the shape of the Unstructured output. The generated files are committed so every commit is
+# benchmarked on the same inputs; run this only to change the corpus.
+#
+#     python benchmarks/make_corpus.py
+
+import os
+import sys
+import json
+import random
+import hashlib
+import pymupdf
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+sys.path.insert(0, os.path.join(REPO_ROOT, "airflow", "dags"))
+from data_load.pdf_markdown import convert_pdf_to_markdown
+
+# Document name -> (pages, tables per page, seed)
+DOCUMENTS = {
+    "short_memo": (2, 0, 1),
+    "table_report": (6, 1, 2),
+    "long_paper": (30, 0, 3),
+}
+
+WORDS = ("the of and to in is that for on with as by data model results table value analysis study method "
+         "sample report year total rate growth market energy species museum survey population average percent "
+         "first second between during after which were this these from than more most under over each").split()
+
+PAGE_WIDTH, PAGE_HEIGHT, MARGIN = 595, 842, 56
+
+def sentence(rng: random.Random) -> str:
+    words = [rng.choice(WORDS) for _ in range(rng.randint(8, 20))]
+    return " ".join(words).capitalize() + "."
+
+def paragraph(rng: random.Random) -> str:
+    return " ".join(sentence(rng) for _ in range(rng.randint(3, 6)))
+
+def table_rows(rng: random.Random) -> list:
+    header = ["Item", "Year", "Count", "Share (%)"]
+    rows = [[f"{rng.choice(WORDS).title()} {i + 1}", str(rng.randint(1990, 2023)), str(rng.randint(10, 99999)),
+             f"{rng.uniform(0, 100):.1f}"] for i in range(rng.randint(5, 10))]
+    return [header] + rows
+
+def draw_table(page: pymupdf.Page, top: float, rows: list) -> float:
+    """Draws a ruled table starting at `top` and returns the y coordinate below it."""
+    column_width = (PAGE_WIDTH - 2 * MARGIN) / len(rows[0])
+    row_height = 20
+    for r, row in enumerate(rows):
+        y = top + r * row_height
+        for c, cell in enumerate(row):
+            rect = pymupdf.Rect(MARGIN + c * column_width, y, MARGIN + (c + 1) * column_width, y + row_height)
+            page.draw_rect(rect, color=(0, 0, 0), width=0.5)
+            page.insert_textbox(rect + (3, 2, -3, 0), cell, fontsize=9, fontname="hebo" if r == 0 else "helv")
+    return top + len(rows) * row_height + 12
+
+def build_document(name: str, pages: int, tables: int, seed: int) -> tuple:
+    """
+    Builds one sample PDF.
+
+    Returns:
+        tuple: The PDF bytes and the Unstructured-style elements (list of dict) of its content.
+    """
+    rng = random.Random(seed)
+    doc = pymupdf.open()
+    doc.set_metadata({"title": name.replace("_", " ").title(), "creationDate": "D:20240101000000",
+                      "modDate": "D:20240101000000", "producer": "make_corpus"})
+    elements = []
+
+    def element(kind: str, text: str, page_number: int, **metadata) -> None:
+        element_id = hashlib.sha256(f"{name}/{len(elements)}/{text}".encode()).hexdigest()[:32]
+        elements.append({"type": kind, "element_id": element_id, "text": text,
+                         "metadata": {"filetype": "application/pdf", "languages": ["eng"],
+                                      "page_number": page_number, "filename": f"{name}.pdf", **metadata}})
+
+    for page_number in range(1, pages + 1):
+        page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+        y = MARGIN
+        title = f"{page_number}. " + " ".join(rng.choice(WORDS) for _ in range(4)).title()
+        page.insert_text((MARGIN, y + 16), title, fontsize=16, fontname="hebo")
+        element("Title", title, page_number)
+        y += 32
+
+        for _ in range(tables):
+            rows = table_rows(rng)
+            y = draw_table(page, y, rows)
+            html = "<table>" + "".join("<tr>" + "".join(f"<td>{cell}</td>" for cell in row) + "</tr>"
+                                       for row in rows) + "</table>"
+            element("Table", "\n".join(" ".join(row) for row in rows), page_number, text_as_html=html)
+
+        while y < PAGE_HEIGHT - MARGIN - 80:
+            text = paragraph(rng)
+            rect = pymupdf.Rect(MARGIN, y, PAGE_WIDTH - MARGIN, PAGE_HEIGHT - MARGIN)
+            spare = page.insert_textbox(rect, text, fontsize=10, fontname="helv")
+            if spare < 0:
+                break
+            element("NarrativeText", text, page_number)
+            y = PAGE_HEIGHT - MARGIN - spare + 10
+
+    pdf_data = doc.tobytes(garbage=4, deflate=True, no_new_id=True)
+    doc.close()
+    return pdf_data, elements
+
+def main() -> None:
+    os.makedirs(CORPUS_DIR, exist_ok=True)
+    for name, (pages, tables, seed) in DOCUMENTS.items():
+        pdf_data, elements = build_document(name, pages, tables, seed)
+        with open(os.path.join(CORPUS_DIR, f"{name}.pdf"), "wb") as pdf_file:
+            pdf_file.write(pdf_data)
+
+        md_text, _ = convert_pdf_to_markdown(pdf_data)
+        with open(os.path.join(CORPUS_DIR, f"{name}.txt"), "w", encoding="utf-8") as txt_file:
+            txt_file.write(md_text)
+        with open(os.path.join(CORPUS_DIR, f"{name}.json"), "w", encoding="utf-8") as json_file:
+            json.dump(elements, json_file, indent=2)
+        print(f"{name}: {pages} pages, {len(pdf_data)} PDF bytes, {len(md_text)} markdown chars, {len(elements)} elements")
+
+if __name__ == "__main__":
+    main()
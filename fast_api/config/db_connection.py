@@ -1,33 +1,228 @@
-# This Python script establishes a connection to an AWS RDS MySQL database using environment variables for 
-# credentials and connection details. It securely loads these variables using the `dotenv` package and 
-# defines a function `get_db_connection()` to create and return a connection object, facilitating database 
-# interactions within the application.
+# This Python script establishes a connection to an AWS RDS MySQL database using environment variables for
+# credentials and connection details. It securely loads these variables using the `dotenv` package and
+# defines a coroutine `get_db_connection()` to create and return an asynchronous (aiomysql) connection object,
+# facilitating non-blocking database interactions within the application.
+# It also keeps a process-wide pool of those connections (`get_pooled_connection()`) so request handlers
+# borrow an already authenticated connection instead of paying a TCP+TLS+auth handshake on every call.
 
 import os
-import mysql.connector
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import aiomysql
+import pymysql
+from fast_api.services.metrics import span
 from project_logging import logging_module
-from parameter_config import RDS_HOST_AWS, RDS_USERNAME_AWS, RDS_PASSWORD_AWS, RDS_DATABASE_AWS, RDS_DB_PORT_AWS
+from parameter_config import settings
 
-def get_db_connection() -> mysql.connector.connection_cext.CMySQLConnection:
+# Pool sizing, overridable through the environment
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))                  # Connections kept open while idle
+DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))  # Extra connections allowed under burst load
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))          # Seconds to wait for a free connection
+DB_POOL_RECYCLE = float(os.getenv("DB_POOL_RECYCLE", 3600))        # Max connection age in seconds before reopening
+
+async def get_db_connection() -> aiomysql.Connection:
     """
-    Establishes and returns a connection to the AWS RDS MySQL database using the provided credentials.
+    Establishes and returns an asynchronous connection to the AWS RDS MySQL database using the provided credentials.
 
     Returns:
-        mysql.connector.connection_cext.CMySQLConnection: A MySQL database connection object.
-    """
-    return mysql.connector.connect(
-        host= RDS_HOST_AWS,
-        user=RDS_USERNAME_AWS,
-        password=RDS_PASSWORD_AWS,
-        port =RDS_DB_PORT_AWS,
-        database=RDS_DATABASE_AWS
+        aiomysql.Connection: A MySQL database connection object.
+    """
+    return await aiomysql.connect(
+        host= settings.RDS_HOST_AWS,
+        user=settings.RDS_USERNAME_AWS,
+        password=settings.RDS_PASSWORD_AWS,
+        port =int(settings.RDS_DB_PORT_AWS),
+        db=settings.RDS_DATABASE_AWS
     )
 
-def close_my_sql_connection(mydb, mydata = None):
+class DBConnectionPool:
+    """
+    A bounded pool of asynchronous MySQL connections for a single event loop.
+
+    Up to `pool_size` connections are kept open while idle and up to `max_overflow` extra connections are opened
+    under burst load and closed again when they are returned. Connections are health-checked on checkout and
+    reopened once they are older than `recycle` seconds.
+    """
+
+    def __init__(self, connect=get_db_connection, pool_size: int = DB_POOL_SIZE, max_overflow: int = DB_POOL_MAX_OVERFLOW,
+                 timeout: float = DB_POOL_TIMEOUT, recycle: float = DB_POOL_RECYCLE):
+        self._connect = connect
+        self.pool_size = pool_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+
+        self._idle = deque()  # (connection, created_at), most recently returned on the right
+        self._condition = asyncio.Condition()
+        self._open = 0        # Connections currently open, idle or checked out
+
+        self._stats = {
+            "checkouts": 0,
+            "timeouts": 0,
+            "connections_created": 0,
+            "connections_recycled": 0,
+            "connections_invalidated": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+        }
+
+    def _can_checkout(self) -> bool:
+        return bool(self._idle) or self._open < self.pool_size + self.max_overflow
+
+    async def _discard(self, connection, stat: str) -> None:
+        try:
+            connection.close()
+        except Exception as e:
+            logging_module.log_error(f"Error closing pooled MySQL connection: {e}")
+        async with self._condition:
+            self._open -= 1
+            self._stats[stat] += 1
+            self._condition.notify()
+
+    async def _is_alive(self, connection) -> bool:
+        try:
+            await connection.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    async def get_connection(self) -> tuple:
+        """
+        Borrows a connection from the pool, opening a new one if the pool has not reached its limit.
+
+        Returns:
+            tuple: A live aiomysql connection and its creation time; pass both to release().
+
+        Raises:
+            pymysql.err.OperationalError: If no connection becomes available within `timeout` seconds.
+        """
+        start = time.monotonic()
+        while True:
+            async with self._condition:
+                if not self._can_checkout():
+                    try:
+                        remaining = self.timeout - (time.monotonic() - start)
+                        if remaining <= 0:
+                            raise asyncio.TimeoutError()
+                        await asyncio.wait_for(self._condition.wait_for(self._can_checkout), timeout=remaining)
+                    except asyncio.TimeoutError:
+                        self._stats["timeouts"] += 1
+                        raise pymysql.err.OperationalError(f"Timed out after {self.timeout}s waiting for a MySQL connection")
+
+                if self._idle:
+                    connection, created_at = self._idle.pop()
+                else:
+                    connection, created_at = None, None
+                    self._open += 1
+
+            if connection is None:
+                try:
+                    connection, created_at = await self._connect(), time.monotonic()
+                except BaseException:
+                    async with self._condition:
+                        self._open -= 1
+                        self._condition.notify()
+                    raise
+                self._stats["connections_created"] += 1
+            elif time.monotonic() - created_at > self.recycle:
+                await self._discard(connection, "connections_recycled")
+                continue
+            elif not await self._is_alive(connection):
+                await self._discard(connection, "connections_invalidated")
+                continue
+
+            waited = time.monotonic() - start
+            self._stats["checkouts"] += 1
+            self._stats["wait_seconds_total"] += waited
+            self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], waited)
+            return connection, created_at
+
+    async def release(self, connection, created_at: float) -> None:
+        """
+        Returns a connection to the pool, rolling back any transaction left open by the borrower.
+        Overflow connections beyond `pool_size` are closed instead of being kept idle.
+        """
+        try:
+            if connection.closed:
+                raise pymysql.err.InterfaceError("Connection already closed")
+            if connection.get_transaction_status():
+                await connection.rollback()
+        except Exception as e:
+            logging_module.log_error(f"Error resetting pooled MySQL connection: {e}")
+            await self._discard(connection, "connections_invalidated")
+            return
+
+        async with self._condition:
+            if len(self._idle) < self.pool_size:
+                self._idle.append((connection, created_at))
+                self._condition.notify()
+                return
+        await self._discard(connection, "connections_recycled")
+
+    async def close(self) -> None:
+        """
+        Closes every idle connection, e.g. on application shutdown.
+        """
+        while self._idle:
+            connection, _ = self._idle.pop()
+            await self._discard(connection, "connections_recycled")
+
+    def stats(self) -> dict:
+        """
+        Returns a snapshot of the pool's checkout and wait-time counters.
+        """
+        stats = dict(self._stats)
+        stats.update({
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "open": self._open,
+            "idle": len(self._idle),
+            "in_use": self._open - len(self._idle),
+        })
+        stats["wait_seconds_avg"] = stats["wait_seconds_total"] / stats["checkouts"] if stats["checkouts"] else 0.0
+        return stats
+
+_pool = None
+
+def get_connection_pool() -> DBConnectionPool:
+    """
+    Returns the process-wide connection pool, creating it on first use.
+    """
+    global _pool
+    if _pool is None:
+        _pool = DBConnectionPool()
+    return _pool
+
+@asynccontextmanager
+async def get_pooled_connection():
+    """
+    Borrows a connection from the process-wide pool for the duration of an `async with` block and returns it
+    to the pool afterwards.
+
+    Yields:
+        aiomysql.Connection: A live MySQL connection.
+    """
+    pool = get_connection_pool()
+    with span("mysql", "checkout"):
+        connection, created_at = await pool.get_connection()
     try:
-        if mydb.is_connected():
-            mydata.close()
-            mydb.close()
-            logging_module.log_success("MySQL connection closed.")
-    except Exception as e:
-        logging_module.log_error(f"Error closing the MySQL connection: {e}")
\ No newline at end of file
+        yield connection
+    finally:
+        await pool.release(connection, created_at)
+        logging_module.log_success("MySQL connection returned to the pool.")
+
+async def close_connection_pool() -> None:
+    """
+    Closes the idle connections of the process-wide pool, e.g. on application shutdown.
+    """
+    if _pool is not None:
+        await _pool.close()
+        logging_module.log_success("MySQL connection pool closed.")
+
+def get_pool_stats() -> dict:
+    """
+    Returns the checkout, wait-time and size counters of the process-wide pool, for sizing it under load.
+    """
+    return get_connection_pool().stats()
@@ -1,10 +1,59 @@
-from .routes import auth_routes, data_routes, openai_routes
-from fastapi import FastAPI
+import time
+import uuid
+from contextlib import asynccontextmanager
+from .routes import auth_routes, data_routes, openai_routes, evaluation_routes
+from .config.db_connection import close_connection_pool
+from .services.file_cache import close_http_client
+from .services.openai_service import OpenAIClient
+from .services.metrics import REQUEST_LATENCY, register_stats_collector, render_metrics
+from fastapi import FastAPI, Request, Response
+from project_logging import logging_module
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One OpenAI client per process, so every request re-uses its warm connections
+    app.state.openai_client = OpenAIClient()
+    yield
+    # Release the pooled MySQL connections and HTTP connections on shutdown
+    await app.state.openai_client.close()
+    await close_connection_pool()
+    await close_http_client()
 
 # Create FastAPI instance
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Export the connection pool and cache counters on /metrics
+register_stats_collector()
+
+@app.middleware("http")
+async def request_context(request: Request, call_next):
+    # Tag every log record of the request with its ID, and log and record how long the request took
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = logging_module.request_id_var.set(request_id)
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        response.headers["X-Request-ID"] = request_id
+        return response
+    finally:
+        duration = time.perf_counter() - start
+        # The route template (e.g. /evaluation/evaluation-status/{run_id}) keeps the label set bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        REQUEST_LATENCY.labels(request.method, route, str(status_code)).observe(duration)
+        logging_module.log_success("Request completed", method=request.method, path=request.url.path,
+                                   status=status_code, duration_ms=round(duration * 1000, 3))
+        logging_module.request_id_var.reset(token)
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    # Prometheus scrape endpoint; a plain def so collecting the stats runs in the threadpool, off the event loop
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
 
 # Include the routers
 app.include_router(auth_routes.router, prefix="/auth", tags=["auth"])
 app.include_router(data_routes.router, prefix="/data", tags=["data"])
 app.include_router(openai_routes.router, prefix="/openai", tags=["openai"])
+app.include_router(evaluation_routes.router, prefix="/evaluation", tags=["evaluation"])
@@ -0,0 +1,59 @@
+import pymysql
+from fast_api.config.db_connection import get_pooled_connection
+from project_logging import logging_module
+
+RESULT_COLUMNS = ["run_id", "task_id", "level", "model", "extractor", "answer", "expected", "correct",
+                  "latency_ms", "prompt_tokens", "completion_tokens", "error"]
+
+async def insert_evaluation_results(results: list) -> int:
+    """
+    Inserts the per-question results of an evaluation run into the 'gaia_evaluation_results' table, creating
+    the table if it does not exist yet.
+
+    Args:
+        results (list): Result dictionaries with the keys of RESULT_COLUMNS.
+
+    Returns:
+        int: The number of rows inserted, or 0 if an error occurs.
+    """
+    try:
+        # Borrow a connection from the MySQL connection pool
+        async with get_pooled_connection() as mydb:
+            async with mydb.cursor() as mydata:
+                await mydata.execute("""
+                    CREATE TABLE IF NOT EXISTS gaia_evaluation_results (
+                        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+                        run_id VARCHAR(36),
+                        task_id VARCHAR(255),
+                        level VARCHAR(3),
+                        model VARCHAR(50),
+                        extractor VARCHAR(1),
+                        answer TEXT,
+                        expected VARCHAR(255),
+                        correct TINYINT(1) NULL,
+                        latency_ms DOUBLE,
+                        prompt_tokens INT,
+                        completion_tokens INT,
+                        error TEXT,
+                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        INDEX idx_gaia_evaluation_results_run_id (run_id)
+                    )
+                """)
+
+                await mydata.executemany(
+                    f"INSERT INTO gaia_evaluation_results ({', '.join(RESULT_COLUMNS)}) "
+                    f"VALUES ({', '.join(['%s'] * len(RESULT_COLUMNS))})",
+                    [tuple(result[column] for column in RESULT_COLUMNS) for result in results]
+                )
+            await mydb.commit()
+
+        logging_module.log_success(f"Inserted {len(results)} rows into gaia_evaluation_results")
+        return len(results)
+
+    except pymysql.err.MySQLError as e:
+        logging_module.log_error(f"Database error occurred: {e}")
+        return 0
+
+    except Exception as e:
+        logging_module.log_error(f"An unexpected error occurred: {e}")
+        return 0
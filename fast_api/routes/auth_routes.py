@@ -1,21 +1,22 @@
 from fastapi import APIRouter, HTTPException, status
 from fast_api.schemas.request_schemas import LoginRequest, RegisterUserRequest
-from fast_api.services.auth_service import hash_password, create_jwt_token
+from fast_api.services.auth_service import hash_password, create_jwt_token, invalidate_cached_user
 from fast_api.models.user_models import fetch_user_from_db, insert_user
 
 router = APIRouter()
 
 @router.post("/register/")
-def register(request: RegisterUserRequest):
+async def register(request: RegisterUserRequest):
     username = request.username
     password = request.password
     first_name = request.first_name
     last_name = request.last_name
     email = request.email
-    user = fetch_user_from_db(username)
+    user = await fetch_user_from_db(username)
     if user is None:
         # Insert the user with the hashed password into the database
-        insert_user(first_name, username, hash_password(password))  # Ensure this function inserts hashed password
+        await insert_user(first_name, username, hash_password(password))  # Ensure this function inserts hashed password
+        invalidate_cached_user(username)
         return {"message": "User registered successfully"}
     else:
         raise HTTPException(
@@ -25,10 +26,10 @@ def register(request: RegisterUserRequest):
         )
     
 @router.post("/login/")
-def login(request: LoginRequest):
+async def login(request: LoginRequest):
     username = request.username
     password = request.password
-    user = fetch_user_from_db(username)
+    user = await fetch_user_from_db(username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -1,33 +1,49 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from fast_api.schemas.request_schemas import DownloadRequest
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Response
+from fast_api.schemas.request_schemas import DownloadRequest, TaskDownloadRequest
 from fast_api.services.auth_service import get_current_user
-from fast_api.services.data_service import fetch_data_from_db, download_file
+from fast_api.services.data_service import get_catalog, invalidate_catalog_cache, download_file, download_file_by_task_id
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Optional
 from project_logging import logging_module
 
 router = APIRouter()
 
 @router.get("/fetch-questions/", response_model=List[dict])
-def get_questions_for_user(current_user: Dict = Depends(get_current_user)):
+async def get_questions_for_user(if_none_match: Optional[str] = Header(None), current_user: Dict = Depends(get_current_user)):
 
     # Log the user who is making the request
     logging_module.log_success(f"User '{current_user['username']}' is fetching data from the database.")
 
-    # Fetch data from the database
-    data = fetch_data_from_db()
+    # Fetch the catalog from the cache, falling back to the database
+    catalog = await get_catalog()
 
-    if isinstance(data, pd.DataFrame):
-        return data.to_dict(orient="records")
-    else:
+    if catalog is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="No data returned from the database",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    headers = {"ETag": catalog["etag"], "Cache-Control": "private, no-cache"}
+
+    # The client already holds this version of the catalog
+    if if_none_match and catalog["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=catalog["body"], media_type="application/json", headers=headers)
+
+@router.post("/invalidate-questions-cache/")
+async def invalidate_questions_cache(current_user: Dict = Depends(get_current_user)):
+
+    # Log the user who is making the request
+    logging_module.log_success(f"User '{current_user['username']}' is invalidating the question catalog cache.")
+
+    invalidate_catalog_cache()
+
+    return {"message": "Question catalog cache invalidated"}
+
 @router.get("/fetch-download-url/", response_model=Dict)
-def get_download_url(request: DownloadRequest, current_user: Dict = Depends(get_current_user)):
+async def get_download_url(request: DownloadRequest, current_user: Dict = Depends(get_current_user)):
 
     # Log the user who is making the request
     logging_module.log_success(f"User '{current_user['username']}' is fetching data from the database.")
@@ -39,6 +55,17 @@ def get_download_url(request: DownloadRequest, current_user: Dict = Depends(get_
 
     logging_module.log_success(f"Question: {question}, Extraction Method: {extraction_method}")
 
-    download_url = download_file(question, df, extraction_method)
+    download_url = await download_file(question, df, extraction_method)
                   
-    return download_url
\ No newline at end of file
+    return download_url
+
+@router.get("/fetch-task-download-url/", response_model=Optional[Dict])
+async def get_task_download_url(request: TaskDownloadRequest, current_user: Dict = Depends(get_current_user)):
+
+    # Log the user who is making the request
+    logging_module.log_success(f"User '{current_user['username']}' is fetching the file of task {request.task_id}.")
+
+    logging_module.log_success(f"Task ID: {request.task_id}, Extraction Method: {request.extraction_method}")
+
+    # Look the task up in the cached catalog index instead of shipping the catalog in the request
+    return await download_file_by_task_id(request.task_id, request.extraction_method)
@@ -0,0 +1,58 @@
+from fastapi import APIRouter, HTTPException, status, Depends
+from fast_api.schemas.request_schemas import EvaluationRequest
+from fast_api.services.auth_service import get_current_user
+from fast_api.services.data_service import get_catalog
+from fast_api.services.evaluation_service import (EVAL_ALLOW_OPENAI, OpenAIBackend, StubBackend, start_evaluation,
+                                                  get_evaluation_status)
+from fast_api.services.openai_service import OpenAIClient, get_openai_client
+from project_logging import logging_module
+from typing import Dict
+
+router = APIRouter()
+
+@router.post("/run-evaluation/", status_code=status.HTTP_202_ACCEPTED)
+async def run_evaluation(request: EvaluationRequest, current_user: Dict = Depends(get_current_user),
+                         client: OpenAIClient = Depends(get_openai_client)):
+
+    # A real run sends every catalog question to OpenAI, so it must be enabled on the server
+    if not request.stub and not EVAL_ALLOW_OPENAI:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="OpenAI evaluations are disabled on this server; use the stub backend",
+        )
+
+    # Log the user who is starting the evaluation
+    logging_module.log_success(f"User '{current_user['username']}' is starting an evaluation of {request.models}.")
+
+    catalog = await get_catalog()
+    if catalog is None:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="No data returned from the database",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    rows = catalog["df"].to_dict(orient="records")
+    rows = rows[:request.limit] if request.limit else rows
+    backend = StubBackend() if request.stub else OpenAIBackend(client)
+
+    # The run continues in the background; poll its status with the returned run_id
+    try:
+        run_id = start_evaluation(rows, request.models, backend, extractors=request.extractors,
+                                  skip_documents=request.skip_documents)
+    except RuntimeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=str(e),
+        )
+    return {"run_id": run_id, "status": "running"}
+
+@router.get("/evaluation-status/{run_id}")
+async def evaluation_status(run_id: str, current_user: Dict = Depends(get_current_user)):
+    run = get_evaluation_status(run_id)
+    if run is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Evaluation not found",
+        )
+    return run
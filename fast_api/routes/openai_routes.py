@@ -1,14 +1,17 @@
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from fast_api.schemas.request_schemas import OpenAIRequest
 from fast_api.services.auth_service import get_current_user
-from fast_api.services.openai_service import OpenAIClient
+from fast_api.services.openai_service import OpenAIClient, get_openai_client
+from fast_api.services.llm_cache import get_llm_response_cache
 from project_logging import logging_module
 from typing import Dict, Optional
 
 router = APIRouter()
 
 @router.get("/fetch-openai-response/", response_model=Optional[str])
-def get_openai_response(request: OpenAIRequest, current_user: Dict = Depends(get_current_user)):
+async def get_openai_response(request: OpenAIRequest, current_user: Dict = Depends(get_current_user),
+                              client: OpenAIClient = Depends(get_openai_client)):
     
     # Log the user who is making the request
     logging_module.log_success(f"User '{current_user['username']}' is sending request to OpenAI.")
@@ -18,12 +21,40 @@ def get_openai_response(request: OpenAIRequest, current_user: Dict = Depends(get
     annotated_steps = request.annotated_steps
     file_extract = request.file_extract
     loaded_file = request.loaded_file
-    
-    client = OpenAIClient()
 
     if file_extract and loaded_file:
-        response = client.file_validation_prompt(loaded_file["path"], question_selected, model)
+        response = await client.file_validation_prompt(loaded_file["path"], question_selected, model)
     else:
-        response = client.validation_prompt(question_selected, model, annotated_steps)
+        response = await client.validation_prompt(question_selected, model, annotated_steps,
+                                                  use_cache=not request.bypass_cache)
+
+    return response
+
+@router.get("/stream-openai-response/")
+async def stream_openai_response(request: OpenAIRequest, current_user: Dict = Depends(get_current_user),
+                                 client: OpenAIClient = Depends(get_openai_client)):
+
+    # Log the user who is making the request
+    logging_module.log_success(f"User '{current_user['username']}' is streaming a request to OpenAI.")
+
+    if request.file_extract and request.loaded_file:
+        # Assistant runs only return the finished answer, which is sent as a single chunk
+        async def file_chunks():
+            response = await client.file_validation_prompt(request.loaded_file["path"], request.question_selected,
+                                                           request.model)
+            if response:
+                yield response
+        chunks = file_chunks()
+    else:
+        chunks = client.stream_validation_prompt(request.question_selected, request.model, request.annotated_steps,
+                                                 use_cache=not request.bypass_cache)
+
+    # Chunked plain text, written to the client as soon as each piece of the answer arrives
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.get("/cache-stats/", response_model=Dict)
+async def get_cache_stats(current_user: Dict = Depends(get_current_user)):
 
-    return response
\ No newline at end of file
+    # Hit rate and size of the persistent LLM response cache
+    return get_llm_response_cache().stats()
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from typing import List, Dict, Literal, Optional
 
 class LoginRequest(BaseModel):
     username: str = Field(..., min_length=3, max_length=20, description="The user's unique username")
@@ -17,9 +17,21 @@ class DownloadRequest(BaseModel):
     df: List[Dict]
     extraction_method: Optional[str] = None
 
+class TaskDownloadRequest(BaseModel):
+    task_id: str = Field(..., min_length=1, max_length=255, description="The GAIA task_id of the question")
+    extraction_method: Optional[str] = Field(None, description="'U' for Unstructured, 'P' for PyMuPDF output, none for the original file")
+
 class OpenAIRequest(BaseModel):
     model: str = Field(..., min_length=3, max_length=15, description="The model to send the request to")
     question_selected: str = Field(..., description="The question selected by the user")
     file_extract: bool = Field(None, description="Boolean to determine whether file extract API must be used or not (optional)")
     annotated_steps: str = Field(None, description="The annotated steps if any for the question (optional)")
-    loaded_file: Dict = Field(None, description="The file to be loaded with OpenAI")
\ No newline at end of file
+    loaded_file: Dict = Field(None, description="The file to be loaded with OpenAI")
+    bypass_cache: bool = Field(False, description="Skip the LLM response cache and always query the model (optional)")
+
+class EvaluationRequest(BaseModel):
+    models: List[str] = Field(..., min_length=1, description="The models to evaluate")
+    extractors: List[Literal['U', 'P']] = Field(['U', 'P'], description="'U' for Unstructured, 'P' for PyMuPDF output")
+    limit: Optional[int] = Field(None, gt=0, description="Only evaluate the first N questions of the catalog (optional)")
+    skip_documents: bool = Field(False, description="Ask the questions without the extracted PDFs (optional)")
+    stub: bool = Field(True, description="Use the offline stub LLM; set to false to call OpenAI, if the server allows it (optional)")
@@ -1,15 +1,49 @@
-import os, base64, hmac, hashlib, jwt
+import os, base64, hmac, hashlib, jwt, time, threading
+from collections import OrderedDict
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime, timedelta, timezone
 from fast_api.models.user_models import fetch_user_from_db
+from fast_api.services.metrics import span
 from project_logging import logging_module
-from parameter_config import SECRET_KEY
+from parameter_config import settings
 
 security = HTTPBearer()
 
+# Users resolved by get_current_user are cached for a short time so authenticated requests skip the database
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", 60))  # Seconds; 0 disables the cache
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", 1024))
+
+_user_cache = OrderedDict()  # username -> (user, expires_at), least recently used first
+_user_cache_lock = threading.Lock()
+
+def _cached_user(username: str) -> dict:
+    with _user_cache_lock:
+        entry = _user_cache.get(username)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del _user_cache[username]
+            return None
+        _user_cache.move_to_end(username)
+        return entry[0]
+
+def _store_user(username: str, user: dict) -> None:
+    with _user_cache_lock:
+        _user_cache[username] = (user, time.monotonic() + AUTH_USER_CACHE_TTL)
+        _user_cache.move_to_end(username)
+        while len(_user_cache) > AUTH_USER_CACHE_SIZE:
+            _user_cache.popitem(last=False)
+
+def invalidate_cached_user(username: str) -> None:
+    """
+    Drops a user from the authentication cache, e.g. after it was registered or changed.
+    """
+    with _user_cache_lock:
+        _user_cache.pop(username, None)
+
 def hash_password(password: str) -> str:
-    secret_key = base64.b64decode(SECRET_KEY)
+    secret_key = base64.b64decode(settings.SECRET_KEY)
     hash_object = hmac.new(secret_key, msg=password.encode(), digestmod=hashlib.sha256)
     hash_hex = hash_object.hexdigest()
     return hash_hex
@@ -17,12 +51,12 @@ def hash_password(password: str) -> str:
 def create_jwt_token(data: dict):
     expiration = datetime.now(timezone.utc) + timedelta(minutes=50)
     token_payload = {"exp": expiration, **data}
-    token = jwt.encode(token_payload, SECRET_KEY, algorithm='HS256')
+    token = jwt.encode(token_payload, settings.SECRET_KEY, algorithm='HS256')
     return token, expiration
 
 def decode_jwt_token(token: str):
     try:
-        decoded_token = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+        decoded_token = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
         return decoded_token
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -37,10 +71,11 @@ def decode_jwt_token(token: str):
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-def get_current_user(authorization: HTTPAuthorizationCredentials = Depends(security)):
+async def get_current_user(authorization: HTTPAuthorizationCredentials = Depends(security)):
     token = authorization.credentials
     try:
-        payload = decode_jwt_token(token)
+        with span("jwt", "decode"):
+            payload = decode_jwt_token(token)
         username = payload.get("username")
         if not username:
             raise HTTPException(
@@ -48,14 +83,23 @@ def get_current_user(authorization: HTTPAuthorizationCredentials = Depends(secur
                 detail='Invalid token payload',
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        user = fetch_user_from_db(username)
+
+        # The token signature is already verified; the user lookup is served from the cache while it is fresh
+        cached_user = _cached_user(username) if AUTH_USER_CACHE_TTL > 0 else None
+        if cached_user is not None:
+            return cached_user
+
+        user = await fetch_user_from_db(username)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail='User not found',
                 headers={"WWW-Authenticate": "Bearer"},
             )
-        return user.to_dict(orient="records")[0]
+        user = user.to_dict(orient="records")[0]
+        if AUTH_USER_CACHE_TTL > 0:
+            _store_user(username, user)
+        return user
     except HTTPException as e:
         logging_module.log_error(f"An unexpected error occurred: {e}")
-        return e
\ No newline at end of file
+        raise
\ No newline at end of file
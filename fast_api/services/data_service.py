@@ -1,22 +1,49 @@
-import mysql.connector
+import pymysql
 import pandas as pd
-from fast_api.config.db_connection import close_my_sql_connection, get_db_connection
+from fast_api.config.db_connection import get_pooled_connection
+from fast_api.services.file_cache import get_file_cache
+from fast_api.services.metrics import span
 from project_logging import logging_module
 import boto3
-from urllib.parse import urlparse, unquote
+from urllib.parse import urlparse
 import os
-import requests
-import tempfile
-from project_logging import logging_module
-import pandas as pd
-from parameter_config import ACCESS_KEY_ID_AWS, SECRET_ACCESS_KEY_AWS
+import hashlib
+import threading
+import asyncio
+import time
+from collections import OrderedDict
+from parameter_config import settings
+
+# S3 client, created on first use so importing this module does not resolve the AWS credentials
+_s3_client = None
+
+def get_s3_client():
+    """
+    Returns the process-wide S3 client, creating it on first use.
+    """
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3',
+                                  aws_access_key_id=settings.ACCESS_KEY_ID_AWS,
+                                  aws_secret_access_key=settings.SECRET_ACCESS_KEY_AWS)
+    return _s3_client
+
+# Seconds a cached question catalog is served before it is reloaded from the database
+CATALOG_CACHE_TTL = float(os.getenv("CATALOG_CACHE_TTL", 300))
+
+# In-process question catalog cache, see get_catalog()
+_catalog_cache = {}
+_catalog_lock = asyncio.Lock()
 
-# Initialize S3 client
-s3 = boto3.client('s3',
-                  aws_access_key_id=ACCESS_KEY_ID_AWS,
-                  aws_secret_access_key=SECRET_ACCESS_KEY_AWS)
+# Pre-signed URL cache: a URL is re-used while it has at least PRESIGNED_URL_MIN_TTL seconds left to live
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv("PRESIGNED_URL_CACHE_SIZE", 1024))
+PRESIGNED_URL_MIN_TTL = float(os.getenv("PRESIGNED_URL_MIN_TTL", 900))
 
-def fetch_data_from_db() -> pd.DataFrame:
+_presigned_url_cache = OrderedDict()  # (bucket, key, extraction_method, expiration) -> (url, expires_at), least recently used first
+_presigned_url_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_presigned_url_lock = threading.Lock()
+
+async def fetch_data_from_db() -> pd.DataFrame:
     """
     Fetches data from the 'user login' table in the MySQL database and returns it as a pandas DataFrame.
 
@@ -24,32 +51,29 @@ def fetch_data_from_db() -> pd.DataFrame:
         pd.DataFrame: A DataFrame containing the data fetched from the database, or None if an error occurs.
     """
     try:
-        # Connect to MySQL database
-        mydb = get_db_connection()
-        
-        if mydb.is_connected():
+        # Borrow a connection from the MySQL connection pool
+        async with get_pooled_connection() as mydb:
             logging_module.log_success("Connected to the database for fetching data.")
 
             # Create a cursor object
-            mydata = mydb.cursor()
+            async with mydb.cursor() as mydata:
 
-            # Execute the query
-            mydata.execute("SELECT * FROM gaia_metadata_tbl_pdf")
-            
-            # Fetch all the data
-            myresult = mydata.fetchall()
+                # Execute the query and fetch all the data
+                with span("mysql", "fetch_catalog"):
+                    await mydata.execute("SELECT * FROM gaia_metadata_tbl_pdf")
+                    myresult = await mydata.fetchall()
 
-            logging_module.log_success("Fetched data from gaia_metadata_tbl_pdf")
+                logging_module.log_success("Fetched data from gaia_metadata_tbl_pdf")
 
-            # Get column names
-            columns = [col[0] for col in mydata.description]
+                # Get column names
+                columns = [col[0] for col in mydata.description]
 
-            # Store the fetched data into a pandas DataFrame
-            df = pd.DataFrame(myresult, columns=columns)
+        # Store the fetched data into a pandas DataFrame
+        df = pd.DataFrame(list(myresult), columns=columns)
 
-            return df
+        return df
 
-    except mysql.connector.Error as e:
+    except pymysql.err.MySQLError as e:
         logging_module.log_error(f"Database error occurred: {e}")
         return None
 
@@ -57,9 +81,48 @@ def fetch_data_from_db() -> pd.DataFrame:
         logging_module.log_error(f"An unexpected error occurred: {e}")
         return None
 
-    finally:
-        # Ensure that the cursor and connection are properly closed
-        close_my_sql_connection(mydb, mydata)
+async def get_catalog() -> dict:
+    """
+    Returns the question catalog from the in-process cache, reloading it from the database once it is older
+    than CATALOG_CACHE_TTL seconds or has been invalidated.
+
+    Returns:
+        dict: A dictionary containing the following keys, or None if the catalog could not be loaded:
+            - "df" (pd.DataFrame): The catalog as returned by fetch_data_from_db.
+            - "body" (bytes): The catalog serialized as a JSON list of records.
+            - "etag" (str): A strong ETag derived from the serialized catalog.
+            - "index" (dict): Catalog rows (dict) keyed by task_id, for O(1) lookups.
+    """
+    if _catalog_cache and time.monotonic() - _catalog_cache["loaded_at"] < CATALOG_CACHE_TTL:
+        return _catalog_cache
+
+    # Only one request reloads the catalog; concurrent requests wait for it and share the result
+    async with _catalog_lock:
+        if _catalog_cache and time.monotonic() - _catalog_cache["loaded_at"] < CATALOG_CACHE_TTL:
+            return _catalog_cache
+
+        df = await fetch_data_from_db()
+        if not isinstance(df, pd.DataFrame):
+            return None
+
+        body = df.to_json(orient="records", force_ascii=False).encode("utf-8")
+        _catalog_cache.clear()
+        _catalog_cache.update({
+            "df": df,
+            "body": body,
+            "etag": '"' + hashlib.sha256(body).hexdigest() + '"',
+            "index": {row["task_id"]: row for row in df.to_dict(orient="records")},
+            "loaded_at": time.monotonic(),
+        })
+        logging_module.log_success(f"Question catalog cached with {len(df)} rows.")
+        return _catalog_cache
+
+def invalidate_catalog_cache() -> None:
+    """
+    Drops the cached question catalog so the next request reloads it from the database.
+    """
+    _catalog_cache.clear()
+    logging_module.log_success("Question catalog cache invalidated.")
 
 def parse_s3_url(url: str) -> tuple:
     """
@@ -76,29 +139,116 @@ def parse_s3_url(url: str) -> tuple:
     object_key = parsed_url.path.lstrip('/')       # Extract object key
     return bucket_name, object_key
 
-def generate_presigned_url(s3_url: str, expiration: int = 3600) -> str:
+def _cached_presigned_url(cache_key: tuple) -> str:
+    """Returns a cached pre-signed URL that still has PRESIGNED_URL_MIN_TTL seconds to live, counting the hit or miss."""
+    with _presigned_url_lock:
+        entry = _presigned_url_cache.get(cache_key)
+        if entry is not None and entry[1] - time.time() >= PRESIGNED_URL_MIN_TTL:
+            _presigned_url_cache.move_to_end(cache_key)
+            _presigned_url_stats["hits"] += 1
+            return entry[0]
+        _presigned_url_stats["misses"] += 1
+        return None
+
+def _store_presigned_url(cache_key: tuple, presigned_url: str, expires_at: float) -> None:
+    """Caches a pre-signed URL, evicting URLs too close to expiry first and then the least recently used ones."""
+    with _presigned_url_lock:
+        _presigned_url_cache[cache_key] = (presigned_url, expires_at)
+        _presigned_url_cache.move_to_end(cache_key)
+        if len(_presigned_url_cache) <= PRESIGNED_URL_CACHE_SIZE:
+            return
+
+        reuse_deadline = time.time() + PRESIGNED_URL_MIN_TTL
+        for key in [key for key, (_, expiry) in _presigned_url_cache.items() if expiry < reuse_deadline]:
+            del _presigned_url_cache[key]
+            _presigned_url_stats["evictions"] += 1
+        while len(_presigned_url_cache) > PRESIGNED_URL_CACHE_SIZE:
+            _presigned_url_cache.popitem(last=False)
+            _presigned_url_stats["evictions"] += 1
+
+def get_presigned_url_cache_stats() -> dict:
+    """
+    Returns the hit, miss and eviction counters and the current size of the pre-signed URL cache.
+    """
+    with _presigned_url_lock:
+        stats = dict(_presigned_url_stats)
+        stats["size"] = len(_presigned_url_cache)
+    return stats
+
+def generate_presigned_url(s3_url: str, expiration: int = 3600, extraction_method: str = None) -> str:
     """
     Generates a pre-signed URL for an S3 object that allows temporary access.
+    A previously signed URL for the same object and expiration is re-used while it has at least
+    PRESIGNED_URL_MIN_TTL seconds left; URLs signed for PRESIGNED_URL_MIN_TTL seconds or less are never cached.
 
     Args:
         s3_url (str): The S3 URL of the object (e.g., 'https://bucket-name.s3.amazonaws.com/object-key').
         expiration (int, optional): The time in seconds until the pre-signed URL expires. Defaults to 3600 seconds (1 hour).
+        extraction_method (str, optional): The extractor the object belongs to, part of the cache key.
 
     Returns:
         str: The pre-signed URL allowing temporary access to the S3 object, or None if an error occurs.
     """
     bucket_name, object_key = parse_s3_url(s3_url)
+
+    # The expiration is part of the key so a caller never gets a URL signed for a shorter lifetime than it asked for
+    cache_key = (bucket_name, object_key, extraction_method, expiration)
+    cacheable = expiration > PRESIGNED_URL_MIN_TTL
+    if cacheable:
+        presigned_url = _cached_presigned_url(cache_key)
+        if presigned_url is not None:
+            return presigned_url
     
     try:
         # Generate pre-signed URL that expires in the given time (default: 1 hour)
-        presigned_url = s3.generate_presigned_url('get_object',
-                                                  Params={'Bucket': bucket_name, 'Key': object_key},
-                                                  ExpiresIn=expiration)
+        expires_at = time.time() + expiration
+        with span("s3", "presign"):
+            presigned_url = get_s3_client().generate_presigned_url('get_object',
+                                                                   Params={'Bucket': bucket_name, 'Key': object_key},
+                                                                   ExpiresIn=expiration)
+        if cacheable:
+            _store_presigned_url(cache_key, presigned_url, expires_at)
         return presigned_url
     except Exception as e:
         logging_module.log_error(f"Error generating pre-signed URL: {e}")
         return None
 
+def select_s3_url(row, extraction_method: str = None) -> str:
+    """
+    Picks the S3 URL of a catalog row for the requested extraction method.
+
+    Args:
+        row: A catalog row (dict or pandas Series).
+        extraction_method (str, optional): 'U' for the Unstructured output, 'P' for the PyMuPDF output,
+            None for the original file.
+
+    Returns:
+        str: The S3 URL, or None if the row has no file for that method.
+    """
+    if extraction_method == 'U':
+        s3_url_variable = row['unstructured_api_url']
+        logging_module.log_success(f"Unstructured S3 URL: {s3_url_variable}")
+    elif extraction_method == 'P':
+        s3_url_variable = row['opensource_url']
+        logging_module.log_success(f"PyMuPDF S3 URL: {s3_url_variable}")
+    else:
+        s3_url_variable = row['s3_url']
+        logging_module.log_success(f"S3 URL: {s3_url_variable}")
+    return s3_url_variable
+
+def presign_s3_url(s3_url_variable: str, extraction_method: str = None) -> str:
+    """
+    Generates a pre-signed URL for an S3 URL taken from the catalog, if there is one.
+    """
+    # Check if s3_url_variable is null
+    if s3_url_variable is not None:
+        # Generate a pre-signed URL for the S3 file
+        presigned_url = generate_presigned_url(s3_url_variable, expiration=3600, extraction_method=extraction_method)  # URL valid for 1 hour
+        return presigned_url
+    else:
+        logging_module.log_success("No File is associated with this Question")
+        return None
+
 def process_data_and_generate_url(question: str, df, extraction_method: str = None) -> str:
     """
     Fetches data from the database, extracts the S3 URL for the specified question, and generates a pre-signed URL if available.
@@ -113,65 +263,67 @@ def process_data_and_generate_url(question: str, df, extraction_method: str = No
         # Extract the S3 URL for the specified Question
         matching_rows = df[df['Question'] == question]
         if not matching_rows.empty:
-            if extraction_method == 'U':
-                s3_url_variable = matching_rows['unstructured_api_url'].values[0]
-                print("S3 URL: ", s3_url_variable)
-                logging_module.log_success(f"Unstructured S3 URL: {s3_url_variable}")
-            elif extraction_method == 'P':
-                s3_url_variable = matching_rows['opensource_url'].values[0]
-                logging_module.log_success(f"PyMuPDF S3 URL: {s3_url_variable}")
-            else:
-                s3_url_variable = matching_rows['s3_url'].values[0]
-                logging_module.log_success(f"S3 URL: {s3_url_variable}")
-
-            # Check if s3_url_variable is null
-            if s3_url_variable is not None:
-                # Generate a pre-signed URL for the S3 file
-                presigned_url = generate_presigned_url(s3_url_variable, expiration=3600)  # URL valid for 1 hour
-                return presigned_url
-            else:
-                logging_module.log_success("No File is associated with this Question")
-                return None
+            return presign_s3_url(select_s3_url(matching_rows.iloc[0], extraction_method), extraction_method)
         else:
             logging_module.log_error("No matching Question found")
             return None
     else:
         logging_module.log_error("Failed to fetch data from the database")
         return None
- 
-def download_file(question: str, df: pd.DataFrame, extraction_method: str = None) -> dict:
+
+async def generate_url_for_task(task_id: str, extraction_method: str = None) -> str:
+    """
+    Looks up a task in the cached catalog index and generates a pre-signed URL for its file if available.
+
+    Args:
+        task_id (str): The GAIA task_id of the question.
+        extraction_method (str, optional): 'U', 'P' or None, see select_s3_url.
+
+    Returns:
+        str: A pre-signed URL for the S3 file if available.
+    """
+    catalog = await get_catalog()
+    if catalog is None:
+        logging_module.log_error("Failed to fetch data from the database")
+        return None
+
+    row = catalog["index"].get(task_id)
+    if row is None:
+        logging_module.log_error(f"No matching task_id found: {task_id}")
+        return None
+
+    return presign_s3_url(select_s3_url(row, extraction_method), extraction_method)
+
+async def download_presigned_url(file_name: str) -> dict:
     """
-    Downloads a file from the given URL and saves it as a temporary file with the appropriate extension.
+    Downloads a file from the given URL into the local file cache, re-using the cached copy while the object's
+    ETag is unchanged.
 
     Args:
-        url (str): The URL of the file to be downloaded.
+        file_name (str): The pre-signed URL of the file to be downloaded.
 
     Returns:
         dict: A dictionary containing the following keys:
             - "url" (str): The original URL of the file.
-            - "path" (str): The path to the downloaded temporary file.
+            - "path" (str): The path to the cached file. The cache owns it; callers must not delete it.
             - "extension" (str): The file extension of the downloaded file.
     """
-    # Parse the URL to extract the file name
-    file_name = process_data_and_generate_url(question, df, extraction_method)
-    parsed_url = urlparse(file_name)
-    path = unquote(parsed_url.path)
-    filename = os.path.basename(path)
-    extension = os.path.splitext(filename)[1]
+    return await get_file_cache().fetch(file_name)
 
-    # Create a temporary directory to hold the file
-    temp_dir = "/code/temp_files"
-    os.makedirs(temp_dir, exist_ok=True)
-
-    # Create a temporary file in the specified directory
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=extension, dir=temp_dir)
+async def download_file(question: str, df: pd.DataFrame, extraction_method: str = None) -> dict:
+    """
+    Downloads the file associated with a question in the given catalog DataFrame, see download_presigned_url.
+    """
+    return await download_presigned_url(process_data_and_generate_url(question, df, extraction_method))
 
-    # Get the file from the URL
-    response = requests.get(file_name)
-    response.raise_for_status()  # Check if the download was successful
+async def download_file_by_task_id(task_id: str, extraction_method: str = None) -> dict:
+    """
+    Downloads the file associated with a task_id in the cached catalog, see download_presigned_url.
 
-    # Write the content to the temporary file
-    temp.write(response.content)
-    temp.close()  # Close the file to finalize writing
-    
-    return {"url": file_name, "path": temp.name, "extension": extension}
\ No newline at end of file
+    Returns:
+        dict: The downloaded file details, or None if the task has no file for the extraction method.
+    """
+    presigned_url = await generate_url_for_task(task_id, extraction_method)
+    if presigned_url is None:
+        return None
+    return await download_presigned_url(presigned_url)
@@ -0,0 +1,325 @@
+# This Python script scores models across the whole GAIA catalog instead of one question at a time.
+# Every question x model x extractor (Unstructured 'U' or PyMuPDF 'P') combination is asked concurrently, under
+# a requests-per-minute and tokens-per-minute limiter so a run stays within the OpenAI account limits.
+# Answers are scored with utils.validators.answer_validation_check and accuracy, latency and token usage are
+# written to the 'gaia_evaluation_results' table (or a CSV file).
+# A stub LLM makes it possible to run the whole pipeline offline, e.g.:
+#     python -m fast_api.services.evaluation_service --stub --catalog catalog.json --skip-documents --output results.csv
+
+import os
+import csv
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import argparse
+import statistics
+from fast_api.config.db_connection import close_connection_pool
+from fast_api.services.data_service import get_catalog, download_file_by_task_id
+from fast_api.services.file_cache import close_http_client
+from fast_api.models.evaluation_models import RESULT_COLUMNS, insert_evaluation_results
+from utils.validators import answer_validation_check, extract_json_contents, extract_txt_contents, num_tokens_from_string
+from utils.retrieval import RETRIEVAL_TOKEN_BUDGET, retrieve_context
+from project_logging import logging_module
+
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", 8))                        # Questions in flight at once
+EVAL_REQUESTS_PER_MINUTE = float(os.getenv("EVAL_REQUESTS_PER_MINUTE", 500))
+EVAL_TOKENS_PER_MINUTE = float(os.getenv("EVAL_TOKENS_PER_MINUTE", 200000))
+EVAL_COMPLETION_TOKENS_ESTIMATE = 200  # Reserved per request for the answer until the actual usage is known
+
+EXTRACTORS = {'U': extract_json_contents, 'P': extract_txt_contents}
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token) used to reserve limiter capacity before a request."""
+    return len(text) // 4 + 1
+
+class RateLimiter:
+    """
+    A token bucket limiting both requests and tokens per minute. Capacity refills continuously, and waiters
+    are served in arrival order.
+    """
+
+    def __init__(self, requests_per_minute: float = EVAL_REQUESTS_PER_MINUTE, tokens_per_minute: float = EVAL_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed, self._updated = now - self._updated, now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    async def acquire(self, tokens: int) -> int:
+        """
+        Waits until one request and `tokens` tokens are available and reserves them.
+
+        Returns:
+            int: The number of tokens reserved; pass it to settle() once the actual usage is known.
+        """
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return tokens
+                await asyncio.sleep(max((1 - self._requests) * 60 / self.requests_per_minute,
+                                        (tokens - self._tokens) * 60 / self.tokens_per_minute))
+
+    def settle(self, reserved: int, used: int) -> None:
+        """
+        Corrects a reservation with the tokens a request actually used.
+        """
+        self._tokens = min(self.tokens_per_minute, self._tokens + reserved - used)
+
+class OpenAIBackend:
+    """
+    Asks questions through the application's OpenAIClient, bypassing the LLM response cache so latency and
+    token usage are measured.
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def complete(self, question_contents: str, model: str, reference: str = None) -> dict:
+        return await self.client.complete(question_contents, model)
+
+class StubBackend:
+    """
+    An offline stand-in for the LLM: answers a deterministic `accuracy` share of the questions correctly after
+    a simulated latency, so runs can be exercised without an API key or token spend.
+    """
+
+    def __init__(self, accuracy: float = 0.5, latency: float = 0.05):
+        self.accuracy = accuracy
+        self.latency = latency
+
+    async def complete(self, question_contents: str, model: str, reference: str = None) -> dict:
+        await asyncio.sleep(self.latency)
+        draw = int(hashlib.sha256(f"{model}\n{question_contents}".encode("utf-8")).hexdigest()[:8], 16) / 0xFFFFFFFF
+        answer = reference if reference and draw < self.accuracy else "I do not know"
+        return {"answer": answer, "prompt_tokens": estimate_tokens(question_contents), "completion_tokens": estimate_tokens(answer)}
+
+async def load_document(task_id: str, extractor: str, model: str, question: str) -> str:
+    """
+    Returns the extracted contents of a task's PDF, cut down to the most relevant chunks when they exceed the
+    retrieval token budget, as the Streamlit app does.
+    """
+    loaded_file = await download_file_by_task_id(task_id, extractor)
+    if loaded_file is None:
+        return ""
+    file_contents = await asyncio.to_thread(EXTRACTORS[extractor], loaded_file["path"])
+    if await asyncio.to_thread(num_tokens_from_string, file_contents, model.lower()) > RETRIEVAL_TOKEN_BUDGET:
+        file_contents = await asyncio.to_thread(retrieve_context, question, file_contents, model.lower())
+    return file_contents
+
+async def evaluate_question(row: dict, model: str, extractor: str, backend, limiter: RateLimiter,
+                            semaphore: asyncio.Semaphore, run_id: str, skip_documents: bool = False) -> dict:
+    """
+    Asks one question with one model and extractor and scores the answer.
+
+    Returns:
+        dict: The result, with the keys of RESULT_COLUMNS.
+    """
+    expected = None if row.get('final_answer') in (None, '?') else str(row['final_answer'])
+    result = {"run_id": run_id, "task_id": row['task_id'], "level": str(row.get('Level')), "model": model,
+              "extractor": extractor, "answer": None, "expected": expected, "correct": None, "latency_ms": None,
+              "prompt_tokens": None, "completion_tokens": None, "error": None}
+
+    async with semaphore:
+        try:
+            file_contents = "" if skip_documents else await load_document(row['task_id'], extractor, model, row['Question'])
+            question_contents = row['Question'] + 'Context:```' + file_contents + "```"
+
+            reserved = await limiter.acquire(estimate_tokens(question_contents) + EVAL_COMPLETION_TOKENS_ESTIMATE)
+            start = time.perf_counter()
+            response = await backend.complete(question_contents, model, reference=expected)
+            result["latency_ms"] = (time.perf_counter() - start) * 1000
+            limiter.settle(reserved, (response["prompt_tokens"] or 0) + (response["completion_tokens"] or 0) or reserved)
+
+            result.update(response)
+            if response["answer"] is not None and expected is not None:
+                result["correct"] = answer_validation_check(response["answer"], expected) == 2
+        except Exception as e:
+            logging_module.log_error(f"Evaluation of task {row['task_id']} with {model}/{extractor} failed: {e}")
+            result["error"] = str(e)
+
+    return result
+
+def summarize(results: list) -> list:
+    """
+    Aggregates per-question results into accuracy, latency and token usage per model and extractor.
+    """
+    groups = {}
+    for result in results:
+        groups.setdefault((result["model"], result["extractor"]), []).append(result)
+
+    summary = []
+    for (model, extractor), group in groups.items():
+        scored = [result["correct"] for result in group if result["correct"] is not None]
+        latencies = sorted(result["latency_ms"] for result in group if result["latency_ms"] is not None)
+        summary.append({
+            "model": model,
+            "extractor": extractor,
+            "questions": len(group),
+            "scored": len(scored),
+            "correct": sum(scored),
+            "accuracy": sum(scored) / len(scored) if scored else None,
+            "errors": sum(result["error"] is not None for result in group),
+            "latency_avg_ms": statistics.fmean(latencies) if latencies else None,
+            "latency_p95_ms": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))] if latencies else None,
+            "prompt_tokens": sum(result["prompt_tokens"] or 0 for result in group),
+            "completion_tokens": sum(result["completion_tokens"] or 0 for result in group),
+        })
+    return summary
+
+async def run_evaluation(rows: list, models: list, backend, extractors: list = ('U', 'P'), limiter: RateLimiter = None,
+                         concurrency: int = EVAL_CONCURRENCY, skip_documents: bool = False, run_id: str = None) -> dict:
+    """
+    Evaluates every question x model x extractor combination concurrently.
+
+    Args:
+        rows (list): Catalog rows (dicts with task_id, Question, Level and final_answer).
+        models (list): The models to evaluate.
+        backend: OpenAIBackend or StubBackend.
+        extractors (list): The extraction methods to compare, 'U' and/or 'P'.
+        limiter (RateLimiter, optional): The request/token limiter, one with the default limits if not given.
+        concurrency (int): The maximum number of questions in flight.
+        skip_documents (bool): Ask the bare questions without downloading the extracted PDFs.
+        run_id (str, optional): The identifier of the run, generated if not given.
+
+    Returns:
+        dict: The run_id, the per-question results and their summary.
+    """
+    run_id = run_id or str(uuid.uuid4())
+    limiter = limiter or RateLimiter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    logging_module.log_success(f"Evaluation {run_id}: {len(rows)} questions x {len(models)} models x {len(extractors)} extractors")
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        evaluate_question(row, model, extractor, backend, limiter, semaphore, run_id, skip_documents)
+        for row in rows for model in models for extractor in extractors
+    ))
+    logging_module.log_success(f"Evaluation {run_id} finished in {time.perf_counter() - start:.1f}s")
+
+    return {"run_id": run_id, "results": list(results), "summary": summarize(results)}
+
+EVAL_RUN_RETENTION = float(os.getenv("EVAL_RUN_RETENTION", 3600))  # Seconds a finished run's status stays queryable
+EVAL_MAX_RUNS = int(os.getenv("EVAL_MAX_RUNS", 100))                # Finished runs kept at most
+EVAL_ALLOW_OPENAI = os.getenv("EVAL_ALLOW_OPENAI", "false").lower() == "true"  # Lets the API run paid OpenAI evaluations
+
+# Evaluations started through the API, by run_id, oldest first
+_runs = {}
+
+def _evict_finished_runs() -> None:
+    """
+    Forgets finished runs older than EVAL_RUN_RETENTION and the oldest ones beyond EVAL_MAX_RUNS; their results
+    are kept in the results table. Running evaluations are never evicted.
+    """
+    now = time.monotonic()
+    finished = [run_id for run_id, run in _runs.items() if run["status"] != "running"]
+    expired = {run_id for run_id in finished if now - _runs[run_id]["finished_at"] > EVAL_RUN_RETENTION}
+    expired.update(finished[:max(0, len(finished) - EVAL_MAX_RUNS)])
+    for run_id in expired:
+        del _runs[run_id]
+
+def start_evaluation(rows: list, models: list, backend, **kwargs) -> str:
+    """
+    Starts an evaluation in the background of the running event loop and stores its results in the
+    results table once it finishes. Only one evaluation runs at a time.
+
+    Returns:
+        str: The run_id, see get_evaluation_status.
+
+    Raises:
+        RuntimeError: If another evaluation is still running.
+    """
+    _evict_finished_runs()
+    running = next((run_id for run_id, run in _runs.items() if run["status"] == "running"), None)
+    if running is not None:
+        raise RuntimeError(f"Evaluation {running} is still running")
+    run_id = str(uuid.uuid4())
+    _runs[run_id] = {"run_id": run_id, "status": "running", "summary": None}
+
+    async def run() -> None:
+        try:
+            evaluation = await run_evaluation(rows, models, backend, run_id=run_id, **kwargs)
+            await insert_evaluation_results(evaluation["results"])
+            _runs[run_id].update(status="completed", summary=evaluation["summary"])
+        except Exception as e:
+            logging_module.log_error(f"Evaluation {run_id} failed: {e}")
+            _runs[run_id].update(status="failed", error=str(e))
+        finally:
+            # The finished task is not kept; a reference is only needed while it runs
+            _runs[run_id].update(finished_at=time.monotonic(), task=None)
+
+    _runs[run_id]["task"] = asyncio.create_task(run())
+    return run_id
+
+def get_evaluation_status(run_id: str) -> dict:
+    """
+    Returns the status and, once completed, the summary of an evaluation started through the API.
+    """
+    _evict_finished_runs()
+    run = _runs.get(run_id)
+    return {key: value for key, value in run.items() if key not in ("task", "finished_at")} if run else None
+
+def write_results_csv(results: list, path: str) -> None:
+    with open(path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=RESULT_COLUMNS, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(results)
+
+async def main(args) -> None:
+    if args.catalog:
+        with open(args.catalog) as file:
+            rows = json.load(file)
+    else:
+        catalog = await get_catalog()
+        rows = catalog["df"].to_dict(orient="records") if catalog else []
+    rows = rows[:args.limit] if args.limit else rows
+
+    if args.stub:
+        backend, client = StubBackend(accuracy=args.stub_accuracy), None
+    else:
+        from fast_api.services.openai_service import OpenAIClient
+        client = OpenAIClient()
+        backend = OpenAIBackend(client)
+
+    try:
+        run = await run_evaluation(rows, args.models, backend, extractors=args.extractors,
+                                   limiter=RateLimiter(args.rpm, args.tpm), concurrency=args.concurrency,
+                                   skip_documents=args.skip_documents)
+        if args.output:
+            write_results_csv(run["results"], args.output)
+        else:
+            await insert_evaluation_results(run["results"])
+    finally:
+        if client is not None:
+            await client.close()
+        await close_connection_pool()
+        await close_http_client()
+
+    print(json.dumps({"run_id": run["run_id"], "summary": run["summary"]}, indent=2))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evaluate models across the GAIA PDF catalog.")
+    parser.add_argument('--models', nargs='+', default=["GPT-4o"], help="Models to evaluate")
+    parser.add_argument('--extractors', nargs='+', default=['U', 'P'], choices=['U', 'P'], help="Extraction methods to compare")
+    parser.add_argument('--concurrency', type=int, default=EVAL_CONCURRENCY)
+    parser.add_argument('--rpm', type=float, default=EVAL_REQUESTS_PER_MINUTE, help="Requests per minute limit")
+    parser.add_argument('--tpm', type=float, default=EVAL_TOKENS_PER_MINUTE, help="Tokens per minute limit")
+    parser.add_argument('--limit', type=int, help="Only evaluate the first N questions")
+    parser.add_argument('--catalog', help="Read the catalog from a JSON file (as returned by /data/fetch-questions/)")
+    parser.add_argument('--skip-documents', action='store_true', help="Ask the questions without the extracted PDFs")
+    parser.add_argument('--output', help="Write the results to this CSV file instead of the results table")
+    parser.add_argument('--stub', action='store_true', help="Use the offline stub LLM")
+    parser.add_argument('--stub-accuracy', type=float, default=0.5)
+    asyncio.run(main(parser.parse_args()))
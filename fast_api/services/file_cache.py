@@ -0,0 +1,218 @@
+# This Python script implements a content-addressed local disk cache for files downloaded from S3.
+# Files are stored under a name derived from the object's location and ETag, so a changed object never
+# collides with its previous version. Repeat downloads revalidate the cached copy with If-None-Match and are
+# served from disk on a 304. Downloads are streamed to a temporary file and atomically renamed into place,
+# with the disk writes done in a worker thread so the event loop is never blocked on file I/O. The least recently
+# used files are evicted once the cache exceeds its byte budget, except files handed out within the last
+# FILE_CACHE_LEASE seconds, so a caller (or the Streamlit app, which reads the path through the shared volume)
+# never finds the file it was given deleted under it.
+
+import os
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+from collections import OrderedDict
+from urllib.parse import urlparse, unquote
+import httpx
+from fast_api.services.metrics import span
+from project_logging import logging_module
+
+FILE_CACHE_DIR = os.getenv("FILE_CACHE_DIR", "/code/temp_files")
+FILE_CACHE_MAX_BYTES = int(os.getenv("FILE_CACHE_MAX_BYTES", 1024 * 1024 * 1024))  # 1 GiB
+FILE_CACHE_CHUNK_SIZE = 1024 * 1024
+FILE_DOWNLOAD_TIMEOUT = float(os.getenv("FILE_DOWNLOAD_TIMEOUT", 60))
+FILE_CACHE_LEASE = float(os.getenv("FILE_CACHE_LEASE", 600))  # Seconds a returned file is protected from eviction
+
+class FileCache:
+    """
+    A bounded, thread-safe disk cache of downloaded files keyed by object location + ETag.
+    """
+
+    def __init__(self, directory: str = FILE_CACHE_DIR, max_bytes: int = FILE_CACHE_MAX_BYTES,
+                 lease: float = FILE_CACHE_LEASE):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lease = lease
+
+        self._lock = threading.Lock()
+        self._files = OrderedDict()  # path -> size in bytes, least recently used first
+        self._objects = {}           # object location -> (etag, path)
+        self._leases = {}            # path -> monotonic time until which it must not be evicted
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan_directory()
+
+    def _scan_directory(self) -> None:
+        """Accounts for files left by a previous process so they count against the budget and are evicted first."""
+        existing = []
+        for entry in os.scandir(self.directory):
+            if entry.is_file() and not entry.name.startswith('.'):
+                stat = entry.stat()
+                existing.append((stat.st_mtime, entry.path, stat.st_size))
+        for _, path, size in sorted(existing):
+            self._files[path] = size
+            self._total_bytes += size
+        self._remove_files(self._evict())
+
+    def _evict(self) -> list:
+        """
+        Drops least recently used files from the cache until it fits its byte budget, skipping leased files, and
+        returns their paths for the caller to delete outside the lock. Caller holds the lock.
+        """
+        now = time.monotonic()
+        evicted = []
+        for path in list(self._files):
+            if self._total_bytes <= self.max_bytes or len(self._files) <= 1:
+                break
+            if self._leases.get(path, 0) > now:
+                continue
+            self._total_bytes -= self._files.pop(path)
+            self._leases.pop(path, None)
+            self._stats["evictions"] += 1
+            for location, (_, cached_path) in list(self._objects.items()):
+                if cached_path == path:
+                    del self._objects[location]
+            evicted.append(path)
+        return evicted
+
+    def _lease(self, path: str) -> None:
+        """Marks a file as just handed out, protecting it from eviction for the lease period. Caller holds the lock."""
+        self._leases[path] = time.monotonic() + self.lease
+
+    @staticmethod
+    def _remove_files(paths: list) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError as e:
+                logging_module.log_error(f"Error evicting cached file {path}: {e}")
+
+    def _path_for(self, location: str, etag: str, extension: str) -> str:
+        digest = hashlib.sha256(f"{location}\n{etag}".encode()).hexdigest()
+        return os.path.join(self.directory, digest + extension)
+
+    async def fetch(self, url: str) -> dict:
+        """
+        Returns a local copy of the file behind a (pre-signed) URL, downloading it only if the cached copy is
+        missing or stale.
+
+        Args:
+            url (str): The URL of the file to be downloaded.
+
+        Returns:
+            dict: A dictionary containing the following keys:
+                - "url" (str): The original URL of the file.
+                - "path" (str): The path to the cached file.
+                - "extension" (str): The file extension of the downloaded file.
+        """
+        parsed_url = urlparse(url)
+        location = parsed_url.netloc + unquote(parsed_url.path)  # Stable across re-signed URLs
+        extension = os.path.splitext(os.path.basename(unquote(parsed_url.path)))[1]
+
+        headers = {}
+        with self._lock:
+            cached = self._objects.get(location)
+            if cached:
+                # Protects the cached copy while it is revalidated, so a concurrent fetch cannot evict it
+                self._lease(cached[1])
+        if cached and os.path.exists(cached[1]):
+            headers["If-None-Match"] = cached[0]
+
+        with span("s3", "download"):
+            async with get_http_client().stream("GET", url, headers=headers) as response:
+                if response.status_code == 304 and cached:
+                    with self._lock:
+                        if cached[1] in self._files:
+                            self._files.move_to_end(cached[1])
+                        self._lease(cached[1])
+                        self._stats["hits"] += 1
+                    return {"url": url, "path": cached[1], "extension": extension}
+
+                response.raise_for_status()  # Check if the download was successful
+                etag = response.headers.get("ETag", "")
+                path = self._path_for(location, etag, extension)
+
+                if not (etag and os.path.exists(path)):
+                    # Stream into a temporary file and rename it into place once complete; the disk writes run
+                    # in a worker thread so a large file does not block the event loop
+                    fd, temp_path = await asyncio.to_thread(tempfile.mkstemp, dir=self.directory, prefix='.', suffix='.part')
+                    try:
+                        with os.fdopen(fd, 'wb') as temp:
+                            async for chunk in response.aiter_bytes(chunk_size=FILE_CACHE_CHUNK_SIZE):
+                                await asyncio.to_thread(temp.write, chunk)
+                        await asyncio.to_thread(os.replace, temp_path, path)
+                    except BaseException:
+                        os.remove(temp_path)
+                        raise
+
+        size = os.path.getsize(path)
+        with self._lock:
+            self._stats["misses"] += 1
+            if path in self._files:
+                self._total_bytes -= self._files[path]
+            self._files[path] = size
+            self._files.move_to_end(path)
+            self._total_bytes += size
+            self._lease(path)
+            stale = []
+            if etag:
+                previous = self._objects.get(location)
+                self._objects[location] = (etag, path)
+                if previous and previous[1] != path and previous[1] in self._files:
+                    # The object changed: drop the copy of its previous version, or make it the next to be
+                    # evicted if it was handed out recently
+                    if self._leases.get(previous[1], 0) > time.monotonic():
+                        self._files.move_to_end(previous[1], last=False)
+                    else:
+                        self._total_bytes -= self._files.pop(previous[1])
+                        self._leases.pop(previous[1], None)
+                        stale.append(previous[1])
+            evicted = self._evict()
+        await asyncio.to_thread(self._remove_files, stale + evicted)
+        return {"url": url, "path": path, "extension": extension}
+
+    def stats(self) -> dict:
+        """
+        Returns the hit, miss and eviction counters and the current size of the cache.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({"files": len(self._files), "bytes": self._total_bytes, "max_bytes": self.max_bytes})
+        return stats
+
+_file_cache = None
+_file_cache_lock = threading.Lock()
+_http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Returns the process-wide asynchronous HTTP client used for file downloads, creating it on first use.
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=FILE_DOWNLOAD_TIMEOUT)
+    return _http_client
+
+async def close_http_client() -> None:
+    """
+    Closes the file download HTTP client, e.g. on application shutdown.
+    """
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def get_file_cache() -> FileCache:
+    """
+    Returns the process-wide file cache, creating it on first use.
+    """
+    global _file_cache
+    if _file_cache is None:
+        with _file_cache_lock:
+            if _file_cache is None:
+                _file_cache = FileCache()
+    return _file_cache
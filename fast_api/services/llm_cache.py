@@ -0,0 +1,153 @@
+# This Python script implements a persistent cache of LLM responses backed by a local SQLite file.
+# Responses are keyed by a SHA-256 hash of the normalized request (model, system prompt, user content including
+# any annotator steps, and image URL), so re-asking the same GAIA question costs no tokens and returns in
+# milliseconds, across restarts. Entries expire after a TTL and the least recently used entries are evicted
+# once the cache holds more than its configured number of entries. The entry count is tracked in memory and
+# expired rows are pruned only every LLM_CACHE_PRUNE_EVERY writes, so a write never scans the whole table.
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import asyncio
+import threading
+from project_logging import logging_module
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "/code/cache/llm_responses.sqlite3")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 7 * 24 * 3600))         # Seconds a cached response stays valid
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+LLM_CACHE_PRUNE_EVERY = int(os.getenv("LLM_CACHE_PRUNE_EVERY", 500))    # Writes between sweeps of expired entries
+
+def normalize_text(text: str) -> str:
+    """Collapses runs of whitespace so formatting-only differences map to the same cache key."""
+    return " ".join(text.split()) if text else ""
+
+def cache_key(model: str, system_content: str, user_content: str, imageurl: str = None) -> str:
+    """
+    Returns the cache key of an LLM request: a SHA-256 hash of its normalized model, prompts and image URL.
+    """
+    payload = [model.lower(), normalize_text(system_content), normalize_text(user_content), imageurl or ""]
+    return hashlib.sha256(json.dumps(payload).encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    A persistent, size-capped LLM response cache stored in SQLite. The blocking SQLite calls run in a worker
+    thread so the event loop is never held up by disk I/O.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl: float = LLM_CACHE_TTL, max_entries: int = LLM_CACHE_MAX_ENTRIES,
+                 prune_every: int = LLM_CACHE_PRUNE_EVERY):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+
+        self._lock = threading.Lock()        # Serializes the SQLite calls
+        self._stats_lock = threading.Lock()  # Guards the counters only, so stats() never waits on SQLite
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0, "entries": 0}
+        self._writes_since_prune = 0          # Guarded by _lock
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                created_at REAL,
+                last_access REAL
+            )
+        """)
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses (last_access)")
+        self._db.commit()
+        self._entries = self._db.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]  # Guarded by _lock
+        self._stats["entries"] = self._entries
+
+    def _get(self, key: str) -> str:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response FROM llm_responses WHERE key = ? AND created_at > ?",
+                                   (key, now - self.ttl)).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+                self._db.commit()
+        with self._stats_lock:
+            self._stats["hits" if row is not None else "misses"] += 1
+        return row[0] if row is not None else None
+
+    def _set(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        evicted = 0
+        with self._lock:
+            exists = self._db.execute("SELECT 1 FROM llm_responses WHERE key = ?", (key,)).fetchone() is not None
+            self._db.execute("INSERT OR REPLACE INTO llm_responses (key, model, response, created_at, last_access) "
+                             "VALUES (?, ?, ?, ?, ?)", (key, model, response, now, now))
+            if not exists:
+                self._entries += 1
+            self._writes_since_prune += 1
+
+            # Drop expired entries periodically, or first thing when over the size cap
+            if self._writes_since_prune >= self.prune_every or self._entries > self.max_entries:
+                self._writes_since_prune = 0
+                expired = self._db.execute("DELETE FROM llm_responses WHERE created_at <= ?", (now - self.ttl,)).rowcount
+                self._entries -= expired
+                evicted += expired
+
+            # Then the least recently used ones beyond the size cap, walking the last_access index
+            if self._entries > self.max_entries:
+                overflow = self._db.execute("""
+                    DELETE FROM llm_responses WHERE key IN (
+                        SELECT key FROM llm_responses ORDER BY last_access ASC LIMIT ?
+                    )
+                """, (self._entries - self.max_entries,)).rowcount
+                self._entries -= overflow
+                evicted += overflow
+            self._db.commit()
+            entries = self._entries
+        with self._stats_lock:
+            self._stats["writes"] += 1
+            self._stats["evictions"] += evicted
+            self._stats["entries"] = entries
+
+    async def get(self, key: str) -> str:
+        """
+        Returns the cached response for a key, or None if there is no valid entry.
+        """
+        try:
+            return await asyncio.to_thread(self._get, key)
+        except sqlite3.Error as e:
+            logging_module.log_error(f"Error reading the LLM response cache: {e}")
+            return None
+
+    async def set(self, key: str, model: str, response: str) -> None:
+        """
+        Stores a response under a key, evicting expired and least recently used entries as needed.
+        """
+        try:
+            await asyncio.to_thread(self._set, key, model, response)
+        except sqlite3.Error as e:
+            logging_module.log_error(f"Error writing the LLM response cache: {e}")
+
+    def stats(self) -> dict:
+        """
+        Returns the hit, miss, write and eviction counters, the hit rate and the number of cached entries.
+        The entry count is tracked in memory, so this does no SQLite work.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+_llm_cache = None
+
+def get_llm_response_cache() -> LLMResponseCache:
+    """
+    Returns the process-wide LLM response cache, creating it on first use.
+    """
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMResponseCache()
+    return _llm_cache
@@ -0,0 +1,112 @@
+# This Python script defines the Prometheus metrics of the API, exported in text format on /metrics.
+# Request latency is recorded per route by the application middleware, and `span()` timers around the
+# dependencies of a request (JWT decode, MySQL queries, S3 pre-signing and downloads, OpenAI calls) record where
+# that time goes. The stats of the connection pool and of the in-process caches are exported at scrape time,
+# as counters or gauges.
+
+import time
+from contextlib import contextmanager
+from prometheus_client import Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+# OpenAI calls can take minutes, so their buckets reach further than the defaults
+LLM_BUCKETS = (0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Latency of API requests, until the response headers are sent",
+    ["method", "route", "status"]
+)
+DEPENDENCY_LATENCY = Histogram(
+    "dependency_duration_seconds", "Latency of calls to the dependencies of a request",
+    ["dependency", "operation"]
+)
+OPENAI_LATENCY = Histogram(
+    "openai_request_duration_seconds", "Latency of OpenAI calls per model, until the full answer is received",
+    ["model", "operation"], buckets=LLM_BUCKETS
+)
+
+@contextmanager
+def span(dependency: str, operation: str):
+    """
+    Times the enclosed block into the dependency latency histogram, whether it succeeds or raises.
+
+    Args:
+        dependency (str): The dependency called, e.g. 'mysql' or 's3'.
+        operation (str): What is done with it, e.g. 'fetch_user' or 'presign'.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        DEPENDENCY_LATENCY.labels(dependency, operation).observe(time.perf_counter() - start)
+
+@contextmanager
+def openai_span(model: str, operation: str):
+    """
+    Times the enclosed OpenAI call into the per-model latency histogram.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        OPENAI_LATENCY.labels(model.lower(), operation).observe(time.perf_counter() - start)
+
+class StatsCollector:
+    """
+    Exports the stats() of the connection pool and the in-process caches on every scrape: the ever-increasing
+    counts as counters, the rest as gauges. Only components that already exist are read, so a scrape never
+    creates the pool or a cache.
+    """
+
+    # stats() keys that only ever increase
+    COUNTERS = {"hits", "misses", "evictions", "writes", "checkouts", "timeouts", "connections_created",
+                "connections_recycled", "connections_invalidated", "wait_seconds_total"}
+
+    def describe(self):
+        # Without describe(), registering calls collect() right away, which would create the pool and caches
+        # when the app is imported
+        return []
+
+    def collect(self):
+        # Imported here to avoid a circular import: these modules time their calls with span()
+        from fast_api.config import db_connection
+        from fast_api.services import data_service, file_cache, llm_cache
+
+        components = {
+            "db_pool": db_connection._pool,
+            "file_cache": file_cache._file_cache,
+            "llm_response_cache": llm_cache._llm_cache,
+        }
+        sources = {source: component.stats for source, component in components.items() if component is not None}
+        sources["presigned_url_cache"] = data_service.get_presigned_url_cache_stats
+        for source, stats in sources.items():
+            try:
+                values = stats()
+            except Exception:
+                continue
+            for key, value in values.items():
+                if not isinstance(value, (int, float)) or isinstance(value, bool):
+                    continue
+                if key in self.COUNTERS:
+                    # The client library appends the _total suffix
+                    name = f"{source}_{key[:-len('_total')] if key.endswith('_total') else key}"
+                    yield CounterMetricFamily(name, f"{source} stats(): {key}", value=value)
+                else:
+                    yield GaugeMetricFamily(f"{source}_{key}", f"{source} stats(): {key}", value=value)
+
+_stats_collector = None
+
+def register_stats_collector() -> None:
+    """
+    Registers the stats collector with the default registry, once per process.
+    """
+    global _stats_collector
+    if _stats_collector is None:
+        _stats_collector = StatsCollector()
+        REGISTRY.register(_stats_collector)
+
+def render_metrics() -> tuple:
+    """
+    Returns the current metrics in the Prometheus text format and their content type.
+    """
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
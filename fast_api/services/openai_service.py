@@ -2,18 +2,59 @@
 # It initializes the OpenAI client and sets up system prompt instructions for handling different types
 # of questions and output formats. The class serves as a wrapper around the OpenAI API, providing a 
 # structured way to initialize and manage AI prompts and responses within the application.
+# A single OpenAIClient is created when the application starts and shared by all requests, so calls re-use
+# warm keep-alive (HTTP/2) connections instead of paying a TLS handshake per question.
+# File search assistants are created once per (model, instructions) and uploaded files are indexed once per
+# content hash, so repeat questions over the same PDF skip the upload-and-index round trips.
 
+import os
+import math
+import time
+import asyncio
+import hashlib
+import httpx
 import openai
-from openai import OpenAI
+from typing import AsyncIterator
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+from fastapi import Request
+from fast_api.services.llm_cache import cache_key, get_llm_response_cache
+from fast_api.services.metrics import OPENAI_LATENCY, openai_span, span
 from project_logging import logging_module
-from parameter_config import OPENAI_API_KEY
+from parameter_config import settings
+
+# HTTP connection pool and timeout settings for the OpenAI API
+OPENAI_HTTP2 = os.getenv("OPENAI_HTTP2", "true").lower() == "true"
+OPENAI_MAX_CONNECTIONS = int(os.getenv("OPENAI_MAX_CONNECTIONS", 200))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", 50))
+OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("OPENAI_KEEPALIVE_EXPIRY", 120))  # Seconds an idle connection is kept
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", 10))
+OPENAI_READ_TIMEOUT = float(os.getenv("OPENAI_READ_TIMEOUT", 300))          # Long completions can take minutes
+
+# Seconds an uploaded file and its vector store are kept after their last use by file_validation_prompt
+OPENAI_FILE_CACHE_TTL = float(os.getenv("OPENAI_FILE_CACHE_TTL", 24 * 3600))
 
 class OpenAIClient:
     def __init__(self):
         """
-        Initializes the OpenAIClient with all system prompts.
+        Initializes the OpenAIClient with all system prompts and a tuned, long-lived HTTP connection pool.
         """
-        self.client = OpenAI(api_key=OPENAI_API_KEY)  # Initialize OpenAI client
+        http_client = DefaultAsyncHttpxClient(
+            http2=OPENAI_HTTP2,
+            limits=httpx.Limits(
+                max_connections=OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=OPENAI_KEEPALIVE_EXPIRY
+            ),
+            timeout=httpx.Timeout(OPENAI_READ_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+        )
+        self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)  # Initialize asynchronous OpenAI client
+        self.response_cache = get_llm_response_cache()  # Persistent cache of validation_prompt responses
+
+        # File search resources reused across file_validation_prompt calls
+        self._assistants = {}    # (model, instructions hash) -> assistant ID
+        self._assistant_lock = asyncio.Lock()
+        self._uploads = {}       # file content hash -> {"file_id", "vector_store_id", "last_used"}
+        self._upload_locks = {}  # file content hash -> lock serializing its upload
 
         # System content strings
         self.val_system_content = """Every prompt will begin with the text \"Question:\" followed by the question \
@@ -39,48 +80,79 @@ file that is uploaded in the thread. """
         else:
             return f"Question: ```{question}```\nAnnotator Steps: {annotator_steps}\nOutput Format: {self.output_format}\n"
         
-    def validation_prompt(self, question: str, model: str, annotator_steps: str = None, imageurl: str = None) -> str:
+    def prompt_contents(self, question: str, annotator_steps: str = None) -> tuple:
+        """
+        Returns the system and user content of a validation prompt.
+        """
         if annotator_steps:
-            user_content = self.format_content(question, annotator_steps)
-            system_content = self.ann_system_content
+            return self.ann_system_content, self.format_content(question, annotator_steps)
+        return self.val_system_content, self.format_content(question)
+
+    def build_messages(self, system_content: str, user_content: str, imageurl: str = None) -> list:
+        """
+        Returns the chat messages of a validation prompt, attaching the image when one is given.
+        """
+        if imageurl:
+            user_message = {
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": user_content},
+                    {"type": "image_url",
+                    "image_url": {
+                        "url": imageurl,
+                        "detail": "low"
+                        }
+                    },
+                ],
+            }
         else:
-            user_content = self.format_content(question)
-            system_content = self.val_system_content
+            user_message = {"role": "user", "content": user_content}
+        return [{"role": "system", "content": system_content}, user_message]
+
+    async def complete(self, question: str, model: str, annotator_steps: str = None, imageurl: str = None) -> dict:
+        """
+        Asks a validation prompt without going through the response cache. API errors are raised to the caller.
+
+        Returns:
+            dict: The "answer" (str) and the "prompt_tokens" and "completion_tokens" (int, None if not reported).
+        """
+        system_content, user_content = self.prompt_contents(question, annotator_steps)
+        with openai_span(model, "chat"):
+            response = await self.client.chat.completions.create(
+                model=model.lower(),
+                messages=self.build_messages(system_content, user_content, imageurl)
+            )
+        return {
+            "answer": response.choices[0].message.content,
+            "prompt_tokens": response.usage.prompt_tokens if response.usage else None,
+            "completion_tokens": response.usage.completion_tokens if response.usage else None,
+        }
+
+    async def validation_prompt(self, question: str, model: str, annotator_steps: str = None, imageurl: str = None,
+                                use_cache: bool = True) -> str:
+        system_content, user_content = self.prompt_contents(question, annotator_steps)
+
+        # Identical requests are answered from the persistent response cache unless bypassed
+        key = cache_key(model, system_content, user_content, imageurl)
+        if use_cache:
+            cached_response = await self.response_cache.get(key)
+            if cached_response is not None:
+                logging_module.log_success(f"Response served from the LLM response cache: {key}")
+                return cached_response
+
         try:
-            logging_module.log_success(f"System Content: {system_content}")
-            logging_module.log_success(f"User Content: {user_content}")
+            logging_module.log_success("Sending prompt to OpenAI", model=model.lower(),
+                                       payload={"system_content": system_content, "user_content": user_content})
 
-            if imageurl:     
-                response = self.client.chat.completions.create(
-                    model=model.lower(),
-                    messages=[
-                        {"role": "system", "content": system_content},
-                        {
-                            "role": "user",
-                            "content": [
-                                {"type": "text", "text": user_content},
-                                {"type": "image_url", 
-                                "image_url": {
-                                    "url": imageurl,
-                                    "detail": "low"
-                                    }
-                                },
-                            ],
-                        }
-                    ]
-                )
-            else:
-                response = self.client.chat.completions.create(
-                    model=model.lower(),
-                    messages=[
-                        {"role": "system", "content": system_content},
-                        {"role": "user", "content": user_content}
-                    ]
-                )
+            answer = (await self.complete(question, model, annotator_steps, imageurl))["answer"]
+
+            logging_module.log_success("Response received", payload={"response": answer})
 
-            logging_module.log_success(f"Response: {response.choices[0].message.content}")
+            # Refreshes the entry even when the cache was bypassed; errors are never cached
+            if answer is not None:
+                await self.response_cache.set(key, model.lower(), answer)
 
-            return response.choices[0].message.content
+            return answer
         
         except openai.BadRequestError as e:
             logging_module.log_error(f"Error: {e}")
@@ -91,62 +163,202 @@ file that is uploaded in the thread. """
         except Exception as e:
             logging_module.log_error(f"An unexpected error occurred: {str(e)}")
             return f"Error-BDIA: {e}"
-        
-    def file_validation_prompt(self, file_path: str, question: str, model: str) -> str:
-        user_content = self.format_content(question)
-        system_content = self.val_system_content
-        try:
 
-            logging_module.log_success(f"System Content: {system_content}")
-            logging_module.log_success(f"User Content: {user_content}")
+    async def stream_validation_prompt(self, question: str, model: str, annotator_steps: str = None,
+                                       imageurl: str = None, use_cache: bool = True) -> AsyncIterator[str]:
+        """
+        Streaming variant of validation_prompt: yields the answer in pieces as the model generates them, so the
+        first tokens reach the user long before the completion finishes. The full answer is cached once the
+        stream completes; a cached answer is yielded in one piece.
+        """
+        system_content, user_content = self.prompt_contents(question, annotator_steps)
+
+        key = cache_key(model, system_content, user_content, imageurl)
+        if use_cache:
+            cached_response = await self.response_cache.get(key)
+            if cached_response is not None:
+                logging_module.log_success(f"Response served from the LLM response cache: {key}")
+                yield cached_response
+                return
 
-            file_assistant = self.client.beta.assistants.create(
-                instructions=self.assistant_instruction + system_content,
+        try:
+            logging_module.log_success("Sending prompt to OpenAI", model=model.lower(),
+                                       payload={"system_content": system_content, "user_content": user_content})
+
+            start = time.perf_counter()
+            stream = await self.client.chat.completions.create(
                 model=model.lower(),
-                tools=[{"type": "file_search"}],
+                messages=self.build_messages(system_content, user_content, imageurl),
+                stream=True
             )
 
-            logging_module.log_success(f"Assistant created with ID: {file_assistant.id}")
+            parts = []
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    if not parts:
+                        OPENAI_LATENCY.labels(model.lower(), "chat_stream_first_token").observe(time.perf_counter() - start)
+                    parts.append(chunk.choices[0].delta.content)
+                    yield chunk.choices[0].delta.content
+
+            OPENAI_LATENCY.labels(model.lower(), "chat_stream").observe(time.perf_counter() - start)
+            response = "".join(parts)
+            logging_module.log_success("Response streamed", payload={"response": response})
+
+            # Only complete answers are cached; a stream cut short by an error never is
+            if response:
+                await self.response_cache.set(key, model.lower(), response)
+
+        except openai.BadRequestError as e:
+            logging_module.log_error(f"Error: {e}")
+            yield f"Error-BDIA: {e}"
+        except openai.APIError as e:
+            logging_module.log_error(f"Error: {e}")
+            yield f"Error-BDIA: {e}"
+        except Exception as e:
+            logging_module.log_error(f"An unexpected error occurred: {str(e)}")
+            yield f"Error-BDIA: {e}"
+        
+    async def get_assistant(self, model: str, instructions: str) -> str:
+        """
+        Returns the ID of the file search assistant for a (model, instructions) pair, creating it on first use.
+        Assistants are kept for the lifetime of the client and deleted on close().
+        """
+        key = (model.lower(), hashlib.sha256(instructions.encode("utf-8")).hexdigest())
+        async with self._assistant_lock:
+            if key not in self._assistants:
+                assistant = await self.client.beta.assistants.create(
+                    instructions=instructions,
+                    model=model.lower(),
+                    tools=[{"type": "file_search"}],
+                )
+                self._assistants[key] = assistant.id
+                logging_module.log_success(f"Assistant created with ID: {assistant.id}")
+        return self._assistants[key]
+
+    async def get_vector_store(self, file_path: str) -> str:
+        """
+        Returns the ID of a vector store indexing the file, uploading and indexing it only if no store for the same
+        file content exists yet. Stores unused for OPENAI_FILE_CACHE_TTL seconds are deleted along with their file.
+        """
+        await self.expire_uploads()
+        digest = await asyncio.to_thread(file_digest, file_path)
 
-            query_file = self.client.files.create(file=open(file_path, "rb"), purpose="assistants")
+        lock = self._upload_locks.setdefault(digest, asyncio.Lock())
+        async with lock:
+            upload = self._uploads.get(digest)
+            if upload is None:
+                with open(file_path, "rb") as upload_file, span("openai", "file_upload"):
+                    query_file = await self.client.files.create(file=upload_file, purpose="assistants")
+                logging_module.log_success(f"File stored with ID: {query_file.id}")
 
-            logging_module.log_success(f"File stored with ID: {query_file.id}")
+                upload = {"file_id": query_file.id, "vector_store_id": None}
+                try:
+                    # The server-side expiry removes stores this process never got to clean up (e.g. after a crash)
+                    vector_store = await self.client.beta.vector_stores.create(
+                        name=f"bdia-{digest[:16]}",
+                        expires_after={"anchor": "last_active_at", "days": max(1, math.ceil(OPENAI_FILE_CACHE_TTL / 86400))}
+                    )
+                    upload["vector_store_id"] = vector_store.id
+                    with span("openai", "file_index"):
+                        indexed = await self.client.beta.vector_stores.files.create_and_poll(
+                            file_id=query_file.id, vector_store_id=vector_store.id
+                        )
+                    if indexed.status != "completed":
+                        raise RuntimeError(f"Indexing file {query_file.id} failed: {indexed.last_error}")
+                except BaseException:
+                    # Files have no server-side expiry, so one that is not cached must be deleted right away
+                    await self.delete_upload(upload)
+                    self._upload_locks.pop(digest, None)
+                    raise
 
-            empty_thread = self.client.beta.threads.create()
+                self._uploads[digest] = upload
+                self._upload_locks.setdefault(digest, lock)  # In case a failed attempt dropped it meanwhile
+                logging_module.log_success(f"Vector store {vector_store.id} created for file {query_file.id}")
 
-            logging_module.log_success(f"Thread created with ID: {query_file.id}")
+            upload["last_used"] = time.monotonic()
+            return upload["vector_store_id"]
 
-            self.client.beta.threads.messages.create(
-                empty_thread.id,
-                role="user",
-                content=user_content,
-                attachments=[{"file_id": query_file.id, "tools": [{"type": "file_search"}]}]
-            )
+    def forget_vector_store(self, vector_store_id: str) -> None:
+        """
+        Drops a vector store from the upload cache, e.g. after it expired on the server.
+        """
+        for digest, upload in list(self._uploads.items()):
+            if upload["vector_store_id"] == vector_store_id:
+                del self._uploads[digest]
 
-            logging_module.log_success(f"Message created in thread {empty_thread.id} with file {query_file.id}")
+    async def expire_uploads(self) -> None:
+        """
+        Deletes the uploaded files and vector stores that have not been used within OPENAI_FILE_CACHE_TTL seconds.
+        """
+        now = time.monotonic()
+        for digest, upload in list(self._uploads.items()):
+            lock = self._upload_locks.get(digest)
+            if now - upload["last_used"] > OPENAI_FILE_CACHE_TTL and not (lock and lock.locked()):
+                del self._uploads[digest]
+                self._upload_locks.pop(digest, None)
+                await self.delete_upload(upload)
 
-            run = self.client.beta.threads.runs.create_and_poll(
-                thread_id=empty_thread.id,
-                assistant_id=file_assistant.id,
-                max_prompt_tokens=30000
-            )
+    async def delete_upload(self, upload: dict) -> None:
+        # The file is deleted even if its vector store was never created or cannot be deleted
+        if upload.get("vector_store_id"):
+            try:
+                await self.client.beta.vector_stores.delete(upload["vector_store_id"])
+                logging_module.log_success(f"Vector store with {upload['vector_store_id']} deleted successfully")
+            except Exception as e:
+                logging_module.log_error(f"Error occurred while deleting vector store {upload['vector_store_id']}: {e}")
+
+        try:
+            await self.client.files.delete(upload["file_id"])
+            logging_module.log_success(f"File with {upload['file_id']} deleted successfully")
+        except Exception as e:
+            logging_module.log_error(f"Error occurred while deleting uploaded file {upload['file_id']}: {e}")
+
+    async def file_validation_prompt(self, file_path: str, question: str, model: str) -> str:
+        user_content = self.format_content(question)
+        system_content = self.val_system_content
+        try:
 
-            logging_module.log_success(f"Run executed with ID: {run.id}")
+            logging_module.log_success("Sending prompt to OpenAI", model=model.lower(),
+                                       payload={"system_content": system_content, "user_content": user_content})
 
-            if run.status == 'completed':
-                messages = self.client.beta.threads.messages.list(
-                    thread_id=run.thread_id
-                )
+            # The assistant and the indexed file are reused across questions; only the thread is per question
+            assistant_id = await self.get_assistant(model, self.assistant_instruction + system_content)
+            vector_store_id = await self.get_vector_store(file_path)
+
+            try:
+                query_thread = await self.create_file_thread(user_content, vector_store_id)
+            except openai.NotFoundError:
+                # The vector store expired on the server, index the file again
+                self.forget_vector_store(vector_store_id)
+                vector_store_id = await self.get_vector_store(file_path)
+                query_thread = await self.create_file_thread(user_content, vector_store_id)
+
+            logging_module.log_success(f"Thread created with ID: {query_thread.id}")
+
+            try:
+                with openai_span(model, "file_search_run"):
+                    run = await self.client.beta.threads.runs.create_and_poll(
+                        thread_id=query_thread.id,
+                        assistant_id=assistant_id,
+                        max_prompt_tokens=30000
+                    )
 
-                logging_module.log_success(f"Response: {messages.data[0].content[0].text.value}")
+                logging_module.log_success(f"Run executed with ID: {run.id}")
 
-                self.cleanup_resources(file_assistant.id, query_file.id, empty_thread.id)
+                if run.status == 'completed':
+                    messages = await self.client.beta.threads.messages.list(
+                        thread_id=run.thread_id
+                    )
 
-                return messages.data[0].content[0].text.value
-            else:
-                logging_module.log_error(f"Run Status: {run.status}")
-                logging_module.log_error(f"Run Status: {run.last_error}")
-                return None
+                    logging_module.log_success("Response received", payload={"response": messages.data[0].content[0].text.value})
+
+                    return messages.data[0].content[0].text.value
+                else:
+                    logging_module.log_error(f"Run Status: {run.status}")
+                    logging_module.log_error(f"Run Status: {run.last_error}")
+                    return None
+            finally:
+                await self.cleanup_thread(query_thread.id)
             
         except openai.BadRequestError as e:
             logging_module.log_error(f"Error: {e}")
@@ -157,19 +369,50 @@ file that is uploaded in the thread. """
         except Exception as e:
             logging_module.log_error(f"An unexpected error occurred: {str(e)}")
             return f"Error-BDIA: {e}"
+
+    async def create_file_thread(self, user_content: str, vector_store_id: str):
+        return await self.client.beta.threads.create(
+            messages=[{"role": "user", "content": user_content}],
+            tool_resources={"file_search": {"vector_store_ids": [vector_store_id]}}
+        )
     
-    def cleanup_resources(self, assistant_id: str, file_id: str, thread_id: str) -> None:
+    async def cleanup_thread(self, thread_id: str) -> None:
         try:
-            # Delete the assistant
-            self.client.beta.assistants.delete(assistant_id)
-            logging_module.log_success(f"Assistant with {assistant_id} deleted successfully")
+            await self.client.beta.threads.delete(thread_id)
+            logging_module.log_success(f"Thread with {thread_id} deleted successfully")
+        except Exception as e:
+            logging_module.log_error(f"Error occurred while cleaning up thread {thread_id}: {e}")
 
-            # Delete the file
-            self.client.files.delete(file_id)
-            logging_module.log_success(f"Assistant with {file_id} deleted successfully")
+    async def close(self) -> None:
+        """
+        Deletes the cached assistants, files and vector stores and closes the underlying HTTP connection pool.
+        """
+        for assistant_id in self._assistants.values():
+            try:
+                await self.client.beta.assistants.delete(assistant_id)
+                logging_module.log_success(f"Assistant with {assistant_id} deleted successfully")
+            except Exception as e:
+                logging_module.log_error(f"Error occurred while deleting assistant {assistant_id}: {e}")
+        self._assistants.clear()
 
-            # Delete the thread
-            self.client.beta.threads.delete(thread_id)
-            logging_module.log_success(f"Assistant with {thread_id} deleted successfully")
-        except Exception as e:
-            logging_module.log_error(f"Error occurred while cleaning up resources!")
\ No newline at end of file
+        for upload in self._uploads.values():
+            await self.delete_upload(upload)
+        self._uploads.clear()
+
+        await self.client.close()
+
+def file_digest(file_path: str) -> str:
+    """
+    Returns the SHA-256 hash of a file's content.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def get_openai_client(request: Request) -> OpenAIClient:
+    """
+    FastAPI dependency returning the application-wide OpenAIClient created at startup.
+    """
+    return request.app.state.openai_client
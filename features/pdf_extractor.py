@@ -2,11 +2,12 @@ import streamlit as st
 import os
 import json
 from utils.session_helpers import declare_session_state, buttons_reset, buttons_set
-from utils.api_helpers import fetch_questions, fetch_download_url, fetch_openai_response
-from utils.validators import answer_validation_check, extract_json_contents, extract_txt_contents, num_tokens_from_string
+from utils.api_helpers import fetch_questions, fetch_download_url, stream_openai_response
+from utils.validators import answer_validation_check, extract_json_contents, extract_txt_contents, num_tokens_from_string, stored_num_tokens
+from utils.retrieval import RETRIEVAL_TOKEN_BUDGET, retrieve_context
 from project_logging import logging_module
 import time
-from parameter_config import FAST_API_DEV_URL
+from parameter_config import settings
 
 @st.fragment
 def download_fragment(file_name: str) -> None:
@@ -31,11 +32,10 @@ def user_validation_buttons(data, question_selected, validate_answer, model_chos
         # Handle insert into db here
         pass
         
-def handle_file_processing(question_selected, dataframe, headers):
-    loaded_file = fetch_download_url(FAST_API_DEV_URL, question_selected, dataframe, headers)
+def handle_file_processing(task_id, headers):
+    loaded_file = fetch_download_url(settings.FAST_API_DEV_URL, task_id, headers)
     if loaded_file:
         download_fragment(loaded_file["path"])
-        os.remove(loaded_file["path"])
 
 def handle_wrong_answer_flow(data_frame, question_selected, validate_answer, model, headers, question_contents):
     steps = data_frame[data_frame['Question'] == question_selected]['Annotator_Metadata'].iloc[0]
@@ -55,12 +55,11 @@ def handle_wrong_answer_flow(data_frame, question_selected, validate_answer, mod
             "model": model,
             "annotated_steps": st.session_state.steps_text,
         }
-        ann_ai_response = fetch_openai_response(FAST_API_DEV_URL, payload, headers)
+        st.write("**LLM Response**:")
+        ann_ai_response = st.write_stream(stream_openai_response(settings.FAST_API_DEV_URL, payload, headers))
 
-        if ann_ai_response:
-            st.write(f"**LLM Response**: {ann_ai_response}")
-        else:
-            st.write("**LLM Response**: No response generated by the LLM")
+        if not ann_ai_response:
+            st.write("No response generated by the LLM")
 
         answer_check = answer_validation_check(ann_ai_response, validate_answer)
         if answer_check == 1:
@@ -76,7 +75,7 @@ def pdf_extractor():
     st.title(f":wave: Hello, {st.session_state.first_name}")
 
     headers = {"Authorization": f"Bearer {st.session_state.token}"}
-    data = fetch_questions(FAST_API_DEV_URL, headers)
+    data = fetch_questions(settings.FAST_API_DEV_URL, headers)
 
     if data is not None:
         with st.sidebar:
@@ -101,14 +100,16 @@ def pdf_extractor():
         if question_selected:
             try:
                 st.text_area("**Selected Question**:", question_selected)
-                validate_answer = data[data['Question'] == question_selected]['final_answer'].iloc[0]
+                selected_row = data[data['Question'] == question_selected].iloc[0]
+                task_id = selected_row['task_id']
+                validate_answer = selected_row['final_answer']
                 if validate_answer == '?':
                     st.write("**No answer provided for this question**")
                     validate_answer = None
                 else:
                     st.text_input("**Selected Question Answer is:**", validate_answer)
 
-                handle_file_processing(question_selected, data, headers)
+                handle_file_processing(task_id, headers)
 
                 model_chosen = st.selectbox("**Model**",
                                             options=model_options,
@@ -130,17 +131,29 @@ def pdf_extractor():
                     buttons_reset("incorrect_response_clicked", "correct_response_clicked")
 
                     if st.session_state.unstructured_ask_gpt_clicked:
-                        loaded_file = fetch_download_url(FAST_API_DEV_URL, question_selected, data, headers, 'U')
+                        extraction_method = 'U'
+                        loaded_file = fetch_download_url(settings.FAST_API_DEV_URL, task_id, headers, 'U')
                         file_contents = extract_json_contents(loaded_file["path"])
                     else:
-                        loaded_file = fetch_download_url(FAST_API_DEV_URL, question_selected, data, headers, 'P')
+                        extraction_method = 'P'
+                        loaded_file = fetch_download_url(settings.FAST_API_DEV_URL, task_id, headers, 'P')
                         file_contents = extract_txt_contents(loaded_file["path"])
                     
+                    # Large documents are cut down to the chunks most relevant to the question. The token count
+                    # is precomputed at ingestion; documents not counted yet are tokenized here.
+                    num_tokens = stored_num_tokens(selected_row, extraction_method, model_chosen.lower())
+                    if num_tokens is None:
+                        num_tokens = num_tokens_from_string(file_contents, model_chosen.lower())
+                    if num_tokens > RETRIEVAL_TOKEN_BUDGET:
+                        file_contents = retrieve_context(question_selected, file_contents, model_chosen.lower())
+                        if file_contents:
+                            st.info(f"The document has {num_tokens} tokens, over the {RETRIEVAL_TOKEN_BUDGET} token "
+                                    "budget: only the passages most relevant to the question are sent to GPT.")
+
                     question_contents = question_selected + 'Context:```' + file_contents + "```"
 
-                    num_tokens = num_tokens_from_string(question_contents, model_chosen.lower())
-                    
-                    if num_tokens > 60000:
+                    if not file_contents:
+                        # Nothing in the document matched the question, fall back to file search
                         payload = {
                             "question_selected": question_selected,
                             "model": model_chosen,
@@ -153,11 +166,11 @@ def pdf_extractor():
                             "model": model_chosen
                         }
                     
-                    ai_response = fetch_openai_response(FAST_API_DEV_URL, payload, headers)
-                    os.remove(loaded_file["path"])
+                    # Render the answer as it streams in instead of waiting for the full completion
+                    st.write("**LLM Response:**")
+                    ai_response = st.write_stream(stream_openai_response(settings.FAST_API_DEV_URL, payload, headers))
 
                     if ai_response:
-                        st.write(f"**LLM Response:** {ai_response}")
                         answer_check = answer_validation_check(ai_response, validate_answer)
                         if answer_check == 1:
                             st.error("Sorry, GPT predicted the wrong answer. Do you need the steps?")
@@ -1,40 +1,113 @@
-import boto3
-
-# Define the parameter names to be retrieved
-parameter_names = [
-    'ACCESS_KEY_ID_AWS',
-    'SECRET_ACCESS_KEY_AWS',
-    'RDS_HOST_AWS',
-    'RDS_USERNAME_AWS',
-    'RDS_PASSWORD_AWS',
-    'RDS_DB_PORT_AWS',
-    'RDS_DATABASE_AWS',
-    'OPENAI_API_KEY',
-    'SECRET_KEY',
-    'FASTAPI_DEV_URL'
-]
-
-# Create an SSM client
-ssm_client = boto3.client('ssm', region_name='us-east-1')  # Replace 'your-region' with your AWS region
-
-# Retrieve parameters from AWS SSM Parameter Store
-response = ssm_client.get_parameters(
-    Names=parameter_names,
-    WithDecryption=True  # Ensure secure strings are decrypted
-)
-
-# Extract parameters from the response
-parameters = response.get('Parameters', [])
-parameters_dict = {param['Name']: param['Value'] for param in parameters}
-
-# Store the values in variables
-ACCESS_KEY_ID_AWS = parameters_dict.get('ACCESS_KEY_ID_AWS')
-SECRET_ACCESS_KEY_AWS = parameters_dict.get('SECRET_ACCESS_KEY_AWS')
-RDS_HOST_AWS = parameters_dict.get('RDS_HOST_AWS')
-RDS_USERNAME_AWS = parameters_dict.get('RDS_USERNAME_AWS')
-RDS_PASSWORD_AWS = parameters_dict.get('RDS_PASSWORD_AWS')
-RDS_DB_PORT_AWS = parameters_dict.get('RDS_DB_PORT_AWS')
-RDS_DATABASE_AWS = parameters_dict.get('RDS_DATABASE_AWS')
-OPENAI_API_KEY = parameters_dict.get('OPENAI_API_KEY')
-SECRET_KEY = parameters_dict.get('SECRET_KEY')
-FAST_API_DEV_URL = parameters_dict.get('FASTAPI_DEV_URL')
\ No newline at end of file
+# This script provides the project's configuration parameters through a lazily loaded `settings` object.
+# Nothing is fetched at import time: a parameter is resolved on first access, from the environment variable of the
+# same name if set, otherwise from a local cache file (readable by the owner only, refreshed after a TTL),
+# and only then from AWS SSM Parameter Store. All parameters are fetched from SSM in one call, at most once per
+# process, and written to the cache file so other processes and restarts skip the network round trip.
+
+import os
+import json
+import time
+import tempfile
+import threading
+
+# Setting attribute -> SSM parameter name (also the name of the overriding environment variable)
+PARAMETER_NAMES = {
+    'ACCESS_KEY_ID_AWS': 'ACCESS_KEY_ID_AWS',
+    'SECRET_ACCESS_KEY_AWS': 'SECRET_ACCESS_KEY_AWS',
+    'RDS_HOST_AWS': 'RDS_HOST_AWS',
+    'RDS_USERNAME_AWS': 'RDS_USERNAME_AWS',
+    'RDS_PASSWORD_AWS': 'RDS_PASSWORD_AWS',
+    'RDS_DB_PORT_AWS': 'RDS_DB_PORT_AWS',
+    'RDS_DATABASE_AWS': 'RDS_DATABASE_AWS',
+    'OPENAI_API_KEY': 'OPENAI_API_KEY',
+    'SECRET_KEY': 'SECRET_KEY',
+    'FAST_API_DEV_URL': 'FASTAPI_DEV_URL',
+}
+
+SSM_REGION = os.getenv("SSM_REGION", "us-east-1")
+PARAMETER_CACHE_FILE = os.getenv("PARAMETER_CACHE_FILE", os.path.expanduser("~/.cache/bigdatateam7/parameters.json"))
+PARAMETER_CACHE_TTL = float(os.getenv("PARAMETER_CACHE_TTL", 3600))  # Seconds before the cache file is refreshed from SSM
+
+class LazySettings:
+    """
+    Resolves parameters on first access: environment variable, then the owner-only cache file, then SSM.
+    """
+
+    def __init__(self, parameter_names: dict, cache_file: str = PARAMETER_CACHE_FILE, ttl: float = PARAMETER_CACHE_TTL):
+        self._parameter_names = parameter_names
+        self._cache_file = cache_file
+        self._ttl = ttl
+        self._values = None
+        self._lock = threading.Lock()
+
+    def __getattr__(self, attribute: str) -> str:
+        if attribute.startswith('_') or attribute not in self._parameter_names:
+            raise AttributeError(attribute)
+        return self.get(self._parameter_names[attribute])
+
+    def get(self, name: str) -> str:
+        """
+        Returns the value of a parameter by its SSM name, or None if it is not defined anywhere.
+        """
+        value = os.environ.get(name)
+        if value is not None:
+            return value
+        return self._parameters().get(name)
+
+    def _parameters(self) -> dict:
+        if self._values is None:
+            with self._lock:
+                if self._values is None:
+                    values = self._read_cache()
+                    if values is None:
+                        values = self._fetch()
+                        self._write_cache(values)
+                    self._values = values
+        return self._values
+
+    def _read_cache(self) -> dict:
+        try:
+            stat = os.stat(self._cache_file)
+            # Ignore stale caches and caches other users could have read or tampered with
+            if time.time() - stat.st_mtime > self._ttl or stat.st_mode & 0o077 or stat.st_uid != os.getuid():
+                return None
+            with open(self._cache_file) as cache:
+                values = json.load(cache)
+            return values if set(self._parameter_names.values()) <= set(values) else None
+        except (OSError, ValueError):
+            return None
+
+    def _write_cache(self, values: dict) -> None:
+        try:
+            directory = os.path.dirname(self._cache_file)
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.parameters', suffix='.tmp')  # Created with mode 0600
+            with os.fdopen(fd, 'w') as cache:
+                json.dump(values, cache)
+            os.replace(temp_path, self._cache_file)
+        except OSError:
+            pass  # The cache is an optimization; the values are still used from memory
+
+    def _fetch(self) -> dict:
+        import boto3  # Only needed when a parameter is not set in the environment or the cache
+
+        # Retrieve parameters from AWS SSM Parameter Store, in batches of the API limit of 10 names
+        ssm_client = boto3.client('ssm', region_name=SSM_REGION)
+        names = list(self._parameter_names.values())
+        values = {name: None for name in names}
+        for i in range(0, len(names), 10):
+            response = ssm_client.get_parameters(
+                Names=names[i:i + 10],
+                WithDecryption=True  # Ensure secure strings are decrypted
+            )
+            values.update({param['Name']: param['Value'] for param in response.get('Parameters', [])})
+        return values
+
+settings = LazySettings(PARAMETER_NAMES)
+
+def __getattr__(name: str) -> str:
+    # Keeps `from parameter_config import OPENAI_API_KEY` working; this resolves the parameter at import time,
+    # so prefer reading `settings.OPENAI_API_KEY` where it is used
+    if name in PARAMETER_NAMES:
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,34 +1,120 @@
-# This Python script configures a basic logging mechanism for the project. It sets up logging to write messages
-# to a log file ('bigdatateam7.log') with a specific format and log level. The script provides two utility functions,
-# 'log_success' and 'log_error,' to log success messages at the INFO level and error messages at the ERROR level, respectively.
+# This Python script configures the logging mechanism for the project. Log calls only put records on an in-memory
+# queue (QueueHandler); a background thread (QueueListener) formats them as JSON lines and writes them to a
+# size-rotated log file, so logging adds no disk I/O to the request path. Each program writes its own file
+# ('bigdatateam7-uvicorn.log', 'bigdatateam7-streamlit.log', ...) because a rotating file cannot be shared by
+# processes: after one of them rotates it, the others would keep writing to the renamed file.
+# Every record carries the ID of the request it was logged from (see request_id_var) and any structured fields
+# passed by the caller, such as durations. Large payloads (prompts, LLM responses) are passed separately so they
+# can be sampled and truncated instead of being formatted into every message.
+# The script provides two utility functions, 'log_success' and 'log_error,' to log success messages at the INFO
+# level and error messages at the ERROR level, respectively.
 
+import os
+import sys
+import json
+import queue
+import atexit
+import random
 import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Configure the logging
-logging.basicConfig(
-    filename='bigdatateam7.log',  # Name of the log file
-    level=logging.INFO,      # Set the logging level to INFO
-    format='%(asctime)s - %(levelname)s - %(message)s',  # Log format
-    filemode='w'             # Overwrite the log file each run; use 'a' to append
-)
+# Name of the running program (e.g. 'uvicorn', 'streamlit'), 'python' for interactive sessions and `python -c`
+_PROGRAM = os.path.splitext(os.path.basename(sys.argv[0] if sys.argv else ""))[0]
+_PROGRAM = _PROGRAM if _PROGRAM and not _PROGRAM.startswith("-") else "python"
+LOG_FILE = os.getenv("LOG_FILE", f"bigdatateam7-{_PROGRAM}.log")          # Set a distinct file per process
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))         # Size at which the log file is rotated
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))                   # Rotated files kept
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", 1.0))  # Share of records whose payload is kept
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", 1000))      # Payload fields are truncated to this length
+
+# ID of the request being handled, set by the API middleware; '-' outside of a request
+request_id_var = contextvars.ContextVar("request_id", default="-")
+
+class RequestIdFilter(logging.Filter):
+    """Stamps each record with the current request ID. Runs in the calling thread, before the record is queued."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, truncating payload fields to LOG_PAYLOAD_MAX_CHARS."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        for name, value in (getattr(record, "payload", None) or {}).items():
+            value = str(value)
+            if len(value) > LOG_PAYLOAD_MAX_CHARS:
+                value = f"{value[:LOG_PAYLOAD_MAX_CHARS]}... [{len(value) - LOG_PAYLOAD_MAX_CHARS} more chars]"
+            entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+class RecordQueueHandler(QueueHandler):
+    """
+    Queues records as they are. The default prepare() formats the message and drops exc_info, which would
+    flatten tracebacks into the message before JsonFormatter sees them.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+def _configure_logging() -> QueueListener:
+    file_handler = RotatingFileHandler(LOG_FILE, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+
+    queue_handler = RecordQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(queue_handler)
+
+    listener = QueueListener(queue_handler.queue, file_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Flush the queued records on shutdown
+    return listener
+
+_listener = _configure_logging()
 
 # Creating logger objects for success and error
 logger = logging.getLogger()
 
-def log_success(message: str) -> None:
+def _extra(payload: dict, fields: dict) -> dict:
+    # Payloads are dropped up front for unsampled records so they are never formatted
+    if payload and random.random() >= LOG_PAYLOAD_SAMPLE_RATE:
+        payload = None
+    return {"fields": fields, "payload": payload}
+
+def log_success(message: str, payload: dict = None, **fields) -> None:
     """
     Logs a success message for project events at the INFO level.
 
     Args:
         message (str): The success message to be logged.
+        payload (dict, optional): Large text fields (e.g. prompts, responses), sampled and truncated.
+        **fields: Structured fields added to the record as is (e.g. duration_ms).
     """
-    logger.info(message)  # Logging success messages at INFO level
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(message, extra=_extra(payload, fields))  # Logging success messages at INFO level
 
-def log_error(message: str) -> None:
+def log_error(message: str, payload: dict = None, **fields) -> None:
     """
     Logs an error message for project events at the ERROR level.
 
     Args:
         message (str): The error message to be logged.
+        payload (dict, optional): Large text fields (e.g. prompts, responses), sampled and truncated.
+        **fields: Structured fields added to the record as is (e.g. duration_ms).
     """
-    logger.error(message)  # Logging error messages at ERROR level
\ No newline at end of file
+    logger.error(message, extra=_extra(payload, fields))  # Logging error messages at ERROR level
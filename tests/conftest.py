@@ -0,0 +1,11 @@
+# Shared pytest setup: makes the API and app modules (repo root) and the pipeline modules (airflow/dags)
+# importable the way each of them is run, and keeps the code under test from writing a log file.
+#
+#     python -m pytest -q tests
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [REPO_ROOT, os.path.join(REPO_ROOT, "airflow", "dags")]
+os.environ.setdefault("LOG_FILE", os.devnull)
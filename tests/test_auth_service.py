@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("jwt")
+pytest.importorskip("fastapi")
+pytest.importorskip("aiomysql")
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from fast_api.services import auth_service
+
+@pytest.fixture
+def users(monkeypatch):
+    """Serves users from a dict instead of MySQL and counts the lookups."""
+    state = {"rows": {"alice": {"username": "alice", "email": "alice@example.com"}}, "lookups": 0}
+
+    async def fetch_user_from_db(username):
+        state["lookups"] += 1
+        row = state["rows"].get(username)
+        return pd.DataFrame([row]) if row else None
+
+    monkeypatch.setenv("SECRET_KEY", "dGVzdC1zZWNyZXQta2V5LW9mLTMyLWJ5dGVzLWxvbmc=")
+    monkeypatch.setattr(auth_service, "fetch_user_from_db", fetch_user_from_db)
+    monkeypatch.setattr(auth_service, "_user_cache", type(auth_service._user_cache)())
+    return state
+
+def current_user(username):
+    token, _ = auth_service.create_jwt_token({"username": username})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return asyncio.run(auth_service.get_current_user(credentials))
+
+def test_user_is_served_from_cache_within_ttl(users):
+    assert current_user("alice")["email"] == "alice@example.com"
+    assert current_user("alice")["email"] == "alice@example.com"
+    assert users["lookups"] == 1
+
+def test_expired_entry_is_looked_up_again(users, monkeypatch):
+    current_user("alice")
+    now = auth_service.time.monotonic()
+    monkeypatch.setattr(auth_service.time, "monotonic", lambda: now + auth_service.AUTH_USER_CACHE_TTL + 1)
+    current_user("alice")
+    assert users["lookups"] == 2
+
+def test_invalidated_user_is_looked_up_again(users):
+    current_user("alice")
+    users["rows"]["alice"]["email"] = "new@example.com"
+    auth_service.invalidate_cached_user("alice")
+    assert current_user("alice")["email"] == "new@example.com"
+
+def test_zero_ttl_disables_cache(users, monkeypatch):
+    monkeypatch.setattr(auth_service, "AUTH_USER_CACHE_TTL", 0)
+    current_user("alice")
+    current_user("alice")
+    assert users["lookups"] == 2
+
+def test_unknown_user_and_bad_token_are_rejected(users):
+    with pytest.raises(HTTPException) as unknown:
+        current_user("mallory")
+    assert unknown.value.status_code == 401
+
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials="not-a-token")
+    with pytest.raises(HTTPException) as invalid:
+        asyncio.run(auth_service.get_current_user(credentials))
+    assert invalid.value.status_code == 401
+    assert users["lookups"] == 1
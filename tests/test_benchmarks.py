@@ -0,0 +1,75 @@
+import os
+import sys
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+import dag_parse_benchmark
+import hot_path_benchmark
+
+def fake_dags_folder(tmp_path, dag_source: str) -> str:
+    """A DAGs folder with a minimal airflow package next to the DAG module, enough for the parse probe."""
+    for module in ("airflow/__init__.py", "airflow/models.py", "airflow/operators/__init__.py",
+                   "airflow/operators/python.py", "airflow/operators/bash.py"):
+        path = tmp_path / module
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("")
+    (tmp_path / "heavy_dependency.py").write_text("")
+    (tmp_path / f"{dag_parse_benchmark.DAG_MODULE}.py").write_text(dag_source)
+    return str(tmp_path)
+
+def test_parse_reports_heavy_modules_imported_by_the_dag_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(dag_parse_benchmark, "HEAVY_MODULES", ["heavy_dependency", "json"])
+    dags_folder = fake_dags_folder(tmp_path, "import heavy_dependency\nimport json\n")
+
+    result = dag_parse_benchmark.parse_once(dags_folder)
+    assert result["heavy"] == ["heavy_dependency"]  # json was already loaded by the probe itself
+    assert result["seconds"] >= 0
+
+def test_parse_leaves_run_time_imports_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(dag_parse_benchmark, "HEAVY_MODULES", ["heavy_dependency"])
+    dags_folder = fake_dags_folder(tmp_path, "def task():\n    import heavy_dependency\n")
+
+    summary = dag_parse_benchmark.run_benchmark(dags_folder, runs=2)
+    assert summary["runs"] == 2 and summary["heavy_modules"] == []
+    assert summary["min_seconds"] <= summary["median_seconds"] <= summary["max_seconds"]
+
+def test_pdf_extraction_dag_parses_without_task_dependencies():
+    try:
+        summary = dag_parse_benchmark.run_benchmark(runs=1)
+    except subprocess.CalledProcessError as error:
+        if "No module named 'airflow'" in error.stderr:
+            pytest.skip("Airflow is not installed")
+        raise
+    assert summary["heavy_modules"] == []
+
+
+def results(**medians) -> dict:
+    return {"benchmarks": {name: {"median_seconds": median} for name, median in medians.items()}}
+
+def test_compare_flags_slowdowns_beyond_the_tolerance():
+    baseline = dict(results(fast=1.0, slow=1.0, faster=1.0), commit="abc123")
+    comparison = hot_path_benchmark.compare(results(fast=1.1, slow=1.5, faster=0.5), baseline, tolerance=0.2)
+
+    assert comparison["baseline_commit"] == "abc123"
+    assert comparison["ratios"] == pytest.approx({"fast": 1.1, "slow": 1.5, "faster": 0.5})
+    assert comparison["regressions"] == ["slow"]
+    assert comparison["missing"] == []
+
+def test_compare_reports_baseline_benchmarks_that_no_longer_run():
+    baseline = results(**{"markdown/short_memo": 1.0, "markdown/long_paper": 1.0, "tokens/short_memo": 1.0})
+    summary = dict(results(**{"markdown/short_memo": 1.0}), filter="markdown")
+
+    # Benchmarks left out by the filter are not missing
+    assert hot_path_benchmark.compare(summary, baseline, tolerance=0.2)["missing"] == ["markdown/long_paper"]
+
+def test_corpus_pdf_converts_to_its_committed_markdown():
+    pytest.importorskip("pymupdf4llm")
+    from data_load import pdf_markdown
+    assert "boto3" not in vars(pdf_markdown) and "mysql" not in vars(pdf_markdown)
+
+    with open(hot_path_benchmark.corpus_path("short_memo", ".pdf"), "rb") as pdf_file:
+        md_text, pages = pdf_markdown.convert_pdf_to_markdown(pdf_file.read())
+    with open(hot_path_benchmark.corpus_path("short_memo", ".txt"), encoding="utf-8") as txt_file:
+        assert md_text == txt_file.read()
+    assert pages == 2
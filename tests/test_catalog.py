@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("fastapi")
+pytest.importorskip("aiomysql")
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from fast_api.routes import data_routes
+from fast_api.services import data_service
+
+@pytest.fixture
+def database(monkeypatch):
+    """Serves the catalog from a DataFrame instead of MySQL and counts the queries."""
+    state = {"df": pd.DataFrame([{"task_id": "t1", "Question": "q1"}, {"task_id": "t2", "Question": "q2"}]),
+             "queries": 0}
+
+    async def fetch_data_from_db():
+        state["queries"] += 1
+        return state["df"]
+
+    monkeypatch.setattr(data_service, "fetch_data_from_db", fetch_data_from_db)
+    data_service.invalidate_catalog_cache()
+    yield state
+    data_service.invalidate_catalog_cache()
+
+@pytest.fixture
+def client(database):
+    app = FastAPI()
+    app.include_router(data_routes.router)
+    app.dependency_overrides[data_routes.get_current_user] = lambda: {"username": "tester"}
+    with TestClient(app) as client:
+        yield client
+
+def test_catalog_is_cached_and_indexed(database):
+    async def scenario():
+        first = await data_service.get_catalog()
+        second = await data_service.get_catalog()
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first is second
+    assert database["queries"] == 1
+    assert first["index"]["t2"]["Question"] == "q2"
+
+def test_catalog_is_reloaded_after_invalidation(database):
+    asyncio.run(data_service.get_catalog())
+    data_service.invalidate_catalog_cache()
+    asyncio.run(data_service.get_catalog())
+    assert database["queries"] == 2
+
+def test_fetch_questions_answers_304_for_current_etag(client):
+    response = client.get("/fetch-questions/")
+    assert response.status_code == 200
+    assert [row["task_id"] for row in response.json()] == ["t1", "t2"]
+    etag = response.headers["ETag"]
+
+    not_modified = client.get("/fetch-questions/", headers={"If-None-Match": f'"stale", {etag}'})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == etag
+
+def test_fetch_questions_returns_new_body_once_catalog_changes(client, database):
+    etag = client.get("/fetch-questions/").headers["ETag"]
+    database["df"] = pd.DataFrame([{"task_id": "t3", "Question": "q3"}])
+    data_service.invalidate_catalog_cache()
+
+    response = client.get("/fetch-questions/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json() == [{"task_id": "t3", "Question": "q3"}]
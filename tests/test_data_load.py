@@ -0,0 +1,156 @@
+import os
+import re
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("datasets")
+pytest.importorskip("huggingface_hub")
+pytest.importorskip("boto3")
+pytest.importorskip("mysql.connector")
+from data_load import data_load
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append(("execute", " ".join(query.split()), params))
+
+    def executemany(self, query, rows):
+        self.statements.append(("executemany", " ".join(query.split()), list(rows)))
+
+class FakeConnection:
+    def __init__(self):
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+GAIA_ROWS = pd.DataFrame([
+    {"task_id": "t1", "Question": 'Say "hi"', "Level": 1, "Final answer": "hi", "file_name": "a.pdf",
+     "file_path": "/a.pdf", "Annotator Metadata": {"Steps": "1"}, "source": "validation"},
+    {"task_id": "t2", "Question": "q2", "Level": 2, "Final answer": float("nan"), "file_name": "",
+     "file_path": "", "Annotator Metadata": None, "source": "test"},
+])
+
+def test_metadata_rows_are_plain_tuples_in_column_order():
+    rows = data_load._metadata_rows(GAIA_ROWS)
+    assert rows[0] == ("t1", 'Say "hi"', 1, "hi", "a.pdf", "/a.pdf", {"Steps": "1"}, "validation")
+    assert rows[1][3] is None and rows[1][6] is None
+    assert type(rows[0][2]) is int
+
+def test_csv_fields_quote_values_and_leave_null_bare():
+    assert data_load._csv_field(None) == "NULL"
+    assert data_load._csv_field('Say "hi"') == '"Say ""hi"""'
+    assert data_load._csv_field(3) == '"3"'
+
+def test_executemany_inserts_one_batch_per_commit():
+    connection, cursor = FakeConnection(), FakeCursor()
+    rows = [(f"t{i}",) * len(data_load.METADATA_COLUMNS) for i in range(5)]
+    data_load._insert_metadata_executemany(connection, cursor, rows, batch_size=2)
+
+    assert [len(statement[2]) for statement in cursor.statements] == [2, 2, 1]
+    assert all(statement[0] == "executemany" for statement in cursor.statements)
+    assert connection.commits == 3
+
+def test_load_data_sends_one_csv_file_and_removes_it():
+    class CapturingCursor(FakeCursor):
+        def execute(self, query, params=None):
+            super().execute(query, params)
+            self.path = re.search(r"INFILE '([^']+)'", query).group(1)
+            with open(self.path, encoding="utf-8") as csv_file:
+                self.csv = csv_file.read()
+
+    connection, cursor = FakeConnection(), CapturingCursor()
+    data_load._insert_metadata_load_data(connection, cursor, [("t1", 'Say "hi"', None)])
+
+    assert cursor.csv == '"t1","Say ""hi""",NULL\n'
+    assert connection.commits == 1
+    assert not os.path.exists(cursor.path)
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None, raw=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.raw = raw
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+@pytest.fixture
+def http(monkeypatch):
+    """Answers GET requests from a list of responses (or exceptions) and records the backoff sleeps."""
+    state = {"responses": [], "sleeps": []}
+
+    class Session:
+        def get(self, url, headers=None, **kwargs):
+            response = state["responses"].pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+    monkeypatch.setattr(data_load, "_http_session", lambda: Session())
+    monkeypatch.setattr(data_load.time, "sleep", state["sleeps"].append)
+    return state
+
+def test_get_with_retry_retries_throttling_and_connection_errors(http):
+    throttled = FakeResponse(429, {"Retry-After": "2"})
+    http["responses"] = [throttled, data_load.requests.exceptions.ConnectionError("reset"), FakeResponse(200)]
+
+    assert data_load.get_with_retry("https://hf/file", {}, max_retries=3).status_code == 200
+    assert throttled.closed
+    assert http["sleeps"][0] == 2 and len(http["sleeps"]) == 2
+
+def test_get_with_retry_returns_last_response_when_retries_run_out(http):
+    http["responses"] = [FakeResponse(503), FakeResponse(503)]
+    assert data_load.get_with_retry("https://hf/file", {}, max_retries=1).status_code == 503
+    assert len(http["sleeps"]) == 1
+
+def test_client_errors_are_not_retried(http):
+    http["responses"] = [FakeResponse(404)]
+    assert data_load.get_with_retry("https://hf/file", {}, max_retries=3).status_code == 404
+    assert http["sleeps"] == []
+
+def test_s3_urls_are_written_with_one_update_per_batch():
+    connection, cursor = FakeConnection(), FakeCursor()
+    data_load._update_s3_urls_batch(connection, cursor, [("t1", "https://s3/a.pdf"), ("t2", "https://s3/b.xlsx")])
+
+    [(kind, query, params)] = cursor.statements
+    assert query.startswith("UPDATE gaia_metadata_tbl_pdf") and query.count("WHEN %s THEN %s") == 2
+    assert params == ["t1", "https://s3/a.pdf", "t2", "https://s3/b.xlsx", "t1", "t2"]
+    assert connection.commits == 1
+
+def test_transfer_streams_response_body_into_multipart_upload(http, monkeypatch):
+    monkeypatch.setenv("S3_BUCKET_NAME_AWS", "gaia-bucket")
+    # The raw stream is handed to boto3 as is, which reads it part by part
+    http["responses"] = [FakeResponse(200, raw=type("Raw", (), {"read": lambda self, n=-1: b""})())]
+    uploads = []
+
+    class S3:
+        def upload_fileobj(self, fileobj, bucket, key, Config):
+            uploads.append((fileobj, bucket, key, Config))
+
+    record = {"task_id": "t1", "file_name": " report.pdf ", "source": "validation"}
+    assert data_load._transfer_gaia_file(S3(), record, {}) == ("t1", "https://gaia-bucket.s3.amazonaws.com/gaia_files/report.pdf")
+
+    [(fileobj, bucket, key, config)] = uploads
+    assert fileobj.decode_content is True
+    assert (bucket, key) == ("gaia-bucket", "gaia_files/report.pdf")
+    assert config is data_load.STREAMING_TRANSFER_CONFIG
+    assert config.multipart_chunksize == data_load.TRANSFER_PART_SIZE
+
+def test_failed_download_is_not_uploaded(http):
+    http["responses"] = [FakeResponse(404)]
+    record = {"task_id": "t1", "file_name": "missing.pdf", "source": "test"}
+    assert data_load._transfer_gaia_file(None, record, {}) is None
@@ -0,0 +1,91 @@
+import asyncio
+import pytest
+
+pytest.importorskip("aiomysql")
+import pymysql
+from fast_api.config.db_connection import DBConnectionPool
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+    async def ping(self, reconnect=False):
+        if self.closed:
+            raise pymysql.err.InterfaceError("closed")
+
+    def get_transaction_status(self):
+        return False
+
+def make_pool(**kwargs) -> tuple:
+    opened = []
+
+    async def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    return DBConnectionPool(connect=connect, **kwargs), opened
+
+def test_reuses_idle_connection():
+    async def scenario():
+        pool, opened = make_pool(pool_size=1, max_overflow=0)
+        first = await pool.get_connection()
+        await pool.release(*first)
+        second = await pool.get_connection()
+        return first[0], second[0], opened, pool.stats()
+
+    first, second, opened, stats = asyncio.run(scenario())
+    assert first is second
+    assert len(opened) == 1
+    assert stats["checkouts"] == 2 and stats["connections_created"] == 1
+
+def test_overflow_connections_are_closed_on_release():
+    async def scenario():
+        pool, opened = make_pool(pool_size=1, max_overflow=1)
+        first = await pool.get_connection()
+        second = await pool.get_connection()
+        await pool.release(*first)
+        await pool.release(*second)
+        return opened, pool.stats()
+
+    opened, stats = asyncio.run(scenario())
+    assert len(opened) == 2
+    assert [connection.closed for connection in opened] == [False, True]
+    assert stats["open"] == 1 and stats["idle"] == 1
+
+def test_times_out_when_exhausted():
+    async def scenario():
+        pool, _ = make_pool(pool_size=1, max_overflow=0, timeout=0.05)
+        await pool.get_connection()
+        with pytest.raises(pymysql.err.OperationalError):
+            await pool.get_connection()
+        return pool.stats()
+
+    assert asyncio.run(scenario())["timeouts"] == 1
+
+def test_waiter_gets_released_connection():
+    async def scenario():
+        pool, opened = make_pool(pool_size=1, max_overflow=0, timeout=1)
+        held = await pool.get_connection()
+        waiter = asyncio.create_task(pool.get_connection())
+        await asyncio.sleep(0.01)
+        await pool.release(*held)
+        return (await waiter)[0], opened
+
+    connection, opened = asyncio.run(scenario())
+    assert connection is opened[0]
+
+def test_recycles_connections_past_their_age():
+    async def scenario():
+        pool, opened = make_pool(pool_size=1, max_overflow=0, recycle=0)
+        connection, created_at = await pool.get_connection()
+        await pool.release(connection, created_at)
+        await asyncio.sleep(0.01)
+        await pool.get_connection()
+        return opened, pool.stats()
+
+    opened, stats = asyncio.run(scenario())
+    assert len(opened) == 2 and opened[0].closed
+    assert stats["connections_recycled"] == 1
@@ -0,0 +1,92 @@
+import time
+import asyncio
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("tiktoken")
+pytest.importorskip("aiomysql")
+pytest.importorskip("httpx")
+from fast_api.services import evaluation_service
+from fast_api.services.evaluation_service import RateLimiter, StubBackend, run_evaluation, start_evaluation
+
+def test_rate_limiter_admits_burst_within_capacity():
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=1000)
+        start = time.monotonic()
+        for _ in range(3):
+            await limiter.acquire(100)
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) < 0.05
+
+def test_rate_limiter_waits_for_requests_to_refill():
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=600, tokens_per_minute=10 ** 6)  # One request per 0.1s
+        for _ in range(600):
+            await limiter.acquire(1)
+        start = time.monotonic()
+        await limiter.acquire(1)
+        return time.monotonic() - start
+
+    assert 0.05 < asyncio.run(scenario()) < 0.5
+
+def test_rate_limiter_settle_returns_unused_tokens():
+    async def scenario():
+        limiter = RateLimiter(requests_per_minute=10 ** 6, tokens_per_minute=600)  # Ten tokens per 0.1s
+        reserved = await limiter.acquire(600)
+        limiter.settle(reserved, 100)
+        start = time.monotonic()
+        await limiter.acquire(500)
+        return time.monotonic() - start
+
+    assert asyncio.run(scenario()) < 0.05
+
+ROWS = [{"task_id": f"t{i}", "Question": f"Question {i}?", "Level": 1, "final_answer": str(i)} for i in range(10)]
+
+def test_run_evaluation_scores_every_combination():
+    backend = StubBackend(accuracy=0.5, latency=0)
+    run = asyncio.run(run_evaluation(ROWS, ["gpt-4o", "gpt-4"], backend, extractors=["U", "P"], skip_documents=True))
+
+    assert len(run["results"]) == 40
+    assert all(result["error"] is None and result["correct"] is not None for result in run["results"])
+    summary = {(group["model"], group["extractor"]): group for group in run["summary"]}
+    assert set(summary) == {("gpt-4o", "U"), ("gpt-4o", "P"), ("gpt-4", "U"), ("gpt-4", "P")}
+    assert all(group["questions"] == 10 and group["scored"] == 10 for group in summary.values())
+    assert 0 < sum(group["correct"] for group in summary.values()) < 40
+
+def test_start_evaluation_rejects_concurrent_runs(monkeypatch):
+    monkeypatch.setattr(evaluation_service, "_runs", {})
+    stored = []
+
+    async def insert_evaluation_results(results):
+        stored.extend(results)
+
+    monkeypatch.setattr(evaluation_service, "insert_evaluation_results", insert_evaluation_results)
+
+    async def scenario():
+        run_id = start_evaluation(ROWS[:2], ["gpt-4o"], StubBackend(latency=0.05), extractors=["P"], skip_documents=True)
+        with pytest.raises(RuntimeError):
+            start_evaluation(ROWS[:2], ["gpt-4o"], StubBackend(), skip_documents=True)
+        await evaluation_service._runs[run_id]["task"]
+        second = start_evaluation(ROWS[:2], ["gpt-4o"], StubBackend(latency=0), extractors=["P"], skip_documents=True)
+        await evaluation_service._runs[second]["task"]
+        return evaluation_service.get_evaluation_status(run_id)
+
+    status = asyncio.run(scenario())
+    assert status["status"] == "completed" and status["summary"][0]["questions"] == 2
+    assert len(stored) == 4
+
+def test_route_refuses_openai_runs_unless_enabled(monkeypatch):
+    pytest.importorskip("fastapi")
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from fast_api.routes import evaluation_routes
+
+    monkeypatch.setattr(evaluation_routes, "EVAL_ALLOW_OPENAI", False)
+    app = FastAPI()
+    app.include_router(evaluation_routes.router)
+    app.dependency_overrides[evaluation_routes.get_current_user] = lambda: {"username": "tester"}
+    app.dependency_overrides[evaluation_routes.get_openai_client] = lambda: None
+    with TestClient(app) as client:
+        response = client.post("/run-evaluation/", json={"models": ["gpt-4o"], "stub": False})
+    assert response.status_code == 403
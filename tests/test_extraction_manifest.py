@@ -0,0 +1,42 @@
+from data_load.extraction_manifest import iter_s3_objects, pending_sources, record_extraction
+
+def source(key: str, etag: str = '"v1"', size: int = 100) -> dict:
+    return {'Key': key, 'ETag': etag, 'Size': size}
+
+def test_unchanged_source_is_skipped():
+    manifest = {}
+    record_extraction(manifest, source('gaia_files/a.pdf'), 'processed/a.txt')
+    assert pending_sources(manifest, [source('gaia_files/a.pdf')], {'processed/a.txt'}) == []
+
+def test_new_changed_and_missing_output_sources_are_pending():
+    manifest = {}
+    record_extraction(manifest, source('gaia_files/a.pdf'), 'processed/a.txt')
+    record_extraction(manifest, source('gaia_files/b.pdf'), 'processed/b.txt')
+    record_extraction(manifest, source('gaia_files/c.pdf'), 'processed/c.txt')
+    sources = [
+        source('gaia_files/a.pdf', etag='"v2"'),      # Changed content
+        source('gaia_files/b.pdf', size=101),         # Changed size
+        source('gaia_files/c.pdf'),                   # Output deleted
+        source('gaia_files/d.pdf'),                   # New
+    ]
+    output_keys = {'processed/a.txt', 'processed/b.txt'}
+    assert [obj['Key'] for obj in pending_sources(manifest, sources, output_keys)] == [obj['Key'] for obj in sources]
+
+def test_force_returns_every_source():
+    manifest = {}
+    record_extraction(manifest, source('gaia_files/a.pdf'), 'processed/a.txt')
+    assert pending_sources(manifest, [source('gaia_files/a.pdf')], {'processed/a.txt'}, force=True) == [source('gaia_files/a.pdf')]
+
+def test_iter_s3_objects_follows_pages():
+    class Paginator:
+        def paginate(self, Bucket, Prefix):
+            return [{'Contents': [source(f'{Prefix}{i}.pdf') for i in range(1000)]},
+                    {'Contents': [source(f'{Prefix}last.pdf')]}, {}]
+
+    class Client:
+        def get_paginator(self, name):
+            assert name == 'list_objects_v2'
+            return Paginator()
+
+    keys = [obj['Key'] for obj in iter_s3_objects(Client(), 'bucket', 'gaia_files/')]
+    assert len(keys) == 1001 and keys[-1] == 'gaia_files/last.pdf'
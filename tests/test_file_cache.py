@@ -0,0 +1,95 @@
+import os
+import asyncio
+import pytest
+
+httpx = pytest.importorskip("httpx")
+pytest.importorskip("prometheus_client")
+from fast_api.services import file_cache
+from fast_api.services.file_cache import FileCache
+
+class FakeS3:
+    """Serves objects by path with an ETag per content and answers If-None-Match with 304."""
+
+    def __init__(self):
+        self.objects = {}  # path -> (etag, body)
+        self.requests = []
+
+    def put(self, path, body):
+        self.objects[path] = (f'"{len(self.objects)}-{len(body)}-{body[-1]}"', body)
+
+    def etag(self, path):
+        return self.objects[path][0]
+
+    def handler(self, request):
+        self.requests.append(request)
+        etag, body = self.objects[request.url.path]
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304)
+        return httpx.Response(200, content=body, headers={"ETag": etag})
+
+@pytest.fixture
+def s3(monkeypatch):
+    server = FakeS3()
+    monkeypatch.setattr(file_cache, "_http_client", httpx.AsyncClient(transport=httpx.MockTransport(server.handler)))
+    return server
+
+def fetch(cache, path, signature="1"):
+    return asyncio.run(cache.fetch(f"https://bucket.s3.amazonaws.com{path}?X-Amz-Signature={signature}"))
+
+def test_repeat_fetch_revalidates_and_serves_from_disk(s3, tmp_path):
+    s3.put("/gaia/a.pdf", b"%PDF-a")
+    cache = FileCache(str(tmp_path))
+
+    first = fetch(cache, "/gaia/a.pdf", signature="1")
+    second = fetch(cache, "/gaia/a.pdf", signature="2")  # Re-signed URL of the same object
+
+    assert second["path"] == first["path"] and first["extension"] == ".pdf"
+    assert open(second["path"], "rb").read() == b"%PDF-a"
+    assert s3.requests[1].headers["If-None-Match"] == s3.etag("/gaia/a.pdf")
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+def test_changed_object_replaces_previous_version(s3, tmp_path):
+    s3.put("/gaia/a.pdf", b"%PDF-v1")
+    cache = FileCache(str(tmp_path), lease=0)
+    old = fetch(cache, "/gaia/a.pdf")
+    s3.put("/gaia/a.pdf", b"%PDF-v2")
+    new = fetch(cache, "/gaia/a.pdf")
+
+    assert new["path"] != old["path"]
+    assert open(new["path"], "rb").read() == b"%PDF-v2"
+    assert not os.path.exists(old["path"])
+
+def test_evicts_least_recently_used_files_over_budget(s3, tmp_path):
+    for name in "abc":
+        s3.put(f"/gaia/{name}.pdf", name.encode() * 100)
+    cache = FileCache(str(tmp_path), max_bytes=250, lease=0)
+
+    a = fetch(cache, "/gaia/a.pdf")
+    b = fetch(cache, "/gaia/b.pdf")
+    fetch(cache, "/gaia/a.pdf")  # b is now the least recently used
+    c = fetch(cache, "/gaia/c.pdf")
+
+    assert os.path.exists(a["path"]) and os.path.exists(c["path"])
+    assert not os.path.exists(b["path"])
+    assert cache.stats() == {"hits": 1, "misses": 3, "evictions": 1, "files": 2, "bytes": 200, "max_bytes": 250}
+
+def test_leased_files_are_not_evicted(s3, tmp_path):
+    for name in "ab":
+        s3.put(f"/gaia/{name}.pdf", name.encode() * 100)
+    cache = FileCache(str(tmp_path), max_bytes=150, lease=600)
+
+    a = fetch(cache, "/gaia/a.pdf")
+    b = fetch(cache, "/gaia/b.pdf")
+
+    assert os.path.exists(a["path"]) and os.path.exists(b["path"])
+    assert cache.stats()["evictions"] == 0
+
+def test_files_left_by_previous_process_count_against_budget(s3, tmp_path):
+    (tmp_path / "old.pdf").write_bytes(b"x" * 200)
+    (tmp_path / ".partial.part").write_bytes(b"x" * 200)
+    s3.put("/gaia/a.pdf", b"a" * 100)
+    cache = FileCache(str(tmp_path), max_bytes=250, lease=0)
+
+    assert cache.stats()["bytes"] == 200
+    fetch(cache, "/gaia/a.pdf")
+    assert not (tmp_path / "old.pdf").exists()
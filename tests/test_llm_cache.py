@@ -0,0 +1,77 @@
+import asyncio
+import pytest
+
+from fast_api.services import llm_cache
+from fast_api.services.llm_cache import LLMResponseCache, cache_key
+
+def test_cache_key_ignores_whitespace_and_model_case():
+    assert cache_key("GPT-4o", "system", "What  is\n2+2?") == cache_key("gpt-4o", "system", "What is 2+2?")
+    assert cache_key("gpt-4o", "system", "What is 2+2?") != cache_key("gpt-4o", "system", "What is 2+3?")
+    assert cache_key("gpt-4o", "system", "q", "https://img/1.png") != cache_key("gpt-4o", "system", "q")
+
+def test_hit_miss_and_persistence(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    cache = LLMResponseCache(path)
+
+    async def scenario():
+        missing = await cache.get("k")
+        await cache.set("k", "gpt-4o", "4")
+        return missing, await cache.get("k")
+
+    assert asyncio.run(scenario()) == (None, "4")
+    assert cache.stats() == {"hits": 1, "misses": 1, "writes": 1, "evictions": 0, "entries": 1, "hit_rate": 0.5}
+    assert asyncio.run(LLMResponseCache(path).get("k")) == "4"
+
+def test_expired_entries_are_not_served_and_get_pruned(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), ttl=60, prune_every=2)
+    now = llm_cache.time.time()
+    asyncio.run(cache.set("old", "gpt-4o", "stale"))
+
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now + 61)
+    assert asyncio.run(cache.get("old")) is None
+    asyncio.run(cache.set("new", "gpt-4o", "fresh"))  # Second write sweeps the expired entry
+    assert cache.stats()["entries"] == 1 and cache.stats()["evictions"] == 1
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    cache = LLMResponseCache(str(tmp_path / "cache.sqlite3"), max_entries=2)
+    clock = iter(range(1000, 2000))
+    monkeypatch.setattr(llm_cache.time, "time", lambda: next(clock))
+
+    async def scenario():
+        await cache.set("a", "gpt-4o", "A")
+        await cache.set("b", "gpt-4o", "B")
+        await cache.get("a")                  # b is now the least recently used
+        await cache.set("c", "gpt-4o", "C")
+        await cache.set("c", "gpt-4o", "C2")  # Overwriting does not grow the cache
+        return [await cache.get(key) for key in "abc"]
+
+    assert asyncio.run(scenario()) == ["A", None, "C2"]
+    assert cache.stats()["entries"] == 2 and cache.stats()["evictions"] == 1
+
+def test_validation_prompt_bypasses_cache_on_request(tmp_path, monkeypatch):
+    pytest.importorskip("openai")
+    from fast_api.services import openai_service
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(openai_service, "OPENAI_HTTP2", False)
+    monkeypatch.setattr(openai_service, "get_llm_response_cache",
+                        lambda: LLMResponseCache(str(tmp_path / "cache.sqlite3")))
+    client = openai_service.OpenAIClient()
+    answers = iter(["first", "second"])
+
+    async def complete(question, model, annotator_steps=None, imageurl=None):
+        return {"answer": next(answers), "prompt_tokens": 1, "completion_tokens": 1}
+
+    monkeypatch.setattr(client, "complete", complete)
+
+    async def scenario():
+        try:
+            return [await client.validation_prompt("What is 2+2?", "gpt-4o"),
+                    await client.validation_prompt("What is 2+2?", "gpt-4o"),
+                    await client.validation_prompt("What is 2+2?", "gpt-4o", use_cache=False),
+                    await client.validation_prompt("What is 2+2?", "gpt-4o")]
+        finally:
+            await client.client.close()
+
+    # The bypassed call asks the model again and refreshes the cached answer
+    assert asyncio.run(scenario()) == ["first", "first", "second", "second"]
@@ -0,0 +1,57 @@
+import json
+import queue
+import logging
+from project_logging import logging_module
+from project_logging.logging_module import JsonFormatter, RecordQueueHandler, RequestIdFilter, request_id_var
+
+def queued_record(emit) -> logging.LogRecord:
+    """Logs through a RecordQueueHandler like the app does and returns the record the listener would receive."""
+    handler = RecordQueueHandler(queue.SimpleQueue())
+    handler.addFilter(RequestIdFilter())
+    logger = logging.getLogger("tests.logging_module")
+    logger.propagate = False
+    logger.addHandler(handler)
+    try:
+        emit(logger)
+    finally:
+        logger.removeHandler(handler)
+    return handler.queue.get_nowait()
+
+def test_record_carries_request_id_fields_and_payload():
+    token = request_id_var.set("req-42")
+    try:
+        record = queued_record(lambda logger: logger.info(
+            "Response received", extra={"fields": {"duration_ms": 12.5}, "payload": {"response": "4"}}))
+    finally:
+        request_id_var.reset(token)
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["request_id"] == "req-42"
+    assert entry["level"] == "INFO" and entry["message"] == "Response received"
+    assert entry["duration_ms"] == 12.5 and entry["response"] == "4"
+
+def test_request_id_defaults_outside_requests():
+    entry = json.loads(JsonFormatter().format(queued_record(lambda logger: logger.info("startup"))))
+    assert entry["request_id"] == "-"
+
+def test_exception_traceback_survives_the_queue():
+    def emit(logger):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("Request failed")
+
+    entry = json.loads(JsonFormatter().format(queued_record(emit)))
+    assert entry["message"] == "Request failed"
+    assert "Traceback" in entry["exception"] and "ValueError: boom" in entry["exception"]
+
+def test_payload_is_truncated(monkeypatch):
+    monkeypatch.setattr(logging_module, "LOG_PAYLOAD_MAX_CHARS", 10)
+    record = queued_record(lambda logger: logger.info("prompt", extra={"payload": {"prompt": "x" * 25}}))
+    assert json.loads(JsonFormatter().format(record))["prompt"] == "x" * 10 + "... [15 more chars]"
+
+def test_unsampled_payload_is_dropped(monkeypatch):
+    monkeypatch.setattr(logging_module, "LOG_PAYLOAD_SAMPLE_RATE", 0.0)
+    assert logging_module._extra({"prompt": "x"}, {"model": "gpt-4o"}) == {"fields": {"model": "gpt-4o"}, "payload": None}
+    monkeypatch.setattr(logging_module, "LOG_PAYLOAD_SAMPLE_RATE", 1.0)
+    assert logging_module._extra({"prompt": "x"}, {})["payload"] == {"prompt": "x"}
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip("prometheus_client")
+pytest.importorskip("aiomysql")
+pytest.importorskip("pandas")
+pytest.importorskip("boto3")
+from prometheus_client import CollectorRegistry
+from fast_api.config import db_connection
+from fast_api.services import file_cache, llm_cache
+from fast_api.services.metrics import DEPENDENCY_LATENCY, StatsCollector, span
+from fast_api.services.file_cache import FileCache
+
+def scrape(monkeypatch, pool=None, files=None, responses=None) -> dict:
+    """Collects the stats metrics with the given components in place and returns {name: (type, value)}."""
+    monkeypatch.setattr(db_connection, "_pool", pool)
+    monkeypatch.setattr(file_cache, "_file_cache", files)
+    monkeypatch.setattr(llm_cache, "_llm_cache", responses)
+    registry = CollectorRegistry()
+    registry.register(StatsCollector())
+    return {metric.name: (metric.type, metric.samples[0].value) for metric in registry.collect()}
+
+def test_scrape_does_not_create_components(monkeypatch):
+    metrics = scrape(monkeypatch)
+    assert "presigned_url_cache_hits" in metrics
+    assert not [name for name in metrics if not name.startswith("presigned_url_cache_")]
+    assert db_connection._pool is None and file_cache._file_cache is None and llm_cache._llm_cache is None
+
+def test_monotonic_stats_are_counters_and_sizes_gauges(monkeypatch, tmp_path):
+    metrics = scrape(monkeypatch, pool=db_connection.DBConnectionPool(pool_size=3), files=FileCache(str(tmp_path)))
+    assert metrics["db_pool_checkouts"] == ("counter", 0)
+    assert metrics["db_pool_wait_seconds"] == ("counter", 0)
+    assert metrics["db_pool_pool_size"] == ("gauge", 3)
+    assert metrics["file_cache_evictions"][0] == "counter"
+    assert metrics["file_cache_bytes"][0] == "gauge"
+
+def test_span_records_failed_calls():
+    with pytest.raises(ValueError):
+        with span("tests", "failing"):
+            raise ValueError("boom")
+    counts = [sample.value for metric in DEPENDENCY_LATENCY.collect() for sample in metric.samples
+              if sample.name.endswith("_count") and sample.labels.get("dependency") == "tests"]
+    assert counts == [1]
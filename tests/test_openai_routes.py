@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("openai")
+pytest.importorskip("aiomysql")
+httpx = pytest.importorskip("httpx")
+from fastapi import FastAPI
+from fast_api.routes import openai_routes
+
+class SlowLLM:
+    """An OpenAIClient stand-in whose answers take a while, recording how many are in flight at once."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+
+    async def validation_prompt(self, question, model, annotated_steps=None, use_cache=True):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(self.delay)
+        self.in_flight -= 1
+        return f"answer to {question}"
+
+def make_app(llm: SlowLLM) -> FastAPI:
+    app = FastAPI()
+    app.include_router(openai_routes.router)
+    app.dependency_overrides[openai_routes.get_current_user] = lambda: {"username": "tester"}
+    app.dependency_overrides[openai_routes.get_openai_client] = lambda: llm
+    return app
+
+def test_llm_requests_are_served_concurrently_beyond_the_threadpool():
+    # 200 in-flight calls: far more than the 40 threads sync handlers would be capped at
+    llm = SlowLLM(delay=0.2)
+    transport = httpx.ASGITransport(app=make_app(llm))
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await asyncio.gather(*(
+                client.request("GET", "/fetch-openai-response/", json={"model": "gpt-4o", "question_selected": f"Q{i}"})
+                for i in range(200)))
+
+    responses = asyncio.run(scenario())
+    assert [response.json() for response in responses] == [f"answer to Q{i}" for i in range(200)]
+    assert llm.peak == 200
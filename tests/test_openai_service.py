@@ -0,0 +1,221 @@
+import re
+import json
+import types
+import asyncio
+import pytest
+
+httpx = pytest.importorskip("httpx")
+openai = pytest.importorskip("openai")
+pytest.importorskip("fastapi")
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from fast_api.services import openai_service
+from fast_api.services.llm_cache import LLMResponseCache
+
+class FakeOpenAIAPI:
+    """Answers chat completion requests like the OpenAI API and records the request bodies."""
+
+    def __init__(self):
+        self.requests = []
+        self.answer = "Paris"
+
+    def handler(self, request):
+        body = json.loads(request.content)
+        self.requests.append(body)
+        if body.get("stream"):
+            events = [{"id": "c1", "object": "chat.completion.chunk", "created": 0, "model": body["model"],
+                       "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                      for piece in re.findall(r"\s*\S+", self.answer)]
+            content = "".join(f"data: {json.dumps(event)}\n\n" for event in events) + "data: [DONE]\n\n"
+            return httpx.Response(200, content=content.encode(), headers={"content-type": "text/event-stream"})
+        return httpx.Response(200, json={
+            "id": "c1", "object": "chat.completion", "created": 0, "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": self.answer}}],
+            "usage": {"prompt_tokens": 20, "completion_tokens": 3, "total_tokens": 23},
+        })
+
+@pytest.fixture
+def api(monkeypatch, tmp_path):
+    """Routes the OpenAIClient's HTTP pool to FakeOpenAIAPI and gives it a fresh response cache."""
+    fake = FakeOpenAIAPI()
+    http_client = openai_service.DefaultAsyncHttpxClient
+
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(openai_service, "OPENAI_HTTP2", False)
+    monkeypatch.setattr(openai_service, "DefaultAsyncHttpxClient",
+                        lambda **kwargs: http_client(transport=httpx.MockTransport(fake.handler), **kwargs))
+    monkeypatch.setattr(openai_service, "get_llm_response_cache",
+                        lambda: LLMResponseCache(str(tmp_path / "cache.sqlite3")))
+    return fake
+
+def test_complete_returns_answer_and_token_usage(api):
+    async def scenario():
+        client = openai_service.OpenAIClient()
+        try:
+            return await client.complete("What is the capital of France?", "GPT-4o", imageurl="https://img/1.png")
+        finally:
+            await client.close()
+
+    assert asyncio.run(scenario()) == {"answer": "Paris", "prompt_tokens": 20, "completion_tokens": 3}
+    [request] = api.requests
+    assert request["model"] == "gpt-4o"
+    assert request["messages"][1]["content"][1]["image_url"]["url"] == "https://img/1.png"
+
+def test_one_client_is_shared_by_all_requests_and_closed_on_shutdown(api):
+    for module in ("pandas", "boto3", "aiomysql", "jwt", "tiktoken", "prometheus_client"):
+        pytest.importorskip(module)
+    from fast_api.fast_api_setup import lifespan
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/client-id")
+    def client_id(client: openai_service.OpenAIClient = Depends(openai_service.get_openai_client)):
+        return id(client)
+
+    with TestClient(app) as test_client:
+        ids = {test_client.get("/client-id").json() for _ in range(3)}
+        client = app.state.openai_client
+    assert ids == {id(client)}
+    assert client.client.is_closed()
+
+async def collect(chunks) -> list:
+    return [chunk async for chunk in chunks]
+
+def test_stream_yields_pieces_then_serves_cached_answer_whole(api):
+    api.answer = "The capital is Paris"
+
+    async def scenario():
+        client = openai_service.OpenAIClient()
+        try:
+            first = await collect(client.stream_validation_prompt("Capital of France?", "gpt-4o"))
+            second = await collect(client.stream_validation_prompt("Capital of France?", "gpt-4o"))
+            bypassed = await collect(client.stream_validation_prompt("Capital of France?", "gpt-4o", use_cache=False))
+            return first, second, bypassed
+        finally:
+            await client.close()
+
+    first, second, bypassed = asyncio.run(scenario())
+    assert first == ["The", " capital", " is", " Paris"]
+    assert second == ["The capital is Paris"]
+    assert bypassed == first
+    assert len(api.requests) == 2 and all(request["stream"] for request in api.requests)
+
+def test_streamed_answer_and_validation_prompt_share_the_cache(api):
+    async def scenario():
+        client = openai_service.OpenAIClient()
+        try:
+            streamed = "".join(await collect(client.stream_validation_prompt("Capital of France?", "gpt-4o")))
+            return streamed, await client.validation_prompt("Capital of France?", "gpt-4o")
+        finally:
+            await client.close()
+
+    assert asyncio.run(scenario()) == ("Paris", "Paris")
+    assert len(api.requests) == 1
+
+class FakeAssistantsAPI:
+    """Stands in for AsyncOpenAI's assistants, files, vector stores and threads, recording every call."""
+
+    def __init__(self):
+        self.calls = []
+        self.expired_stores = set()
+        ns = types.SimpleNamespace
+        self.files = ns(create=self._create("file"), delete=self._delete("file"))
+        self.beta = ns(
+            assistants=ns(create=self._create("assistant"), delete=self._delete("assistant")),
+            vector_stores=ns(create=self._create("vector_store"), delete=self._delete("vector_store"),
+                             files=ns(create_and_poll=self._index)),
+            threads=ns(create=self._create_thread, delete=self._delete("thread"),
+                       runs=ns(create_and_poll=self._run), messages=ns(list=self._messages)),
+        )
+
+    def count(self, call: str) -> int:
+        return sum(name == call for name, _ in self.calls)
+
+    def _create(self, kind):
+        async def create(**kwargs):
+            self.calls.append((f"create_{kind}", kwargs))
+            return types.SimpleNamespace(id=f"{kind}-{self.count(f'create_{kind}')}")
+        return create
+
+    def _delete(self, kind):
+        async def delete(resource_id):
+            self.calls.append((f"delete_{kind}", resource_id))
+        return delete
+
+    async def _index(self, file_id, vector_store_id):
+        return types.SimpleNamespace(status="completed", last_error=None)
+
+    async def _create_thread(self, messages, tool_resources):
+        store = tool_resources["file_search"]["vector_store_ids"][0]
+        if store in self.expired_stores:
+            raise openai.NotFoundError("expired", response=httpx.Response(404, request=httpx.Request("POST", "https://api")),
+                                       body=None)
+        return await self._create("thread")(store=store)
+
+    async def _run(self, thread_id, assistant_id, max_prompt_tokens):
+        return types.SimpleNamespace(id="run", status="completed", thread_id=thread_id, last_error=None)
+
+    async def _messages(self, thread_id):
+        text = types.SimpleNamespace(value=f"answer from {thread_id}")
+        return types.SimpleNamespace(data=[types.SimpleNamespace(content=[types.SimpleNamespace(text=text)])])
+
+    async def close(self):
+        self.calls.append(("close", None))
+
+@pytest.fixture
+def assistants(api, monkeypatch):
+    client = openai_service.OpenAIClient()
+    fake = FakeAssistantsAPI()
+    asyncio.run(client.client.close())
+    monkeypatch.setattr(client, "client", fake)
+    return client, fake
+
+def test_assistant_and_indexed_file_are_reused_across_questions(assistants, tmp_path):
+    client, fake = assistants
+    document = tmp_path / "report.pdf"
+    document.write_bytes(b"%PDF report")
+
+    async def scenario():
+        return [await client.file_validation_prompt(str(document), question, "gpt-4o")
+                for question in ("First?", "Second?", "Third?")]
+
+    assert asyncio.run(scenario()) == ["answer from thread-1", "answer from thread-2", "answer from thread-3"]
+    assert fake.count("create_assistant") == 1 and fake.count("create_file") == 1
+    assert fake.count("create_vector_store") == 1
+    assert fake.count("create_thread") == 3 and fake.count("delete_thread") == 3
+
+    asyncio.run(client.close())
+    assert fake.count("delete_assistant") == 1 and fake.count("delete_vector_store") == 1 and fake.count("delete_file") == 1
+
+def test_same_content_under_another_path_reuses_the_upload(assistants, tmp_path):
+    client, fake = assistants
+    for name in ("a.pdf", "b.pdf"):
+        (tmp_path / name).write_bytes(b"%PDF same")
+
+    async def scenario():
+        await client.file_validation_prompt(str(tmp_path / "a.pdf"), "Question?", "gpt-4o")
+        await client.file_validation_prompt(str(tmp_path / "b.pdf"), "Question?", "gpt-4o")
+
+    asyncio.run(scenario())
+    assert fake.count("create_file") == 1
+
+def test_expired_vector_store_is_indexed_again(assistants, tmp_path):
+    client, fake = assistants
+    document = tmp_path / "report.pdf"
+    document.write_bytes(b"%PDF report")
+
+    asyncio.run(client.file_validation_prompt(str(document), "First?", "gpt-4o"))
+    fake.expired_stores.add("vector_store-1")
+    assert asyncio.run(client.file_validation_prompt(str(document), "Second?", "gpt-4o")) == "answer from thread-2"
+    assert fake.count("create_vector_store") == 2
+
+def test_unused_uploads_expire(assistants, tmp_path, monkeypatch):
+    client, fake = assistants
+    document = tmp_path / "report.pdf"
+    document.write_bytes(b"%PDF report")
+    asyncio.run(client.file_validation_prompt(str(document), "First?", "gpt-4o"))
+
+    monkeypatch.setattr(openai_service, "OPENAI_FILE_CACHE_TTL", 0)
+    asyncio.run(client.expire_uploads())
+    assert fake.count("delete_vector_store") == 1 and fake.count("delete_file") == 1
+    assert client._uploads == {}
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import types
+import pytest
+from parameter_config import LazySettings
+
+NAMES = {'RDS_HOST_AWS': 'RDS_HOST_AWS', 'FAST_API_DEV_URL': 'FASTAPI_DEV_URL'}
+
+@pytest.fixture
+def ssm(monkeypatch):
+    """Installs a fake boto3 whose SSM client records each get_parameters call."""
+    calls = []
+
+    class Client:
+        def get_parameters(self, Names, WithDecryption):
+            calls.append(Names)
+            return {'Parameters': [{'Name': name, 'Value': f"ssm-{name}"} for name in Names]}
+
+    monkeypatch.setitem(sys.modules, 'boto3', types.SimpleNamespace(client=lambda service, region_name: Client()))
+    for name in NAMES.values():
+        monkeypatch.delenv(name, raising=False)
+    return calls
+
+def test_nothing_is_fetched_until_first_access(ssm, tmp_path):
+    LazySettings(NAMES, cache_file=str(tmp_path / "parameters.json"))
+    assert ssm == []
+
+def test_parameters_are_fetched_once_and_cached_owner_only(ssm, tmp_path):
+    cache_file = tmp_path / "cache" / "parameters.json"
+    settings = LazySettings(NAMES, cache_file=str(cache_file))
+
+    assert settings.RDS_HOST_AWS == "ssm-RDS_HOST_AWS"
+    assert settings.FAST_API_DEV_URL == "ssm-FASTAPI_DEV_URL"
+    assert len(ssm) == 1
+    assert os.stat(cache_file).st_mode & 0o777 == 0o600
+
+    # Another process reads the cache file instead of calling SSM
+    assert LazySettings(NAMES, cache_file=str(cache_file)).RDS_HOST_AWS == "ssm-RDS_HOST_AWS"
+    assert len(ssm) == 1
+
+def test_environment_overrides_without_fetching(ssm, tmp_path, monkeypatch):
+    monkeypatch.setenv("RDS_HOST_AWS", "localhost")
+    assert LazySettings(NAMES, cache_file=str(tmp_path / "parameters.json")).RDS_HOST_AWS == "localhost"
+    assert ssm == []
+
+def test_stale_or_shared_cache_is_ignored(ssm, tmp_path):
+    cache_file = tmp_path / "parameters.json"
+    LazySettings(NAMES, cache_file=str(cache_file)).RDS_HOST_AWS
+
+    old = time.time() - 120
+    os.utime(cache_file, (old, old))
+    LazySettings(NAMES, cache_file=str(cache_file), ttl=60).RDS_HOST_AWS
+    assert len(ssm) == 2
+
+    os.chmod(cache_file, 0o644)
+    LazySettings(NAMES, cache_file=str(cache_file)).RDS_HOST_AWS
+    assert len(ssm) == 3
+
+def test_unknown_attribute_raises(ssm, tmp_path):
+    with pytest.raises(AttributeError):
+        LazySettings(NAMES, cache_file=str(tmp_path / "parameters.json")).NOT_A_PARAMETER
@@ -0,0 +1,77 @@
+import os
+import io
+import json
+import pytest
+
+pytest.importorskip("pymupdf4llm")
+pytest.importorskip("pandas")
+pytest.importorskip("boto3")
+pytest.importorskip("mysql.connector")
+from data_load import pdf_extraction_open_source as open_source
+
+CORPUS_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "corpus", "short_memo.pdf")
+
+class FakeS3:
+    """An in-memory bucket with just the calls the extraction uses."""
+
+    def __init__(self, objects):
+        self.objects = dict(objects)
+        self.reads = []
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey()
+        self.reads.append(Key)
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body.encode() if isinstance(Body, str) else Body
+
+    def get_paginator(self, name):
+        s3 = self
+
+        class Paginator:
+            def paginate(self, Bucket, Prefix):
+                yield {"Contents": [{"Key": key, "ETag": f'"{len(body)}"', "Size": len(body)}
+                                    for key, body in sorted(s3.objects.items()) if key.startswith(Prefix)]}
+
+        return Paginator()
+
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+
+@pytest.fixture
+def pdf_data():
+    with open(CORPUS_PDF, "rb") as pdf_file:
+        return pdf_file.read()
+
+@pytest.fixture
+def s3(monkeypatch, pdf_data):
+    bucket = FakeS3({"gaia_files/memo.pdf": pdf_data})
+    monkeypatch.setenv("S3_BUCKET_NAME_AWS", "gaia-bucket")
+    monkeypatch.setattr(open_source, "_s3_client", bucket)
+    monkeypatch.setattr(open_source, "_create_s3_client", lambda: bucket)
+    monkeypatch.setattr(open_source, "get_db_connection", lambda: None)
+    return bucket
+
+def test_extracts_pdf_from_memory_to_txt_output(s3):
+    result = open_source.extract_pdf_to_s3("gaia_files/memo.pdf")
+
+    assert result["error"] is None and result["pages"] == 2
+    assert result["output_key"] == "open_source_processed/memo.txt"
+    assert s3.objects["open_source_processed/memo.txt"].strip()
+
+def test_unreadable_pdf_is_reported_not_raised(s3):
+    s3.objects["gaia_files/broken.pdf"] = b"not a pdf"
+    result = open_source.extract_pdf_to_s3("gaia_files/broken.pdf")
+    assert result["output_key"] is None and "markdown" in result["error"]
+
+def test_sequential_run_records_and_then_skips_extracted_pdfs(s3):
+    open_source.process_pdf_open_source(parallel=False)
+    manifest = json.loads(s3.objects["manifests/open_source_processed.json"])
+    assert manifest["gaia_files/memo.pdf"]["output_key"] == "open_source_processed/memo.txt"
+
+    s3.reads.clear()
+    open_source.process_pdf_open_source(parallel=False)
+    assert s3.reads == ["manifests/open_source_processed.json"]
@@ -0,0 +1,65 @@
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("boto3")
+pytest.importorskip("aiomysql")
+from fast_api.services import data_service
+
+URL = "https://bucket.s3.amazonaws.com/gaia_files/{}.pdf"
+
+class FakeS3Client:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        self.calls += 1
+        return f"https://signed/{Params['Key']}?expires={ExpiresIn}&n={self.calls}"
+
+@pytest.fixture
+def s3(monkeypatch):
+    client = FakeS3Client()
+    monkeypatch.setattr(data_service, "_s3_client", client)
+    monkeypatch.setattr(data_service, "_presigned_url_cache", type(data_service._presigned_url_cache)())
+    monkeypatch.setattr(data_service, "_presigned_url_stats", {"hits": 0, "misses": 0, "evictions": 0})
+    return client
+
+def test_reuses_url_for_same_object_and_expiration(s3):
+    first = data_service.generate_presigned_url(URL.format("a"))
+    assert data_service.generate_presigned_url(URL.format("a")) == first
+    assert s3.calls == 1
+    assert data_service.get_presigned_url_cache_stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+def test_expiration_and_extractor_are_part_of_the_key(s3):
+    data_service.generate_presigned_url(URL.format("a"), expiration=3600)
+    long_lived = data_service.generate_presigned_url(URL.format("a"), expiration=7200)
+    data_service.generate_presigned_url(URL.format("a"), expiration=3600, extraction_method="P")
+    assert "expires=7200" in long_lived
+    assert s3.calls == 3
+
+def test_short_lived_urls_are_never_cached(s3):
+    expiration = int(data_service.PRESIGNED_URL_MIN_TTL)
+    data_service.generate_presigned_url(URL.format("a"), expiration=expiration)
+    data_service.generate_presigned_url(URL.format("a"), expiration=expiration)
+    assert s3.calls == 2
+    assert data_service.get_presigned_url_cache_stats()["size"] == 0
+
+def test_url_near_expiry_is_signed_again(s3, monkeypatch):
+    data_service.generate_presigned_url(URL.format("a"))
+    now = data_service.time.time()
+    monkeypatch.setattr(data_service.time, "time", lambda: now + 3600 - data_service.PRESIGNED_URL_MIN_TTL + 1)
+    data_service.generate_presigned_url(URL.format("a"))
+    assert s3.calls == 2
+
+def test_least_recently_used_url_is_evicted(s3, monkeypatch):
+    monkeypatch.setattr(data_service, "PRESIGNED_URL_CACHE_SIZE", 2)
+    for name in ("a", "b"):
+        data_service.generate_presigned_url(URL.format(name))
+    data_service.generate_presigned_url(URL.format("a"))   # b is now the least recently used
+    data_service.generate_presigned_url(URL.format("c"))
+    assert s3.calls == 3
+
+    data_service.generate_presigned_url(URL.format("a"))
+    assert s3.calls == 3
+    data_service.generate_presigned_url(URL.format("b"))
+    assert s3.calls == 4
+    assert data_service.get_presigned_url_cache_stats()["evictions"] == 2
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("tiktoken")
+pytest.importorskip("pandas")
+from utils import retrieval
+from utils.retrieval import BM25Index, chunk_text, get_index, retrieve_context
+
+def test_chunk_text_keeps_lines_whole_and_splits_long_lines():
+    text = "one two three\nfour five\n\nsix seven eight nine ten eleven"
+    assert chunk_text(text, chunk_words=5) == ["one two three\nfour five", "six seven eight nine ten", "eleven"]
+
+def test_bm25_ranks_chunk_with_rare_query_terms_first():
+    index = BM25Index(["the museum opened in 1990", "the survey of the species", "the the the the"])
+    scores = index.scores("When was the museum opened?")
+    assert scores[0] > scores[1] >= 0
+    assert scores[2] < scores[0]
+    assert BM25Index([]).scores("anything") == []
+
+def test_index_is_cached_per_document():
+    text = "alpha beta\ngamma delta"
+    assert get_index(text) is get_index(text)
+    assert get_index(text + " epsilon") is not get_index(text)
+
+@pytest.fixture
+def word_tokens(monkeypatch):
+    """Counts one token per word, so the budget does not depend on a tokenizer download."""
+    monkeypatch.setattr(retrieval, "num_tokens_from_string", lambda text, model: len(text.split()))
+
+def test_retrieve_context_fits_budget_in_document_order(word_tokens):
+    # Paragraphs of 150 words, so each one becomes its own chunk
+    paragraphs = [" ".join(["filler words in particular"] * 37 + [f"paragraph{i}", "end"]) for i in range(20)]
+    paragraphs[3] = "the penguin population was counted in 2018 " + "x " * 143
+    paragraphs[15] = "penguin colonies grew in 2018 after the survey " + "y " * 142
+    text = "\n\n".join(paragraphs)
+
+    context = retrieve_context("How many penguin were counted in 2018?", text, "gpt-4o", token_budget=320)
+    parts = context.split("\n...\n")
+    assert len(parts) == 2
+    assert parts[0].startswith("the penguin population") and parts[1].startswith("penguin colonies")
+    assert sum(len(part.split()) for part in parts) <= 320
+
+def test_retrieve_context_is_empty_without_shared_terms(word_tokens):
+    assert retrieve_context("zebra?", "alpha beta\ngamma delta", "gpt-4o") == ""
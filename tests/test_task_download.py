@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("boto3")
+pytest.importorskip("aiomysql")
+from fast_api.services import data_service
+
+CATALOG = pd.DataFrame([
+    {"task_id": "t1", "Question": "q1", "s3_url": "https://gaia.s3.amazonaws.com/gaia_files/a.pdf",
+     "unstructured_api_url": "https://gaia.s3.amazonaws.com/unstructured_extract/a.pdf.json",
+     "opensource_url": "https://gaia.s3.amazonaws.com/open_source_processed/a.txt"},
+    {"task_id": "t2", "Question": "q2", "s3_url": None, "unstructured_api_url": None, "opensource_url": None},
+], dtype=object)  # NULL columns stay None, as in the DataFrame built from the fetched rows
+
+class FakeS3Client:
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://signed/{Params['Bucket']}/{Params['Key']}"
+
+@pytest.fixture(autouse=True)
+def catalog(monkeypatch):
+    state = {"queries": 0}
+
+    async def fetch_data_from_db():
+        state["queries"] += 1
+        return CATALOG
+
+    monkeypatch.setattr(data_service, "fetch_data_from_db", fetch_data_from_db)
+    monkeypatch.setattr(data_service, "_s3_client", FakeS3Client())
+    monkeypatch.setattr(data_service, "_presigned_url_cache", type(data_service._presigned_url_cache)())
+    data_service.invalidate_catalog_cache()
+    yield state
+    data_service.invalidate_catalog_cache()
+
+def test_url_is_looked_up_by_task_id_per_extraction_method(catalog):
+    async def scenario():
+        return [await data_service.generate_url_for_task("t1", method) for method in (None, "U", "P")]
+
+    assert asyncio.run(scenario()) == ["https://signed/gaia/gaia_files/a.pdf",
+                                       "https://signed/gaia/unstructured_extract/a.pdf.json",
+                                       "https://signed/gaia/open_source_processed/a.txt"]
+    assert catalog["queries"] == 1
+
+def test_unknown_task_or_task_without_file_has_no_url():
+    assert asyncio.run(data_service.generate_url_for_task("missing")) is None
+    assert asyncio.run(data_service.generate_url_for_task("t2", "P")) is None
+    assert asyncio.run(data_service.download_file_by_task_id("t2", "P")) is None
@@ -0,0 +1,53 @@
+import json
+import pytest
+
+tiktoken = pytest.importorskip("tiktoken")
+pd = pytest.importorskip("pandas")
+
+SPECIAL_TEXT = "Report text <|endoftext|> continues <|fim_prefix|> here"
+
+@pytest.fixture(scope="module")
+def encodings():
+    """The tokenizer files are downloaded on first use; skip where that is not possible."""
+    try:
+        return {name: tiktoken.get_encoding(name) for name in ("o200k_base", "cl100k_base")}
+    except Exception as e:
+        pytest.skip(f"tiktoken encodings unavailable: {e}")
+
+def test_special_token_text_is_counted_as_plain_text(encodings):
+    from utils.validators import num_tokens_from_string
+
+    count = num_tokens_from_string(SPECIAL_TEXT, "gpt-4o")
+    assert count == len(encodings["o200k_base"].encode(SPECIAL_TEXT, disallowed_special=()))
+    assert count > len(encodings["o200k_base"].encode(SPECIAL_TEXT, allowed_special="all"))
+
+def test_stored_count_matches_model_encoding(encodings):
+    from utils.validators import stored_num_tokens
+
+    row = {"opensource_tokens_o200k_base": 12, "opensource_tokens_cl100k_base": 15,
+           "unstructured_tokens_o200k_base": None}
+    assert stored_num_tokens(row, "P", "gpt-4o") == 12
+    assert stored_num_tokens(row, "P", "gpt-4") == 15
+    assert stored_num_tokens(row, "U", "gpt-4o") is None
+    assert stored_num_tokens({"opensource_tokens_o200k_base": float("nan")}, "P", "gpt-4o") is None
+
+def test_ingestion_counts_match_the_app(encodings):
+    pytest.importorskip("boto3")
+    pytest.importorskip("mysql.connector")
+    from data_load.token_counts import count_tokens
+    from utils.validators import num_tokens_from_string
+
+    assert count_tokens(SPECIAL_TEXT) == {"o200k_base": num_tokens_from_string(SPECIAL_TEXT, "gpt-4o"),
+                                          "cl100k_base": num_tokens_from_string(SPECIAL_TEXT, "gpt-4")}
+
+def test_document_text_matches_what_the_app_sends(tmp_path):
+    pytest.importorskip("boto3")
+    pytest.importorskip("mysql.connector")
+    from data_load.token_counts import document_text
+    from utils.validators import extract_json_contents, extract_txt_contents
+
+    elements = [{"type": "Title", "text": "GAIA"}]
+    (tmp_path / "doc.json").write_text(json.dumps(elements))
+    (tmp_path / "doc.txt").write_text("# GAIA\n\ntext")
+    assert document_text('unstructured_extract/', json.dumps(elements).encode()) == extract_json_contents(tmp_path / "doc.json")
+    assert document_text('open_source_processed/', b"# GAIA\n\ntext") == extract_txt_contents(tmp_path / "doc.txt")
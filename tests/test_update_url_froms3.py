@@ -0,0 +1,78 @@
+import pytest
+
+pytest.importorskip("boto3")
+pytest.importorskip("dotenv")
+pytest.importorskip("mysql.connector")
+from data_load import update_url_froms3
+
+class FakeCursor:
+    rowcount = 0
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append(" ".join(query.split()))
+
+    def executemany(self, query, rows):
+        self.statements.append(" ".join(query.split()))
+        self.staged = list(rows)
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self):
+        self.cursor_object = FakeCursor()
+        self.commits = 0
+
+    def cursor(self):
+        return self.cursor_object
+
+    def commit(self):
+        self.commits += 1
+
+    def is_connected(self):
+        return True
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def connection(monkeypatch):
+    keys = [f"open_source_processed/file{i}.txt" for i in range(1500)] + ["unstructured_extract/doc.pdf.json"]
+
+    class Paginator:
+        def paginate(self, Bucket, Prefix):
+            matching = [key for key in keys if key.startswith(Prefix)]
+            for start in range(0, len(matching), 1000):
+                yield {"Contents": [{"Key": key} for key in matching[start:start + 1000]]}
+
+    class S3:
+        def get_paginator(self, name):
+            return Paginator()
+
+    connection = FakeConnection()
+    for name, value in {"S3_BUCKET_NAME_AWS": "gaia-bucket", "ACCESS_KEY_ID_AWS": "key", "SECRET_ACCESS_KEY_AWS": "secret"}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.setattr(update_url_froms3.boto3, "client", lambda *args, **kwargs: S3())
+    monkeypatch.setattr(update_url_froms3, "get_db_connection", lambda: connection)
+    return connection
+
+def test_all_pages_are_applied_with_one_update(connection):
+    update_url_froms3.update_metadata_with_s3_urls("open_source_processed/")
+    cursor = connection.cursor_object
+
+    assert len(cursor.staged) == 1500
+    assert cursor.staged[0] == ("file0.pdf", "https://gaia-bucket.s3.amazonaws.com/open_source_processed/file0.txt")
+    updates = [statement for statement in cursor.statements if statement.startswith("UPDATE")]
+    assert updates == ["UPDATE gaia_metadata_tbl_pdf m JOIN s3_url_staging s ON m.file_name = s.file_name "
+                       "SET m.opensource_url = s.url"]
+    assert connection.commits == 1
+
+def test_unstructured_outputs_map_back_to_pdf_names(connection):
+    update_url_froms3.update_metadata_with_s3_urls("unstructured_extract/")
+    cursor = connection.cursor_object
+
+    assert cursor.staged == [("doc.pdf", "https://gaia-bucket.s3.amazonaws.com/unstructured_extract/doc.pdf.json")]
+    assert any("SET m.unstructured_api_url = s.url" in statement for statement in cursor.statements)
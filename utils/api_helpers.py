@@ -2,22 +2,33 @@ import requests
 import pandas as pd
 from project_logging import logging_module
 
+# Last question catalog received per API URL, revalidated with its ETag on every fetch
+_questions_cache = {}
+
 def fetch_questions(api_url, headers):
-    response = requests.get(f"{api_url}/data/fetch-questions/", headers=headers)
-    if response.status_code == 200:
-        return pd.DataFrame(response.json())
+    cached = _questions_cache.get(api_url)
+    request_headers = dict(headers)
+    if cached:
+        request_headers["If-None-Match"] = cached["etag"]
+
+    response = requests.get(f"{api_url}/data/fetch-questions/", headers=request_headers)
+    if response.status_code == 304 and cached:
+        return cached["data"]
+    elif response.status_code == 200:
+        data = pd.DataFrame(response.json())
+        if response.headers.get("ETag"):
+            _questions_cache[api_url] = {"etag": response.headers["ETag"], "data": data}
+        return data
     else:
         logging_module.log_error(f"Error: {response.status_code} - {response.text}")
         return None
 
-def fetch_download_url(api_url, question_selected, dataframe, headers, extraction_method = None):
-    df_json = dataframe.to_dict(orient="records")
+def fetch_download_url(api_url, task_id, headers, extraction_method = None):
     payload = {
-        "question": question_selected,
-        "df": df_json,
+        "task_id": task_id,
         "extraction_method": extraction_method
     }
-    response = requests.get(f"{api_url}/data/fetch-download-url/", json=payload, headers=headers)
+    response = requests.get(f"{api_url}/data/fetch-task-download-url/", json=payload, headers=headers)
     return response.json() if response.status_code == 200 else None
 
 def fetch_openai_response(api_url, payload, headers):
@@ -26,4 +37,15 @@ def fetch_openai_response(api_url, payload, headers):
         return response.text
     else:
         logging_module.log_error(f"Error: {response.status_code} - {response.text}")
-        return None
\ No newline at end of file
+        return None
+
+def stream_openai_response(api_url, payload, headers):
+    # Yields the answer in pieces as the API streams them, for incremental rendering with st.write_stream
+    with requests.get(f"{api_url}/openai/stream-openai-response/", json=payload, headers=headers, stream=True) as response:
+        if response.status_code != 200:
+            logging_module.log_error(f"Error: {response.status_code} - {response.text}")
+            return
+        response.encoding = response.encoding or "utf-8"
+        for chunk in response.iter_content(chunk_size=None, decode_unicode=True):
+            if chunk:
+                yield chunk
@@ -0,0 +1,121 @@
+# Local BM25 retrieval over extracted PDF contents.
+# Instead of pasting a whole document into the prompt, the extracted text is split into chunks, ranked against
+# the question with BM25 and only the best chunks that fit a token budget are sent to the model.
+# The index of each document is cached by the hash of its text, so asking several questions (or asking again
+# with annotator steps) over the same document does not re-chunk and re-index it.
+
+import os
+import re
+import math
+import hashlib
+from collections import Counter, OrderedDict
+from utils.validators import num_tokens_from_string
+
+# Max context tokens sent to the model. Defaults to the limit under which documents were always sent whole;
+# set it lower (e.g. 8000) to trade context for latency on mid-sized documents
+RETRIEVAL_TOKEN_BUDGET = int(os.getenv("RETRIEVAL_TOKEN_BUDGET", 60000))
+RETRIEVAL_CHUNK_WORDS = int(os.getenv("RETRIEVAL_CHUNK_WORDS", 200))     # Approximate size of a chunk
+RETRIEVAL_INDEX_CACHE_SIZE = 32                                           # Documents whose index is kept in memory
+
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+def tokenize(text: str) -> list:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+def chunk_text(text: str, chunk_words: int = RETRIEVAL_CHUNK_WORDS) -> list:
+    """
+    Splits text into chunks of about `chunk_words` words, keeping lines whole where possible so markdown
+    paragraphs and JSON elements are not cut in the middle.
+    """
+    chunks, current, current_words = [], [], 0
+    for line in text.splitlines():
+        words = line.split()
+        if not words:
+            continue
+        if current and current_words + len(words) > chunk_words:
+            chunks.append("\n".join(current))
+            current, current_words = [], 0
+        # Lines longer than a chunk are split on word boundaries
+        while len(words) > chunk_words:
+            chunks.append(" ".join(words[:chunk_words]))
+            words = words[chunk_words:]
+        current.append(" ".join(words))
+        current_words += len(words)
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+class BM25Index:
+    """
+    An in-memory BM25 index over the chunks of one document.
+    """
+
+    def __init__(self, chunks: list):
+        self.chunks = chunks
+        self.term_freqs = [Counter(tokenize(chunk)) for chunk in chunks]
+        self.lengths = [sum(freqs.values()) for freqs in self.term_freqs]
+        self.avg_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+        doc_freqs = Counter()
+        for freqs in self.term_freqs:
+            doc_freqs.update(freqs.keys())
+        n = len(chunks)
+        self.idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freqs.items()}
+
+    def scores(self, query: str) -> list:
+        """
+        Returns the BM25 score of every chunk for the query.
+        """
+        terms = [term for term in set(tokenize(query)) if term in self.idf]
+        scores = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.avg_length) if self.avg_length else BM25_K1
+            scores.append(sum(self.idf[term] * freqs[term] * (BM25_K1 + 1) / (freqs[term] + norm)
+                              for term in terms if term in freqs))
+        return scores
+
+# Document hash -> BM25Index, least recently used first
+_index_cache = OrderedDict()
+
+def get_index(text: str) -> BM25Index:
+    """
+    Returns the BM25 index of a document, building it only the first time the document is seen.
+    """
+    key = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    index = _index_cache.get(key)
+    if index is None:
+        index = BM25Index(chunk_text(text))
+        _index_cache[key] = index
+        if len(_index_cache) > RETRIEVAL_INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+    else:
+        _index_cache.move_to_end(key)
+    return index
+
+def retrieve_context(question: str, text: str, model: str, token_budget: int = RETRIEVAL_TOKEN_BUDGET) -> str:
+    """
+    Returns the chunks of a document most relevant to the question that together fit the token budget,
+    in document order. Returns an empty string if no chunk shares a term with the question.
+
+    Args:
+        question (str): The question being asked.
+        text (str): The extracted contents of the document.
+        model (str): The model the context is sent to, used to count tokens.
+        token_budget (int): The maximum number of context tokens.
+    """
+    index = get_index(text)
+    scores = index.scores(question)
+    ranked = sorted((i for i, score in enumerate(scores) if score > 0), key=lambda i: scores[i], reverse=True)
+
+    selected, used = [], 0
+    for i in ranked:
+        tokens = num_tokens_from_string(index.chunks[i], model)
+        if used + tokens > token_budget:
+            continue
+        selected.append(i)
+        used += tokens
+
+    return "\n...\n".join(index.chunks[i] for i in sorted(selected))
@@ -1,5 +1,10 @@
 import json
 import tiktoken
+import pandas as pd
+from functools import lru_cache
+
+# Column prefix of the token counts precomputed by the extraction DAG, per extraction method
+TOKEN_COLUMN_PREFIXES = {'U': 'unstructured_tokens', 'P': 'opensource_tokens'}
 
 def answer_validation_check(final_answer: str, validation_answer: str):
     final_answer = final_answer.strip().lower().replace('"', '')
@@ -32,8 +37,19 @@ def extract_txt_contents(file_path):
 
         return file_content
 
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> tiktoken.Encoding:
+    """Returns the tokenizer of a model, loading it only once per process."""
+    return tiktoken.encoding_for_model(model)
+
 def num_tokens_from_string(question_contents: str, model: str) -> int:
-    """Returns the number of tokens in a text string."""
-    encoding = tiktoken.encoding_for_model(model)
-    num_tokens = len(encoding.encode(question_contents))
+    """Returns the number of tokens in a text string, counting special-token text as plain text as at ingestion."""
+    encoding = get_encoding(model)
+    num_tokens = len(encoding.encode(question_contents, disallowed_special=()))
     return num_tokens
+
+def stored_num_tokens(row, extraction_method: str, model: str) -> int:
+    """Returns the token count of a question's extracted document precomputed by the extraction DAG, or None if missing."""
+    column = f"{TOKEN_COLUMN_PREFIXES[extraction_method]}_{get_encoding(model).name}"
+    value = row.get(column)
+    return None if value is None or pd.isna(value) else int(value)